@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 import sys
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -91,6 +92,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.middleware.MetricsMiddleware",
+    "common.middleware.ReplicaMiddleware",
+    "common.middleware.SlowQueryMiddleware",
+    "common.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -124,14 +129,55 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+DB_ENGINE = os.getenv("DJANGO_DB_ENGINE", "django.db.backends.sqlite3")
+
+# PostgreSQL connections come from a psycopg pool per worker process;
+# other backends keep persistent connections for DJANGO_DB_CONN_MAX_AGE
+# seconds. Connections are health-checked before use either way.
+DB_POOL = (
+    DB_ENGINE == "django.db.backends.postgresql"
+    and os.getenv("DJANGO_DB_POOL", "true").lower() == "true"
+)
+
+# Connections all workers may hold together (keep it below the server's
+# max_connections); split across the WEB_CONCURRENCY gunicorn workers
+# that entrypoint.sh starts
+DB_MAX_CONNECTIONS = int(os.getenv("DJANGO_DB_MAX_CONNECTIONS", "80"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+DB_POOL_MAX_SIZE = int(
+    os.getenv(
+        "DJANGO_DB_POOL_MAX_SIZE",
+        str(max(1, DB_MAX_CONNECTIONS // WEB_CONCURRENCY)),
+    )
+)
+DB_POOL_OPTIONS = {
+    "min_size": min(
+        int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", "1")), DB_POOL_MAX_SIZE
+    ),
+    "max_size": DB_POOL_MAX_SIZE,
+    # Seconds a request waits for a free connection before failing
+    "timeout": float(os.getenv("DJANGO_DB_POOL_TIMEOUT", "10")),
+    # Seconds before idle connections above min_size are closed
+    "max_idle": float(os.getenv("DJANGO_DB_POOL_MAX_IDLE", "300")),
+    # Seconds before any connection is replaced
+    "max_lifetime": float(os.getenv("DJANGO_DB_POOL_MAX_LIFETIME", "1800")),
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": os.getenv("DJANGO_DB_ENGINE", "django.db.backends.sqlite3"),
+        "ENGINE": DB_ENGINE,
         "NAME": os.getenv("DJANGO_DB_NAME", BASE_DIR / "db.sqlite3"),
         "USER": os.getenv("DJANGO_DB_USER", ""),
         "PASSWORD": os.getenv("DJANGO_DB_PASSWORD", ""),
         "HOST": os.getenv("DJANGO_DB_HOST", ""),
         "PORT": os.getenv("DJANGO_DB_PORT", ""),
+        # Pooled connections go back to the pool after each request
+        "CONN_MAX_AGE": (
+            0 if DB_POOL else int(os.getenv("DJANGO_DB_CONN_MAX_AGE", "60"))
+        ),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pool": DB_POOL_OPTIONS} if DB_POOL else {},
     }
 }
 
@@ -145,6 +191,53 @@ if is_testing:
         "NAME": ":memory:",
     }
 
+# Read replicas, one per entry of DJANGO_DB_REPLICA_HOSTS (host[:port])
+# and/or DJANGO_DB_REPLICA_NAMES (database names, or SQLite files to try
+# it locally); missing values are the primary's. They become the
+# replica1, replica2, ... aliases, used by common.replicas.ReplicaRouter
+DB_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.getenv("DJANGO_DB_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+DB_REPLICA_NAMES = [
+    name.strip()
+    for name in os.getenv("DJANGO_DB_REPLICA_NAMES", "").split(",")
+    if name.strip()
+]
+DATABASE_REPLICAS = []
+for number in range(max(len(DB_REPLICA_HOSTS), len(DB_REPLICA_NAMES))):
+    replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if number < len(DB_REPLICA_HOSTS):
+        host, _, port = DB_REPLICA_HOSTS[number].partition(":")
+        replica["HOST"] = host
+        replica["PORT"] = port or replica.get("PORT", "")
+    if number < len(DB_REPLICA_NAMES):
+        replica["NAME"] = DB_REPLICA_NAMES[number]
+    DATABASES[f"replica{number + 1}"] = replica
+    DATABASE_REPLICAS.append(f"replica{number + 1}")
+
+DATABASE_ROUTERS = ["common.replicas.ReplicaRouter"]
+
+# Replicas further behind the primary than this (seconds) are skipped
+REPLICA_MAX_LAG = float(os.getenv("DJANGO_DB_REPLICA_MAX_LAG", "5"))
+
+# Seconds between replica lag checks, per worker
+REPLICA_LAG_CHECK_INTERVAL = float(
+    os.getenv("DJANGO_DB_REPLICA_LAG_CHECK_INTERVAL", "5")
+)
+
+# Seconds a user reads from the primary after writing, so their own
+# changes are visible before the replicas catch up
+REPLICA_STICKY_SECONDS = int(
+    os.getenv("DJANGO_DB_REPLICA_STICKY_SECONDS", "10")
+)
+
+# Render list pages with compiled serializers (common.compiled_serializers)
+COMPILED_SERIALIZERS = (
+    os.getenv("DJANGO_COMPILED_SERIALIZERS", "true").lower() == "true"
+)
+
 CACHES = {
     "default": {
         "BACKEND": os.getenv(
@@ -170,6 +263,60 @@ SILENCED_SYSTEM_CHECKS = [
 ]
 
 RATELIMIT_USE_CACHE = "default"
+# Turn rate limits off for load tests from a single address
+RATELIMIT_ENABLE = (
+    os.getenv("DJANGO_RATELIMIT_ENABLE", "true").lower() == "true"
+)
+
+# Seconds between checks of the shared reference data version stamps
+# (bounds how long admin edits take to reach every worker).
+REFERENCE_REGISTRY_REFRESH_INTERVAL = float(
+    os.getenv("DJANGO_REFERENCE_REGISTRY_REFRESH_INTERVAL", "5")
+)
+
+# Upper bound on items per batch write (POST .../bulk/)
+BULK_MAX_ITEMS = int(os.getenv("DJANGO_BULK_MAX_ITEMS", "1000"))
+
+# Share of requests measured by common.middleware.ServerTimingMiddleware
+# (DB, cache and serializer time, logged per view and action); off under
+# tests, which enable it with override_settings
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.getenv(
+        "DJANGO_SERVER_TIMING_SAMPLE_RATE",
+        "0" if is_testing else "1" if DEBUG else "0.01",
+    )
+)
+
+# Send the measurements of sampled requests as a Server-Timing header
+SERVER_TIMING_HEADER = (
+    os.getenv("DJANGO_SERVER_TIMING_HEADER", str(DEBUG)).lower() == "true"
+)
+
+# Statements slower than this (milliseconds) go to the slow query log
+# with their plan (common.slow_queries); 0 disables it, as under tests
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.getenv(
+        "DJANGO_SLOW_QUERY_THRESHOLD_MS", "0" if is_testing else "200"
+    )
+)
+
+# Share of slow reads run again under EXPLAIN ANALYZE (PostgreSQL only)
+SLOW_QUERY_ANALYZE_SAMPLE_RATE = float(
+    os.getenv("DJANGO_SLOW_QUERY_ANALYZE_SAMPLE_RATE", "0.1")
+)
+
+# Entries kept by the slow query log (ring buffer in the default cache)
+SLOW_QUERY_LOG_SIZE = int(os.getenv("DJANGO_SLOW_QUERY_LOG_SIZE", "200"))
+
+# Addresses or networks allowed to scrape /metrics without logging in as
+# staff (use the internal network of the Prometheus server)
+METRICS_ALLOWED_IPS = [
+    network.strip()
+    for network in os.getenv(
+        "DJANGO_METRICS_ALLOWED_IPS", "127.0.0.1,::1"
+    ).split(",")
+    if network.strip()
+]
 
 # Use dummy cache for tests (no Redis required)
 # DummyCache doesn't persist data, so rate limiting won't work in tests
@@ -234,7 +381,24 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# JSON through orjson when installed (common.renderers); MessagePack for
+# clients that ask for it when msgpack is installed
+API_RENDERER_CLASSES = [
+    "common.renderers.JSONRenderer",
+    "rest_framework.renderers.BrowsableAPIRenderer",
+]
+API_PARSER_CLASSES = [
+    "common.parsers.JSONParser",
+    "rest_framework.parsers.FormParser",
+    "rest_framework.parsers.MultiPartParser",
+]
+if find_spec("msgpack") is not None:
+    API_RENDERER_CLASSES.insert(1, "common.renderers.MessagePackRenderer")
+    API_PARSER_CLASSES.insert(1, "common.parsers.MessagePackParser")
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": API_RENDERER_CLASSES,
+    "DEFAULT_PARSER_CLASSES": API_PARSER_CLASSES,
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
@@ -364,5 +528,15 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": False,
         },
+        "common.middleware": {
+            "handlers": ["console", "file"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "common.slow_queries": {
+            "handlers": ["console", "file"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
@@ -23,8 +23,11 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from common.views import MetricsView, SlowQueryView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/docs/",
@@ -36,6 +39,9 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc",
     ),
+    path(
+        "api/slow-queries/", SlowQueryView.as_view(), name="slow-queries"
+    ),
     path("api/auth/", include(("accounts.urls", "accounts"), namespace="auth")),
     path("api/", include("catalog.urls")),
 ]
@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 
 from catalog import models
@@ -33,16 +34,47 @@ class ProgrammingTaskAdmin(admin.ModelAdmin):
     )
     search_fields = ("name",)
     list_filter = ("status", "category", "difficulty")
+    list_select_related = ("category", "difficulty", "added_by")
+    raw_id_fields = ("added_by",)
+
+
+class SolutionAdminForm(forms.ModelForm):
+    """Edits code as text instead of the blob it is stored in."""
+
+    code = forms.CharField(widget=forms.Textarea, strip=False)
+
+    class Meta:
+        model = models.Solution
+        exclude = ("code_blob",) + models.Solution.CODE_STATS_FIELDS
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["code"].initial = self.instance.code
+
+    def save(self, commit=True):
+        self.instance.code = self.cleaned_data["code"]
+        return super().save(commit)
 
 
 @admin.register(models.Solution)
 class SolutionAdmin(admin.ModelAdmin):
+    form = SolutionAdminForm
     list_display = ("task", "user", "language", "is_public", "created_at")
     list_filter = ("is_public", "language")
     search_fields = ("task__name", "user__username")
+    list_select_related = ("task", "user", "language")
+    raw_id_fields = ("task", "user")
 
 
 @admin.register(models.Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ("solution", "added_by", "review_type", "created_at")
     list_filter = ("review_type",)
+    # Solution.__str__ reads the task and language.
+    list_select_related = (
+        "solution__task",
+        "solution__language",
+        "added_by",
+    )
+    raw_id_fields = ("solution", "added_by")
@@ -0,0 +1,147 @@
+"""API benchmark suite with a recorded JSON baseline.
+
+Not collected by ``manage.py test`` (the module doesn't match
+``test*.py``); run it explicitly::
+
+    python manage.py test catalog.bench_api
+
+The first run records the baseline, later runs compare against it and
+fail with a report of regressed scenarios. Caches are disabled under
+tests, so the uncached path (querysets and serializers) is measured.
+
+Environment variables:
+    BENCHMARK_SCALE: Dataset size factor, default 1 (see ``DATASET``)
+    BENCHMARK_SEED: Seed of the generated dataset, default 1
+    BENCHMARK_ITERATIONS: Timed requests per scenario, default 30
+    BENCHMARK_TOLERANCE: Allowed median latency increase, default 0.5
+    BENCHMARK_BASELINE: Baseline path, default ``.benchmarks/api.json``
+    BENCHMARK_SAVE: Set to 1 to overwrite the baseline with this run
+"""
+
+import os
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from rest_framework.test import APITestCase
+
+from catalog import loadgen, models
+from common import benchmarking
+from common.benchmarking import Scenario
+
+User = get_user_model()
+
+DATASET = {"users": 200, "tasks": 500, "solutions": 2000, "reviews": 20000}
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, ".benchmarks", "api.json")
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(f"BENCHMARK_{name}", default)
+
+
+class APIBenchmark(APITestCase):
+    """Latency, queries and bytes per endpoint against a baseline."""
+
+    @classmethod
+    def setUpTestData(cls):
+        scale = float(_env("SCALE", "1"))
+        cls.dataset = {
+            kind: max(int(n * scale), 2) for kind, n in DATASET.items()
+        }
+        cls.dataset["reviews"] = min(
+            cls.dataset["reviews"],
+            cls.dataset["solutions"] * (cls.dataset["users"] - 1),
+        )
+        cls.dataset["seed"] = int(_env("SEED", "1"))
+        loadgen.LoadGenerator(prefix="bench", **cls.dataset).run()
+
+        public = models.ProgrammingTask.TaskStatus.PUBLIC
+        cls.task = (
+            models.ProgrammingTask.objects.filter(status=public)
+            .annotate(
+                n=Count("solutions", filter=Q(solutions__is_public=True))
+            )
+            .order_by("-n", "pk")
+            .first()
+        )
+        cls.solution = (
+            models.Solution.objects.filter(is_public=True)
+            .order_by("-positive_reviews_count", "pk")
+            .first()
+        )
+        cls.user = (
+            User.objects.annotate(n=Count("solutions"))
+            .order_by("-n", "pk")
+            .first()
+        )
+
+    def scenarios(self):
+        task, solution, user = self.task.pk, self.solution.pk, self.user
+        return [
+            Scenario("categories", "/api/categories/"),
+            Scenario("difficulties", "/api/difficulties/"),
+            Scenario("languages", "/api/languages/"),
+            Scenario("tasks_list", "/api/tasks/"),
+            Scenario("tasks_list_user", "/api/tasks/", user=user),
+            Scenario("tasks_search", "/api/tasks/?search=graph"),
+            Scenario(
+                "tasks_cursor", "/api/tasks/?pagination=cursor&page_size=100"
+            ),
+            Scenario("task_detail", f"/api/tasks/{task}/"),
+            Scenario("solutions_list", "/api/solutions/"),
+            Scenario("solutions_list_user", "/api/solutions/", user=user),
+            Scenario("solutions_by_task", f"/api/solutions/?task={task}"),
+            Scenario(
+                "solutions_sparse",
+                "/api/solutions/?fields=id,task,code_preview",
+            ),
+            Scenario("solution_detail", f"/api/solutions/{solution}/"),
+            Scenario("solution_raw", f"/api/solutions/{solution}/raw/"),
+            Scenario("reviews_list", "/api/reviews/"),
+            Scenario(
+                "auth_login",
+                "/api/auth/login/",
+                method="post",
+                data={"username": user.username, "password": "loadtest"},
+                iterations=5,
+            ),
+        ]
+
+    def test_endpoints(self):
+        """Measure all scenarios and compare them with the baseline."""
+        iterations = int(_env("ITERATIONS", "30"))
+        path = _env("BASELINE", DEFAULT_BASELINE)
+        results = {
+            scenario.name: benchmarking.measure(
+                self.client, scenario, iterations=iterations
+            )
+            for scenario in self.scenarios()
+        }
+
+        baseline = benchmarking.load_baseline(path)
+        if baseline is not None and baseline["dataset"] != self.dataset:
+            sys.stderr.write(
+                f"\nBaseline {path} was recorded with dataset "
+                f"{baseline['dataset']}, not {self.dataset}; not comparing.\n"
+            )
+            previous = None
+        else:
+            previous = baseline and baseline["results"]
+        sys.stderr.write(
+            "\n" + benchmarking.format_report(results, previous) + "\n"
+        )
+        if baseline is None or _env("SAVE", "") == "1":
+            benchmarking.save_baseline(path, results, self.dataset)
+            sys.stderr.write(f"Baseline written to {path}\n")
+        if previous is None:
+            return
+
+        regressions = benchmarking.compare(
+            previous, results, tolerance=float(_env("TOLERANCE", "0.5"))
+        )
+        if regressions:
+            self.fail(
+                f"{len(regressions)} regression(s) against {path}:\n"
+                + "\n".join(regressions)
+            )
@@ -0,0 +1,135 @@
+"""Serializer throughput: DRF serializers against compiled ones.
+
+Not collected by ``manage.py test``; run it explicitly::
+
+    python manage.py test catalog.bench_serializers
+
+Each scenario renders the first ``PAGE_SIZE`` rows of a list action, as
+the viewset would (``get_serializer(rows, many=True).data``, fields
+built included), with ``COMPILED_SERIALIZERS`` off and on. Rows are
+loaded once, so only serialization is timed. The run fails when the
+compiled path isn't ``BENCHMARK_MIN_SPEEDUP`` times faster (default 2)
+in every scenario.
+
+Environment variables:
+    BENCHMARK_SEED: Seed of the generated dataset, default 1
+    BENCHMARK_ITERATIONS: Timed pages per scenario and mode, default 30
+    BENCHMARK_MIN_SPEEDUP: Required speedup, default 2
+"""
+
+import os
+import statistics
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.test import override_settings
+from rest_framework.test import (
+    APIRequestFactory,
+    APITestCase,
+    force_authenticate,
+)
+
+from catalog import loadgen, views
+
+User = get_user_model()
+
+DATASET = {"users": 50, "tasks": 300, "solutions": 600, "reviews": 3000}
+PAGE_SIZE = 100
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(f"BENCHMARK_{name}", default)
+
+
+class SerializerBenchmark(APITestCase):
+    """Rows per second of list pages, DRF against compiled."""
+
+    @classmethod
+    def setUpTestData(cls):
+        loadgen.LoadGenerator(
+            prefix="bench", seed=int(_env("SEED", "1")), **DATASET
+        ).run()
+        cls.user = (
+            User.objects.annotate(n=Count("solutions"))
+            .order_by("-n", "pk")
+            .first()
+        )
+
+    def scenarios(self):
+        return [
+            ("tasks", views.ProgrammingTaskViewSet, "", None),
+            (
+                "tasks_expanded",
+                views.ProgrammingTaskViewSet,
+                "?expand=category,difficulty",
+                None,
+            ),
+            ("solutions", views.SolutionViewSet, "", None),
+            ("solutions_user", views.SolutionViewSet, "", self.user),
+            ("reviews", views.ReviewViewSet, "", None),
+            (
+                "reviews_expanded",
+                views.ReviewViewSet,
+                "?expand=solution",
+                None,
+            ),
+        ]
+
+    def list_view(self, viewset_class, query: str, user):
+        request = APIRequestFactory().get(f"/api/{query}")
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = viewset_class(action_map={"get": "list"}, format_kwarg=None)
+        view.args, view.kwargs = (), {}
+        view.request = view.initialize_request(request)
+        return view
+
+    def measure(self, view, rows, compiled: bool, iterations: int) -> float:
+        """Median milliseconds to serialize ``rows``."""
+        samples = []
+        with override_settings(COMPILED_SERIALIZERS=compiled):
+            view.get_serializer(rows, many=True).data
+            for _ in range(iterations):
+                started = time.perf_counter()
+                view.get_serializer(rows, many=True).data
+                samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def test_list_pages(self):
+        """Measure all scenarios and require the minimum speedup."""
+        iterations = int(_env("ITERATIONS", "30"))
+        min_speedup = float(_env("MIN_SPEEDUP", "2"))
+        lines = [
+            f"{'scenario':<18}  {'rows':>4}  {'drf ms':>8}  "
+            f"{'compiled ms':>11}  {'rows/s':>9}  {'speedup':>7}"
+        ]
+        slow = []
+        for name, viewset_class, query, user in self.scenarios():
+            view = self.list_view(viewset_class, query, user)
+            rows = list(
+                view.filter_queryset(view.get_queryset())[:PAGE_SIZE]
+            )
+            with override_settings(COMPILED_SERIALIZERS=False):
+                expected = view.get_serializer(rows, many=True).data
+            self.assertEqual(
+                view.get_serializer(rows, many=True).data, expected
+            )
+
+            drf = self.measure(view, rows, False, iterations)
+            compiled = self.measure(view, rows, True, iterations)
+            speedup = drf / compiled
+            lines.append(
+                f"{name:<18}  {len(rows):>4}  {drf:>8.2f}  {compiled:>11.2f}"
+                f"  {len(rows) / compiled * 1000:>9.0f}  {speedup:>6.1f}x"
+            )
+            if speedup < min_speedup:
+                slow.append(f"{name}: {speedup:.1f}x")
+
+        sys.stderr.write("\n" + "\n".join(lines) + "\n")
+        if slow:
+            self.fail(
+                f"Compiled serializers below {min_speedup}x: "
+                + ", ".join(slow)
+            )
@@ -1,6 +1,45 @@
+from django.db import connections
+from django.db.models.expressions import RawSQL
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
 
-from catalog import models
+from catalog import models, search
+from catalog.references import registry
+
+
+class RankedSearchFilter(SearchFilter):
+    """``?search=`` backed by the full-text index, best matches first.
+
+    Views opt in with ``search_index`` (``catalog.search.TASK`` or
+    ``SOLUTION``). Without an index on the current database it behaves like
+    the plain ``SearchFilter`` over ``search_fields``. Matches are a
+    subquery of the filtered queryset and ranked in SQL, so visibility
+    filters, counts and pages cover every match. An explicit
+    ``?ordering=`` or cursor pagination takes precedence over the rank.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        kind = getattr(view, "search_index", None)
+        query = " ".join(self.get_search_terms(request))
+        if not kind or not query or not search.is_available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        match = search.match_sql(kind, query, using=queryset.db)
+        view.search_query, view.search_using = query, queryset.db
+        if match is None:
+            return queryset.none()
+        quote = connections[queryset.db].ops.quote_name
+        opts = queryset.model._meta
+        rank = search.rank_sql(
+            kind,
+            query,
+            f"{quote(opts.db_table)}.{quote(opts.pk.column)}",
+            using=queryset.db,
+        )
+        return queryset.filter(pk__in=RawSQL(*match)).order_by(
+            RawSQL(*rank).asc(), "-pk"
+        )
 
 
 class TaskFilter(filters.FilterSet):
@@ -25,20 +64,67 @@ class TaskFilter(filters.FilterSet):
 
 class SolutionFilter(filters.FilterSet):
     task = filters.NumberFilter(field_name="task")
-    category = filters.CharFilter(
-        field_name="task__category__name", lookup_expr="iexact"
-    )
-    difficulty = filters.CharFilter(
-        field_name="task__difficulty__name", lookup_expr="iexact"
-    )
+    category = filters.CharFilter(method="filter_category")
+    difficulty = filters.CharFilter(method="filter_difficulty")
     task_name = filters.CharFilter(
         field_name="task__name", lookup_expr="icontains"
     )
     language = filters.NumberFilter(field_name="language")
+    code_contains = filters.CharFilter(method="filter_code_contains")
+    identifier = filters.CharFilter(method="filter_identifier")
+
+    def filter_code_contains(self, queryset, name, value):
+        """Filter by a case-sensitive substring of the code.
+
+        Served by the trigram index. Code is stored compressed, so there
+        is nothing to fall back to on databases without the index.
+        """
+        match = search.code_match_sql(value, using=queryset.db)
+        if match is None:
+            raise ValidationError(
+                {"code_contains": "Поиск по коду недоступен."}
+            )
+        return queryset.filter(code_blob__in=RawSQL(*match))
+
+    def filter_identifier(self, queryset, name, value):
+        """Filter by identifiers used in the code (all must occur).
+
+        ``?identifier=heapq`` or ``?identifier=heapq,heappush``.
+        """
+        names = [part for part in value.replace(",", " ").split() if part]
+        for identifier in names:
+            queryset = queryset.filter(
+                pk__in=models.SolutionIdentifier.objects.filter(
+                    name=identifier
+                ).values("solution_id")
+            )
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        """Filter by category name, resolved to an id without a JOIN."""
+        category_id = registry.id_of(models.Category, value)
+        if category_id is None:
+            return queryset.none()
+        return queryset.filter(task__category_id=category_id)
+
+    def filter_difficulty(self, queryset, name, value):
+        """Filter by difficulty name, resolved to an id without a JOIN."""
+        difficulty_id = registry.id_of(models.Difficulty, value)
+        if difficulty_id is None:
+            return queryset.none()
+        return queryset.filter(task__difficulty_id=difficulty_id)
 
     class Meta:
         model = models.Solution
-        fields = ("task", "category", "difficulty", "task_name", "language")
+        fields = (
+            "task",
+            "category",
+            "difficulty",
+            "task_name",
+            "language",
+            "code_contains",
+            "identifier",
+        )
 
 
 class ReviewFilter(filters.FilterSet):
@@ -0,0 +1,525 @@
+"""Reproducible synthetic catalogs for load testing.
+
+``LoadGenerator`` fills the database with users, tasks, solutions and
+reviews drawn from a seeded ``random.Random``, so the same options and
+seed always produce the same content, timestamps included: they count
+back from ``EPOCH``, not from the time of the run. Popularity is
+Zipf-like: a few users write most solutions, a few tasks and languages
+attract most of them, and a few solutions collect most reviews. Code
+sizes follow a log-normal distribution capped at the validator limit.
+
+Rows are written with ``bulk_create`` in batches; on PostgreSQL with
+psycopg 3, reviews, by far the largest table, are streamed with COPY.
+``auto_now`` stamps tasks and solutions with the time of the insert, so
+each batch gets its generated timestamps back with one ``bulk_update``,
+as in ``catalog.transfer``.
+Review counts are drawn before solutions are inserted, so the
+denormalized counters are written with the solutions and reviews never
+need an UPDATE. ``bulk_create`` sends no signals: indexes, task statuses
+and caches are maintained here, as in ``catalog.transfer``.
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+import random
+import time
+from array import array
+from bisect import bisect
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db import models as django_models
+from django.db.models import Exists, OuterRef
+
+from catalog import models, search
+from catalog.references import registry
+from common.cache_utils import (
+    NAMESPACE_SOLUTIONS,
+    NAMESPACE_TASKS,
+    bump_namespace,
+)
+
+User = get_user_model()
+
+# Same limit as ``validators.validate_code_length``.
+MAX_CODE_LENGTH = 1_000_000
+DEFAULT_BATCH_SIZE = 5000
+# Generated timestamps lie before this instant.
+EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+WORDS = (
+    "array", "binary", "bucket", "cache", "count", "depth", "edge",
+    "frontier", "graph", "heap", "index", "interval", "key", "left",
+    "matrix", "merge", "node", "offset", "pair", "parent", "path",
+    "prefix", "queue", "range", "right", "root", "score", "segment",
+    "stack", "suffix", "target", "total", "tree", "value", "visited",
+    "weight", "window",
+)
+CODE_TEMPLATES = (
+    "def {a}_{b}({c}, {d}):",
+    "    {a} = {b}({c}, {d})",
+    "    for {a} in range(len({b})):",
+    "        if {a}[{b}] > {c}:",
+    "            {a} += {b}[{c}] * {n}",
+    "        {a}.append({b} + {n})",
+    "    while {a} and {b} < {n}:",
+    "    return {a}_{b}",
+    "# {a} {b} {c}",
+    "",
+)
+CODE_POOL_SIZE = 4096
+# Rounds of Zipf draws per solution before reviewers are picked uniformly.
+REVIEWER_DRAWS = 16
+REVIEW_COLUMNS = (
+    "solution_id",
+    "added_by_id",
+    "review_type",
+    "created_at",
+    "updated_at",
+)
+
+
+class ZipfSampler:
+    """Draws indexes in ``range(n)`` with Zipf-like probabilities.
+
+    The item of popularity rank ``r`` (from 1) has weight ``1 / r**s``.
+    Ranks are shuffled over the indexes, so popularity doesn't follow
+    insertion order.
+    """
+
+    def __init__(self, n: int, exponent: float, rng: random.Random):
+        self.ranked = list(range(n))
+        rng.shuffle(self.ranked)
+        self.cum_weights = []
+        total = 0.0
+        for rank in range(1, n + 1):
+            total += rank ** -exponent
+            self.cum_weights.append(total)
+        self.rng = rng
+
+    def sample(self, k: int) -> List[int]:
+        return self.rng.choices(
+            self.ranked, cum_weights=self.cum_weights, k=k
+        )
+
+    def one(self) -> int:
+        total = self.cum_weights[-1]
+        return self.ranked[bisect(self.cum_weights, self.rng.random() * total)]
+
+
+class LoadGenerator:
+    """Generates a synthetic catalog; see the module docstring.
+
+    Args:
+        users, tasks, solutions, reviews: Number of rows to create
+        seed: Seed of the random generator
+        zipf_exponent: Skew of popularity (0 is uniform)
+        public_ratio: Share of public solutions and tasks
+        positive_ratio: Share of positive reviews
+        code_median: Median code length in characters
+        max_code_length: Cap on code length
+        days: Timestamps are spread over this many days before ``EPOCH``
+        prefix: Prefix of generated usernames
+        password: Password of every generated user
+        batch_size: Rows per INSERT or COPY batch
+        index: Whether to update the search and code indexes
+        log: Called with progress messages
+    """
+
+    def __init__(
+        self,
+        *,
+        users: int,
+        tasks: int,
+        solutions: int,
+        reviews: int,
+        seed: int = 0,
+        zipf_exponent: float = 1.1,
+        public_ratio: float = 0.7,
+        positive_ratio: float = 0.8,
+        code_median: int = 1200,
+        max_code_length: int = MAX_CODE_LENGTH,
+        days: int = 365,
+        prefix: str = "load",
+        password: str = "loadtest",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        index: bool = True,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        if users < 1 or (solutions and tasks < 1):
+            raise ValueError("Solutions need at least one user and task.")
+        if reviews and users < 2:
+            raise ValueError("Reviews need at least two users.")
+        if reviews > solutions * (users - 1):
+            raise ValueError(
+                "Too many reviews: each user reviews a solution at most "
+                "once and never their own."
+            )
+        if not 1 <= code_median <= max_code_length <= MAX_CODE_LENGTH:
+            raise ValueError(
+                f"Code lengths must be between 1 and {MAX_CODE_LENGTH}."
+            )
+        self.counts = {
+            "users": users,
+            "tasks": tasks,
+            "solutions": solutions,
+            "reviews": reviews,
+        }
+        self.rng = random.Random(seed)
+        self.zipf_exponent = zipf_exponent
+        self.public_ratio = public_ratio
+        self.positive_ratio = positive_ratio
+        self.code_median = code_median
+        self.max_code_length = max_code_length
+        self.prefix = prefix
+        self.password = password
+        self.batch_size = batch_size
+        self.index = index
+        self.log = log or (lambda message: None)
+        self.span = datetime.timedelta(days=days).total_seconds()
+        self.user_ids = array("q")
+        self.task_ids = array("q")
+
+    def run(self) -> dict:
+        """Generate everything.
+
+        Returns:
+            Number of created rows by kind
+        """
+        if User.objects.filter(
+            username__startswith=f"{self.prefix}_"
+        ).exists():
+            raise ValueError(
+                f"Users named {self.prefix}_* exist; pick another prefix."
+            )
+        try:
+            self._step("users", self.generate_users)
+            self._step("tasks", self.generate_tasks)
+            solutions = self._step("solutions", self.generate_solutions)
+            self._step("reviews", lambda: self.generate_reviews(*solutions))
+        finally:
+            bump_namespace(NAMESPACE_TASKS, NAMESPACE_SOLUTIONS)
+            registry.invalidate()
+        return self.counts
+
+    def _step(self, kind: str, generate: Callable):
+        started = time.monotonic()
+        result = generate()
+        elapsed = time.monotonic() - started
+        self.log(f"{self.counts[kind]} {kind} in {elapsed:.1f}s")
+        return result
+
+    def _timestamp(self) -> datetime.datetime:
+        return EPOCH - datetime.timedelta(
+            seconds=int(self.rng.random() * self.span)
+        )
+
+    def _batches(self, total: int) -> Iterator[range]:
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def generate_users(self) -> None:
+        password = make_password(self.password)
+        for batch in self._batches(self.counts["users"]):
+            users = []
+            for number in batch:
+                joined = self._timestamp()
+                users.append(
+                    User(
+                        username=f"{self.prefix}_{number:07d}",
+                        password=password,
+                        date_joined=joined,
+                    )
+                )
+            User.objects.bulk_create(users)
+            self.user_ids.extend(user.pk for user in users)
+
+    def generate_tasks(self) -> None:
+        category_ids = self._reference_ids(models.Category)
+        difficulty_ids = self._reference_ids(models.Difficulty)
+        owners = ZipfSampler(
+            len(self.user_ids), self.zipf_exponent, self.rng
+        )
+        status = models.ProgrammingTask.TaskStatus
+        for batch in self._batches(self.counts["tasks"]):
+            tasks, stamps = [], []
+            for number in batch:
+                created_at = self._timestamp()
+                stamps.append(created_at)
+                public = self.rng.random() < self.public_ratio
+                tasks.append(
+                    models.ProgrammingTask(
+                        name=f"{self._words(3).capitalize()} #{number}",
+                        description=self._words(self.rng.randint(5, 40)),
+                        category_id=self.rng.choice(category_ids),
+                        difficulty_id=self.rng.choice(difficulty_ids),
+                        added_by_id=self.user_ids[owners.one()],
+                        status=status.PUBLIC if public else status.PRIVATE,
+                    )
+                )
+            with transaction.atomic():
+                models.ProgrammingTask.objects.bulk_create(tasks)
+                _restore_timestamps(models.ProgrammingTask, tasks, stamps)
+                if self.index:
+                    search.index_tasks([task.pk for task in tasks])
+            self.task_ids.extend(task.pk for task in tasks)
+
+    def generate_solutions(self):
+        """Insert solutions with their final review counters.
+
+        Returns:
+            ``(ids, owners, review_counts, positive_counts)`` arrays, by
+            solution, for ``generate_reviews``
+        """
+        total = self.counts["solutions"]
+        review_counts = self._review_counts(total)
+        positive_counts = array(
+            "l",
+            (
+                sum(self.rng.random() < self.positive_ratio for _ in range(n))
+                for n in review_counts
+            ),
+        )
+        language_ids = self._reference_ids(models.ProgrammingLanguage)
+        languages = ZipfSampler(
+            len(language_ids), self.zipf_exponent, self.rng
+        )
+        tasks = ZipfSampler(len(self.task_ids), self.zipf_exponent, self.rng)
+        authors = ZipfSampler(
+            len(self.user_ids), self.zipf_exponent, self.rng
+        )
+        pool = self._code_pool()
+        ids, owners = array("q"), array("q")
+        for batch in self._batches(total):
+            solutions, stamps = [], []
+            for number in batch:
+                created_at = self._timestamp()
+                stamps.append(created_at)
+                public = self.rng.random() < self.public_ratio
+                owner = authors.one()
+                owners.append(owner)
+                positive = positive_counts[number]
+                solutions.append(
+                    models.Solution(
+                        task_id=self.task_ids[tasks.one()],
+                        language_id=language_ids[languages.one()],
+                        user_id=self.user_ids[owner],
+                        code=self._code(pool),
+                        explanation=(
+                            self._words(self.rng.randint(3, 60))
+                            if self.rng.random() < 0.5
+                            else ""
+                        ),
+                        is_public=public,
+                        published_at=created_at if public else None,
+                        positive_reviews_count=positive,
+                        negative_reviews_count=(
+                            review_counts[number] - positive
+                        ),
+                    )
+                )
+            with transaction.atomic():
+                models.Solution.objects.bulk_create(solutions)
+                _restore_timestamps(models.Solution, solutions, stamps)
+                batch_ids = [solution.pk for solution in solutions]
+                if self.index:
+                    search.index_solutions(batch_ids)
+                    search.index_code(batch_ids)
+            ids.extend(batch_ids)
+        self._publish_tasks()
+        return ids, owners, review_counts, positive_counts
+
+    def generate_reviews(
+        self,
+        solution_ids: Sequence[int],
+        owners: Sequence[int],
+        review_counts: Sequence[int],
+        positive_counts: Sequence[int],
+    ) -> None:
+        reviewers = ZipfSampler(
+            len(self.user_ids), self.zipf_exponent, self.rng
+        )
+        write = self._copy_reviews if _can_copy() else self._insert_reviews
+        rows = []
+        for solution_id, owner, count, positive in zip(
+            solution_ids, owners, review_counts, positive_counts
+        ):
+            for position, user in enumerate(
+                self._reviewers(reviewers, owner, count)
+            ):
+                created_at = self._timestamp()
+                rows.append(
+                    (
+                        solution_id,
+                        self.user_ids[user],
+                        int(position < positive),
+                        created_at,
+                    )
+                )
+            if len(rows) >= self.batch_size:
+                write(rows)
+                rows = []
+        if rows:
+            write(rows)
+
+    def _review_counts(self, solutions: int) -> array:
+        """Spread the reviews over solutions, at most one per other user."""
+        counts = array("l", [0]) * solutions
+        reviews = self.counts["reviews"]
+        if not reviews:
+            return counts
+        limit = len(self.user_ids) - 1
+        popularity = ZipfSampler(solutions, self.zipf_exponent, self.rng)
+        overflow = 0
+        for batch in self._batches(reviews):
+            for index in popularity.sample(len(batch)):
+                if counts[index] < limit:
+                    counts[index] += 1
+                else:
+                    overflow += 1
+        # Reviews past the limit go to other solutions, in random order.
+        order = list(range(solutions))
+        self.rng.shuffle(order)
+        for index in order:
+            if not overflow:
+                break
+            extra = min(limit - counts[index], overflow)
+            counts[index] += extra
+            overflow -= extra
+        return counts
+
+    def _reviewers(
+        self, sampler: ZipfSampler, owner: int, count: int
+    ) -> List[int]:
+        """Pick ``count`` distinct users other than ``owner``."""
+        if count * 2 > len(self.user_ids):
+            others = [
+                user for user in range(len(self.user_ids)) if user != owner
+            ]
+            return self.rng.sample(others, count)
+        # A dict keeps the draw order, so results are reproducible.
+        picked = {}
+        for _ in range(REVIEWER_DRAWS):
+            if len(picked) >= count:
+                return list(picked)[:count]
+            for user in sampler.sample(count - len(picked) + 2):
+                if user != owner:
+                    picked[user] = None
+        # Steep distributions rarely reach the tail: fill up uniformly.
+        while len(picked) < count:
+            user = self.rng.randrange(len(self.user_ids))
+            if user != owner:
+                picked[user] = None
+        return list(picked)
+
+    def _insert_reviews(self, rows: List[tuple]) -> None:
+        # Plain executemany: building a Review per row costs more than the
+        # INSERT itself.
+        adapt = connection.ops.adapt_datetimefield_value
+        params = []
+        for solution_id, user_id, review_type, created_at in rows:
+            created_at = adapt(created_at)
+            params.append(
+                (solution_id, user_id, review_type, created_at, created_at)
+            )
+        placeholders = ", ".join(["%s"] * len(REVIEW_COLUMNS))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {_review_table()} ({', '.join(REVIEW_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                params,
+            )
+
+    def _copy_reviews(self, rows: List[tuple]) -> None:
+        with transaction.atomic(), connection.cursor() as cursor:
+            with cursor.copy(
+                f"COPY {_review_table()} ({', '.join(REVIEW_COLUMNS)}) "
+                "FROM STDIN"
+            ) as copy:
+                for solution_id, user_id, review_type, created_at in rows:
+                    copy.write_row(
+                        (
+                            solution_id,
+                            user_id,
+                            review_type,
+                            created_at,
+                            created_at,
+                        )
+                    )
+
+    def _publish_tasks(self) -> None:
+        """Make tasks with a public solution public, like the services."""
+        status = models.ProgrammingTask.TaskStatus
+        for start in range(0, len(self.task_ids), self.batch_size):
+            models.ProgrammingTask.objects.filter(
+                pk__in=list(self.task_ids[start:start + self.batch_size]),
+                status=status.PRIVATE,
+            ).filter(
+                Exists(
+                    models.Solution.objects.filter(
+                        task=OuterRef("pk"), is_public=True
+                    )
+                )
+            ).update(status=status.PUBLIC)
+
+    def _reference_ids(self, reference: type) -> List[int]:
+        ids = list(
+            reference.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        if not ids:
+            raise ValueError(
+                f"No {reference._meta.verbose_name_plural} yet; "
+                "run migrate or seed_data first."
+            )
+        return ids
+
+    def _words(self, count: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=count))
+
+    def _code_pool(self) -> List[str]:
+        pool = []
+        for _ in range(CODE_POOL_SIZE):
+            a, b, c, d = self.rng.choices(WORDS, k=4)
+            template = self.rng.choice(CODE_TEMPLATES)
+            pool.append(
+                template.format(a=a, b=b, c=c, d=d, n=self.rng.randint(0, 99))
+            )
+        return pool
+
+    def _code(self, pool: List[str]) -> str:
+        length = self.rng.lognormvariate(math.log(self.code_median), 1.0)
+        length = max(1, min(int(length), self.max_code_length))
+        lines = self.rng.choices(pool, k=length // 16 + 2)
+        code = "\n".join(lines)[:length].rstrip()
+        # The validator rejects blank code.
+        return code or "pass"
+
+
+def _restore_timestamps(
+    model: type,
+    objects: List[django_models.Model],
+    stamps: List[datetime.datetime],
+) -> None:
+    """Put generated timestamps back over the ones ``auto_now`` set."""
+    for obj, stamp in zip(objects, stamps):
+        obj.created_at = obj.updated_at = stamp
+    model.objects.bulk_update(
+        objects, ("created_at", "updated_at"), batch_size=500
+    )
+
+
+def _review_table() -> str:
+    return connection.ops.quote_name(models.Review._meta.db_table)
+
+
+def _can_copy() -> bool:
+    """Whether reviews can be streamed with psycopg 3's COPY support."""
+    if connection.vendor != "postgresql":
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
@@ -0,0 +1,48 @@
+"""Report solution code storage and collect unreferenced blobs."""
+
+from django.core.management.base import BaseCommand
+
+from catalog import services
+
+
+class Command(BaseCommand):
+    """Management command for the deduplicated code blob store."""
+
+    help = "Report code storage savings and optionally collect garbage"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--gc",
+            action="store_true",
+            help="Repair reference counts and delete unreferenced blobs",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="With --gc, only report unreferenced blobs",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the report."""
+        stats = services.code_storage_stats()
+        logical = stats["logical_bytes"]
+        stored = stats["stored_bytes"]
+        self.stdout.write(
+            f"Solutions: {stats['solutions']}, blobs: {stats['blobs']}\n"
+            f"Code size: {logical} bytes, distinct: "
+            f"{stats['unique_bytes']} bytes, stored: {stored} bytes"
+        )
+        if logical:
+            self.stdout.write(f"Saved: {1 - stored / logical:.1%}")
+
+        if not options["gc"]:
+            return
+        collected = services.collect_code_blobs(dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(f"{collected} blobs are unreferenced")
+            )
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Deleted {collected} unreferenced blobs")
+        )
@@ -0,0 +1,61 @@
+"""Export the catalog as NDJSON."""
+
+import gzip
+import io
+import sys
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand
+
+from catalog import transfer
+
+
+class Command(BaseCommand):
+    """Management command streaming the catalog to a file or stdout."""
+
+    help = (
+        "Export reference data, users, tasks, solutions and reviews as "
+        "NDJSON (see catalog/transfer.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            nargs="?",
+            default="-",
+            help="Output file, '-' for stdout; a .gz name implies --gzip",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the output with gzip",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=transfer.DEFAULT_CHUNK_SIZE,
+            help="Rows fetched from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the export."""
+        output = options["output"]
+        compress = options["gzip"] or output.endswith(".gz")
+        with ExitStack() as stack:
+            binary = sys.stdout.buffer
+            if output != "-":
+                binary = stack.enter_context(open(output, "wb"))
+            if compress:
+                binary = stack.enter_context(
+                    gzip.GzipFile(fileobj=binary, mode="wb")
+                )
+            out = io.TextIOWrapper(binary, encoding="utf-8")
+            counts = transfer.export_catalog(
+                out, chunk_size=options["chunk_size"]
+            )
+            # Leave closing to the stack, which never closes stdout.
+            out.detach()
+
+        summary = ", ".join(f"{n} {model}" for model, n in counts.items())
+        # stdout may carry the export itself.
+        self.stderr.write(self.style.SUCCESS(f"✓ Exported {summary}"))
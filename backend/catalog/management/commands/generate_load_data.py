@@ -0,0 +1,111 @@
+"""Generate a large synthetic catalog for load testing."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import loadgen
+
+
+class Command(BaseCommand):
+    """Management command wrapping catalog.loadgen.LoadGenerator."""
+
+    help = (
+        "Bulk insert reproducible synthetic users, tasks, solutions and "
+        "reviews with Zipf-like popularity, for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=2000)
+        parser.add_argument("--solutions", type=int, default=10_000)
+        parser.add_argument("--reviews", type=int, default=50_000)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Same seed and options give the same data",
+        )
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=1.1,
+            help="Skew of user, task, language and solution popularity; "
+            "0 is uniform",
+        )
+        parser.add_argument(
+            "--public-ratio",
+            type=float,
+            default=0.7,
+            help="Share of public tasks and solutions",
+        )
+        parser.add_argument(
+            "--positive-ratio",
+            type=float,
+            default=0.8,
+            help="Share of positive reviews",
+        )
+        parser.add_argument(
+            "--code-median",
+            type=int,
+            default=1200,
+            help="Median code length; lengths are log-normal",
+        )
+        parser.add_argument(
+            "--max-code-length",
+            type=int,
+            default=loadgen.MAX_CODE_LENGTH,
+            help="Cap on code length, at most the validator limit",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread timestamps over this many days before "
+            "2025-01-01 UTC",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Generated users are named <prefix>_0000000 and up",
+        )
+        parser.add_argument(
+            "--password",
+            default="loadtest",
+            help="Password of every generated user",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=loadgen.DEFAULT_BATCH_SIZE,
+            help="Rows per INSERT (or COPY on PostgreSQL)",
+        )
+        parser.add_argument(
+            "--no-index",
+            action="store_true",
+            help="Skip search indexing; run rebuild_search_index later",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the generation."""
+        try:
+            generator = loadgen.LoadGenerator(
+                users=options["users"],
+                tasks=options["tasks"],
+                solutions=options["solutions"],
+                reviews=options["reviews"],
+                seed=options["seed"],
+                zipf_exponent=options["zipf_exponent"],
+                public_ratio=options["public_ratio"],
+                positive_ratio=options["positive_ratio"],
+                code_median=options["code_median"],
+                max_code_length=options["max_code_length"],
+                days=options["days"],
+                prefix=options["prefix"],
+                password=options["password"],
+                batch_size=options["batch_size"],
+                index=not options["no_index"],
+                log=lambda message: self.stdout.write(f"✓ {message}"),
+            )
+            generator.run()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS("✓ Load data generated"))
@@ -0,0 +1,61 @@
+"""Import a catalog exported by export_catalog."""
+
+import gzip
+import io
+import sys
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import transfer
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class Command(BaseCommand):
+    """Management command loading NDJSON in chunks."""
+
+    help = (
+        "Import NDJSON written by export_catalog, plain or gzipped; "
+        "existing references, users and tasks are matched by name, "
+        "solutions by task, author and code"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", nargs="?", default="-", help="Input file, '-' for stdin"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=transfer.DEFAULT_CHUNK_SIZE,
+            help="Lines inserted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the import."""
+        importer = transfer.CatalogImporter(chunk_size=options["chunk_size"])
+        with ExitStack() as stack:
+            binary = sys.stdin.buffer
+            if options["input"] != "-":
+                binary = stack.enter_context(open(options["input"], "rb"))
+            binary = io.BufferedReader(binary)
+            if binary.peek(2)[:2] == GZIP_MAGIC:
+                binary = stack.enter_context(
+                    gzip.GzipFile(fileobj=binary, mode="rb")
+                )
+            lines = io.TextIOWrapper(binary, encoding="utf-8")
+            try:
+                created = importer.run(lines)
+            except transfer.CatalogImportError as exc:
+                raise CommandError(f"Import stopped at {exc}") from exc
+            finally:
+                lines.detach()
+
+        summary = ", ".join(f"{n} {model}" for model, n in created.items())
+        self.stdout.write(self.style.SUCCESS(f"✓ Imported {summary}"))
+        if importer.skipped:
+            skipped = ", ".join(
+                f"{n} {model}" for model, n in importer.skipped.items()
+            )
+            self.stdout.write(f"Already present: {skipped}")
@@ -0,0 +1,43 @@
+"""Repopulate the full-text search index of tasks and solutions."""
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from catalog import search
+
+
+class Command(BaseCommand):
+    """Management command to rebuild the search index from scratch."""
+
+    help = "Rebuild the full-text search index of tasks and solutions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of documents written per batch",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to rebuild the index on",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the rebuild."""
+        using = options["database"]
+        with transaction.atomic(using=using):
+            total = search.rebuild(
+                using=using, batch_size=options["batch_size"]
+            )
+        if not search.is_available(using):
+            self.stdout.write(
+                self.style.WARNING(
+                    "No search index on this database, run migrate first"
+                )
+            )
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Indexed {total} search documents")
+        )
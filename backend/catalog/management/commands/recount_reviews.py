@@ -0,0 +1,42 @@
+"""Recompute denormalized review counters on solutions."""
+
+from django.core.management.base import BaseCommand
+
+from catalog import services
+
+
+class Command(BaseCommand):
+    """Management command to repair drifted review counters."""
+
+    help = "Recompute positive/negative review counters for all solutions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of solution IDs updated per statement",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted solutions, do not update them",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the recount."""
+        drifted = services.recount_review_counters(
+            batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        if options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{drifted} solutions have drifted counters"
+                )
+            )
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Recounted reviews, fixed {drifted} solutions"
+            )
+        )
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_counters(apps, schema_editor):
+    Solution = apps.get_model('catalog', 'Solution')
+    Review = apps.get_model('catalog', 'Review')
+
+    def count_of(review_type):
+        return Coalesce(
+            Subquery(
+                Review.objects.filter(
+                    solution=OuterRef('pk'), review_type=review_type
+                )
+                .order_by()
+                .values('solution')
+                .annotate(total=Count('id'))
+                .values('total')
+            ),
+            0,
+        )
+
+    Solution.objects.update(
+        positive_reviews_count=count_of(1),
+        negative_reviews_count=count_of(0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_alter_programmingtask_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solution',
+            name='negative_reviews_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='positive_reviews_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(
+            backfill_review_counters, migrations.RunPython.noop
+        ),
+    ]
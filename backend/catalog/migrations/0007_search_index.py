@@ -0,0 +1,78 @@
+from django.db import migrations
+
+SQLITE_TABLES = ('catalog_task_fts', 'catalog_solution_fts')
+POSTGRES_TABLES = ('catalog_task_search', 'catalog_solution_search')
+
+TASK_DOCUMENTS = (
+    "SELECT t.id, t.name, t.description FROM catalog_programmingtask t"
+)
+SOLUTION_DOCUMENTS = (
+    "SELECT s.id, t.name || ' ' || l.name || ' ' || u.username, "
+    "s.explanation FROM catalog_solution s "
+    "JOIN catalog_programmingtask t ON t.id = s.task_id "
+    "JOIN catalog_programminglanguage l ON l.id = s.language_id "
+    "JOIN auth_user u ON u.id = s.user_id"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute("PRAGMA compile_options")
+            options = {row[0] for row in cursor.fetchall()}
+            if 'ENABLE_FTS5' not in options:
+                # Search falls back to plain ILIKE filtering.
+                return
+            for table, documents in zip(
+                SQLITE_TABLES, (TASK_DOCUMENTS, SOLUTION_DOCUMENTS)
+            ):
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {table} USING fts5("
+                    "title, body, tokenize='unicode61 remove_diacritics 2')"
+                )
+                cursor.execute(
+                    f"INSERT INTO {table} (rowid, title, body) {documents}"
+                )
+        elif vendor == 'postgresql':
+            for table, documents in zip(
+                POSTGRES_TABLES, (TASK_DOCUMENTS, SOLUTION_DOCUMENTS)
+            ):
+                cursor.execute(
+                    f"CREATE TABLE {table} ("
+                    "object_id bigint PRIMARY KEY, "
+                    "title text NOT NULL, "
+                    "body text NOT NULL, "
+                    "document tsvector NOT NULL)"
+                )
+                cursor.execute(
+                    f"CREATE INDEX {table}_document_gin "
+                    f"ON {table} USING gin (document)"
+                )
+                cursor.execute(
+                    f"INSERT INTO {table} (object_id, title, body, document) "
+                    "SELECT d.id, d.title, d.body, "
+                    "setweight(to_tsvector('simple', d.title), 'A') || "
+                    "setweight(to_tsvector('simple', d.body), 'B') "
+                    f"FROM ({documents}) AS d(id, title, body)"
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    tables = {'sqlite': SQLITE_TABLES, 'postgresql': POSTGRES_TABLES}
+    with schema_editor.connection.cursor() as cursor:
+        for table in tables.get(vendor, ()):
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_solution_review_counters'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
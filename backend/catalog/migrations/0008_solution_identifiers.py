@@ -0,0 +1,93 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:44
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+IDENTIFIER_RE = re.compile(r"[^\W\d]\w+", re.UNICODE)
+SQLITE_TABLE = 'catalog_solution_code_fts'
+POSTGRES_TABLE = 'catalog_solution_code_search'
+
+
+def create_code_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT sqlite_version()")
+            version = tuple(int(p) for p in cursor.fetchone()[0].split('.'))
+            cursor.execute("PRAGMA compile_options")
+            options = {row[0] for row in cursor.fetchall()}
+            # The trigram tokenizer needs SQLite 3.34+.
+            if version < (3, 34) or 'ENABLE_FTS5' not in options:
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5("
+                "code, tokenize='trigram case_sensitive 1')"
+            )
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} (rowid, code) "
+                "SELECT id, code FROM catalog_solution"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE TABLE {POSTGRES_TABLE} ("
+                "object_id bigint PRIMARY KEY, code text NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX {POSTGRES_TABLE}_trgm "
+                f"ON {POSTGRES_TABLE} USING gin (code gin_trgm_ops)"
+            )
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_TABLE} (object_id, code) "
+                "SELECT id, code FROM catalog_solution"
+            )
+
+
+def drop_code_index(apps, schema_editor):
+    table = {'sqlite': SQLITE_TABLE, 'postgresql': POSTGRES_TABLE}.get(
+        schema_editor.connection.vendor
+    )
+    if table:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def backfill_identifiers(apps, schema_editor):
+    Solution = apps.get_model('catalog', 'Solution')
+    SolutionIdentifier = apps.get_model('catalog', 'SolutionIdentifier')
+    batch = []
+    for pk, code in Solution.objects.values_list('id', 'code').iterator():
+        batch.extend(
+            SolutionIdentifier(solution_id=pk, name=name)
+            for name in set(IDENTIFIER_RE.findall(code))
+            if len(name) <= 64
+        )
+        if len(batch) >= 5000:
+            SolutionIdentifier.objects.bulk_create(batch)
+            batch = []
+    SolutionIdentifier.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolutionIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('solution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identifiers', to='catalog.solution')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'solution'), name='unique_identifier_per_solution')],
+            },
+        ),
+        migrations.RunPython(backfill_identifiers, migrations.RunPython.noop),
+        migrations.RunPython(create_code_index, drop_code_index),
+    ]
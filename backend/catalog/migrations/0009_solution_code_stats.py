@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+def backfill_code_stats(apps, schema_editor):
+    Solution = apps.get_model('catalog', 'Solution')
+    batch = []
+    for solution in Solution.objects.only('id', 'code').iterator(
+        chunk_size=500
+    ):
+        code = solution.code
+        solution.code_length = len(code)
+        solution.code_lines = (
+            code.count('\n') + (0 if code.endswith('\n') else 1)
+            if code
+            else 0
+        )
+        solution.code_preview = '\n'.join(code.split('\n', 10)[:10])[:500]
+        batch.append(solution)
+        if len(batch) >= 500:
+            Solution.objects.bulk_update(
+                batch, ['code_length', 'code_lines', 'code_preview']
+            )
+            batch = []
+    Solution.objects.bulk_update(
+        batch, ['code_length', 'code_lines', 'code_preview']
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_solution_identifiers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solution',
+            name='code_length',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='code_lines',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='code_preview',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_code_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+import hashlib
+import zlib
+
+from django.db import migrations
+
+
+def move_code_to_blobs(apps, schema_editor):
+    Solution = apps.get_model('catalog', 'Solution')
+    CodeBlob = apps.get_model('catalog', 'CodeBlob')
+    ref_counts = {}
+    batch = []
+    for solution in Solution.objects.only('id', 'code').iterator(
+        chunk_size=500
+    ):
+        raw = solution.code.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest not in ref_counts:
+            payload = zlib.compress(raw, 6)
+            codec = 'zlib'
+            if len(payload) >= len(raw):
+                codec, payload = 'raw', raw
+            CodeBlob.objects.create(
+                digest=digest, codec=codec, data=payload, size=len(raw)
+            )
+            ref_counts[digest] = 0
+        ref_counts[digest] += 1
+        solution.code_blob_id = digest
+        batch.append(solution)
+        if len(batch) >= 500:
+            Solution.objects.bulk_update(batch, ['code_blob'])
+            batch = []
+    Solution.objects.bulk_update(batch, ['code_blob'])
+    for digest, count in ref_counts.items():
+        CodeBlob.objects.filter(pk=digest).update(ref_count=count)
+
+
+def move_code_from_blobs(apps, schema_editor):
+    Solution = apps.get_model('catalog', 'Solution')
+    batch = []
+    for solution in Solution.objects.select_related('code_blob').iterator(
+        chunk_size=500
+    ):
+        blob = solution.code_blob
+        raw = bytes(blob.data)
+        if blob.codec == 'zlib':
+            raw = zlib.decompress(raw)
+        elif blob.codec != 'raw':
+            import zstandard
+
+            raw = zstandard.ZstdDecompressor().decompress(raw)
+        solution.code = raw.decode('utf-8')
+        batch.append(solution)
+        if len(batch) >= 500:
+            Solution.objects.bulk_update(batch, ['code'])
+            batch = []
+    Solution.objects.bulk_update(batch, ['code'])
+
+
+class Migration(migrations.Migration):
+    """Copy solution code into deduplicated, zlib-compressed blobs.
+
+    Kept apart from the schema changes: PostgreSQL refuses to ALTER a
+    table with pending deferred FK checks in the same transaction.
+    """
+
+    dependencies = [
+        ('catalog', '0010_code_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_code_to_blobs, move_code_from_blobs),
+    ]
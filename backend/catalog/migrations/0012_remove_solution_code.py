@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_move_code_to_blobs'),
+    ]
+
+    operations = [
+        # A default lets the reverse migration re-add the column.
+        migrations.AlterField(
+            model_name='solution',
+            name='code',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='solution',
+            name='code',
+        ),
+        migrations.AlterField(
+            model_name='solution',
+            name='code_blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='solutions', to='catalog.codeblob'),
+        ),
+    ]
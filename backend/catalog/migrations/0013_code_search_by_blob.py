@@ -0,0 +1,124 @@
+import zlib
+
+from django.db import migrations
+
+OLD_TABLES = {
+    'sqlite': 'catalog_solution_code_fts',
+    'postgresql': 'catalog_solution_code_search',
+}
+NEW_TABLES = {
+    'sqlite': 'catalog_codeblob_fts',
+    'postgresql': 'catalog_codeblob_search',
+}
+
+
+def decode(blob):
+    raw = bytes(blob.data)
+    if blob.codec == 'zlib':
+        raw = zlib.decompress(raw)
+    elif blob.codec != 'raw':
+        import zstandard
+
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    return raw.decode('utf-8')
+
+
+def index_code_by_blob(apps, schema_editor):
+    connection = schema_editor.connection
+    old, new = OLD_TABLES.get(connection.vendor), NEW_TABLES.get(
+        connection.vendor
+    )
+    # 0008 skips the index where the database can't serve it.
+    if old not in connection.introspection.table_names():
+        return
+    CodeBlob = apps.get_model('catalog', 'CodeBlob')
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {old}")
+        if connection.vendor == 'sqlite':
+            # rowid is the digest's first 60 bits, see search.blob_key().
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {new} USING fts5("
+                "digest UNINDEXED, code, "
+                "tokenize='trigram case_sensitive 1')"
+            )
+            insert = (
+                f"INSERT INTO {new} (rowid, digest, code) "
+                "VALUES (%s, %s, %s)"
+            )
+
+            def row(blob):
+                return int(blob.digest[:15], 16), blob.digest, decode(blob)
+        else:
+            cursor.execute(
+                f"CREATE TABLE {new} ("
+                "digest varchar(64) PRIMARY KEY, code text NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX {new}_trgm "
+                f"ON {new} USING gin (code gin_trgm_ops)"
+            )
+            insert = f"INSERT INTO {new} (digest, code) VALUES (%s, %s)"
+
+            def row(blob):
+                return blob.digest, decode(blob)
+
+        batch = []
+        for blob in CodeBlob.objects.iterator(chunk_size=500):
+            batch.append(row(blob))
+            if len(batch) >= 500:
+                cursor.executemany(insert, batch)
+                batch = []
+        cursor.executemany(insert, batch)
+
+
+def index_code_by_solution(apps, schema_editor):
+    connection = schema_editor.connection
+    old, new = OLD_TABLES.get(connection.vendor), NEW_TABLES.get(
+        connection.vendor
+    )
+    if new not in connection.introspection.table_names():
+        return
+    Solution = apps.get_model('catalog', 'Solution')
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {new}")
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {old} USING fts5("
+                "code, tokenize='trigram case_sensitive 1')"
+            )
+            insert = f"INSERT INTO {old} (rowid, code) VALUES (%s, %s)"
+        else:
+            cursor.execute(
+                f"CREATE TABLE {old} ("
+                "object_id bigint PRIMARY KEY, code text NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX {old}_trgm "
+                f"ON {old} USING gin (code gin_trgm_ops)"
+            )
+            insert = f"INSERT INTO {old} (object_id, code) VALUES (%s, %s)"
+        batch = []
+        for solution in Solution.objects.select_related(
+            'code_blob'
+        ).iterator(chunk_size=500):
+            batch.append((solution.pk, decode(solution.code_blob)))
+            if len(batch) >= 500:
+                cursor.executemany(insert, batch)
+                batch = []
+        cursor.executemany(insert, batch)
+
+
+class Migration(migrations.Migration):
+    """Key the code trigram index by blob digest instead of solution.
+
+    Solutions sharing a blob share one index entry, so the index no
+    longer holds an uncompressed copy of the code per solution.
+    """
+
+    dependencies = [
+        ('catalog', '0012_remove_solution_code'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_code_by_blob, index_code_by_solution),
+    ]
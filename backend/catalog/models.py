@@ -1,6 +1,13 @@
+import hashlib
+from collections import Counter, defaultdict
+from typing import Iterable, List, Optional
+
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
+from django.utils.text import slugify
 
+from common import compression
 from common.models import TimeStampedMixin
 
 
@@ -75,11 +82,184 @@ class ProgrammingTask(TimeStampedMixin):
         return self.name
 
 
+CODE_PREVIEW_LINES = 10
+CODE_PREVIEW_CHARS = 500
+EXPLANATION_PREVIEW_CHARS = 280
+
+
+def code_preview(code: str) -> str:
+    """Return the first lines of ``code`` without splitting all of it."""
+    end = -1
+    for _ in range(CODE_PREVIEW_LINES):
+        end = code.find("\n", end + 1)
+        if end == -1:
+            break
+    head = code if end == -1 else code[:end]
+    return head[:CODE_PREVIEW_CHARS]
+
+
+def code_line_count(code: str) -> int:
+    if not code:
+        return 0
+    return code.count("\n") + (0 if code.endswith("\n") else 1)
+
+
+CODE_FILE_EXTENSIONS = {
+    "c": "c",
+    "c#": "cs",
+    "c++": "cpp",
+    "go": "go",
+    "java": "java",
+    "javascript": "js",
+    "kotlin": "kt",
+    "php": "php",
+    "python": "py",
+    "ruby": "rb",
+    "rust": "rs",
+    "swift": "swift",
+    "typescript": "ts",
+}
+
+
+def code_file_name(task_name: str, language_name: Optional[str]) -> str:
+    """Return a download file name such as ``two-sum.py``."""
+    stem = slugify(task_name, allow_unicode=True) or "solution"
+    language = (language_name or "").casefold()
+    extension = CODE_FILE_EXTENSIONS.get(language)
+    if extension is None:
+        suffix = slugify(language, allow_unicode=True)
+        return f"{stem}-{suffix}.txt" if suffix else f"{stem}.txt"
+    return f"{stem}.{extension}"
+
+
+class CodeBlobManager(models.Manager):
+    def acquire(self, code: str) -> str:
+        """Store ``code`` unless an identical blob exists; take a reference.
+
+        Returns:
+            Digest of the blob
+        """
+        raw = code.encode("utf-8")
+        digest = CodeBlob.digest_of(raw)
+        if self.filter(pk=digest).update(ref_count=F("ref_count") + 1):
+            return digest
+        codec, payload = compression.compress(raw)
+        _, created = self.get_or_create(
+            digest=digest,
+            defaults={
+                "codec": codec,
+                "data": payload,
+                "size": len(raw),
+                "ref_count": 1,
+            },
+        )
+        if not created:
+            # Stored concurrently since the UPDATE above.
+            self.filter(pk=digest).update(ref_count=F("ref_count") + 1)
+        return digest
+
+    def acquire_many(self, codes: Iterable[str]) -> List[str]:
+        """Like ``acquire`` for a batch, with a fixed number of queries.
+
+        Returns:
+            Digests in the order of ``codes``
+        """
+        raws = [code.encode("utf-8") for code in codes]
+        digests = [CodeBlob.digest_of(raw) for raw in raws]
+        counts = Counter(digests)
+        existing = set(
+            self.filter(pk__in=counts).values_list("pk", flat=True)
+        )
+        missing = {}
+        for digest, raw in zip(digests, raws):
+            if digest in existing or digest in missing:
+                continue
+            codec, payload = compression.compress(raw)
+            missing[digest] = CodeBlob(
+                digest=digest,
+                codec=codec,
+                data=payload,
+                size=len(raw),
+                ref_count=0,
+            )
+        # Blobs stored concurrently are skipped here and counted below.
+        self.bulk_create(missing.values(), ignore_conflicts=True)
+        by_count = defaultdict(list)
+        for digest, count in counts.items():
+            by_count[count].append(digest)
+        for count, group in by_count.items():
+            self.filter(pk__in=group).update(
+                ref_count=F("ref_count") + count
+            )
+        return digests
+
+    def release(self, digest: str) -> None:
+        """Drop a reference to a blob.
+
+        Unreferenced blobs are removed by ``manage.py code_storage --gc``,
+        never inline, so a concurrent ``acquire`` can't lose its blob.
+        """
+        self.filter(pk=digest, ref_count__gt=0).update(
+            ref_count=F("ref_count") - 1
+        )
+
+
+class CodeBlob(models.Model):
+    """Compressed solution code, stored once per distinct content."""
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    codec = models.CharField(max_length=8)
+    data = models.BinaryField()
+    # Size of the UTF-8 encoded code before compression.
+    size = models.PositiveIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CodeBlobManager()
+
+    def __str__(self):
+        return self.digest
+
+    @staticmethod
+    def digest_of(raw: bytes) -> str:
+        return hashlib.sha256(raw).hexdigest()
+
+    @property
+    def text(self) -> str:
+        return compression.decompress(self.codec, self.data).decode("utf-8")
+
+
+class SolutionManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Store the code blobs and code stats of ``objs``, then insert.
+
+        Search indexes, task statuses and caches are up to the caller
+        (see ``catalog.services``), as no signals are sent.
+        """
+        objs = list(objs)
+        pending = [obj for obj in objs if obj._code_changed]
+        with transaction.atomic(using=self.db, savepoint=False):
+            if pending:
+                digests = CodeBlob.objects.db_manager(self.db).acquire_many(
+                    obj.code for obj in pending
+                )
+                for obj, digest in zip(pending, digests):
+                    obj.code_blob_id = digest
+                    obj.refresh_code_stats()
+                    obj._code_changed = False
+            return super().bulk_create(objs, *args, **kwargs)
+
+
 class Solution(TimeStampedMixin):
+    CODE_STATS_FIELDS = ("code_length", "code_lines", "code_preview")
+
     task = models.ForeignKey(
         ProgrammingTask, on_delete=models.CASCADE, related_name="solutions"
     )
-    code = models.TextField()
+    # Code lives in a shared, compressed blob; use the ``code`` property.
+    code_blob = models.ForeignKey(
+        CodeBlob, on_delete=models.PROTECT, related_name="solutions"
+    )
     language = models.ForeignKey(
         ProgrammingLanguage,
         on_delete=models.PROTECT,
@@ -93,6 +273,15 @@ class Solution(TimeStampedMixin):
     )
     is_public = models.BooleanField(default=False)
     published_at = models.DateTimeField(blank=True, null=True)
+    # Denormalized review counters, maintained by catalog.services.
+    positive_reviews_count = models.PositiveIntegerField(default=0)
+    negative_reviews_count = models.PositiveIntegerField(default=0)
+    # Code stats for list pages, so they never have to load ``code``.
+    code_length = models.PositiveIntegerField(default=0)
+    code_lines = models.PositiveIntegerField(default=0)
+    code_preview = models.TextField(blank=True, default="")
+
+    objects = SolutionManager()
 
     class Meta:
         ordering = ("-created_at",)
@@ -108,6 +297,78 @@ class Solution(TimeStampedMixin):
     def __str__(self):
         return f"{self.task.name} ({self.language.name})"
 
+    _code = None
+    _code_changed = False
+
+    @property
+    def code(self) -> str:
+        """Source code, decompressed on first access."""
+        if self._code is None and self.code_blob_id is not None:
+            self._code = self.code_blob.text
+        return self._code
+
+    @code.setter
+    def code(self, value: str) -> None:
+        self._code = value
+        self._code_changed = True
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._code = None
+        self._code_changed = False
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "code" in update_fields:
+            kwargs["update_fields"] = {
+                *(name for name in update_fields if name != "code"),
+                "code_blob",
+                *self.CODE_STATS_FIELDS,
+            }
+        elif update_fields is not None or not self._code_changed:
+            super().save(*args, **kwargs)
+            return
+
+        using = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        previous = self.code_blob_id
+        self.refresh_code_stats()
+        with transaction.atomic(using=using):
+            if CodeBlob.digest_of(self._code.encode("utf-8")) != previous:
+                blobs = CodeBlob.objects.db_manager(using)
+                self.code_blob_id = blobs.acquire(self._code)
+                if previous is not None:
+                    blobs.release(previous)
+            super().save(*args, **kwargs)
+        self._code_changed = False
+
+    def refresh_code_stats(self) -> None:
+        self.code_length = len(self.code)
+        self.code_lines = code_line_count(self.code)
+        self.code_preview = code_preview(self.code)
+
+
+class SolutionIdentifier(models.Model):
+    """Identifier occurring in a solution's code (see catalog.search)."""
+
+    solution = models.ForeignKey(
+        Solution, on_delete=models.CASCADE, related_name="identifiers"
+    )
+    name = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            # Leading ``name`` makes this the index for identifier lookups.
+            models.UniqueConstraint(
+                fields=["name", "solution"],
+                name="unique_identifier_per_solution",
+            )
+        ]
+
+    def __str__(self):
+        return self.name
+
 
 class Review(TimeStampedMixin):
     class ReviewType(models.IntegerChoices):
@@ -138,3 +399,26 @@ class Review(TimeStampedMixin):
 
     def __str__(self):
         return f"{self.get_review_type_display()} for {self.solution_id}"
+
+    # ``(solution_id, review_type)`` as stored, so a save can move the
+    # solution's review counters (``catalog.signals``); None until known.
+    _stored = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        if "solution_id" in loaded and "review_type" in loaded:
+            instance._stored = (instance.solution_id, instance.review_type)
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._stored is None and self.pk is not None:
+            # Saved without its stored values at hand: read what changes.
+            self._stored = (
+                Review._base_manager.db_manager(kwargs.get("using"))
+                .filter(pk=self.pk)
+                .values_list("solution_id", "review_type")
+                .first()
+            )
+        super().save(*args, **kwargs)
@@ -0,0 +1,160 @@
+"""In-process registry of reference data.
+
+Categories, difficulties and programming languages are tiny tables that
+almost never change, so every worker keeps their id/name maps in memory.
+The maps are rebuilt lazily when the shared cache namespace versions move
+(see ``common.cache_utils``). Versions are checked at most once every
+``REFERENCE_REGISTRY_REFRESH_INTERVAL`` seconds, so admin edits reach all
+workers within that delay without a cache round-trip per request.
+
+Ids or names missing from the maps (rows created without signals or by
+another worker since the last refresh, deleted or bogus values) trigger
+at most one reload per namespace version; misses are then remembered
+until the versions move.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Type
+
+from django.conf import settings
+from django.db import models as django_models
+
+from catalog import models
+from common.cache_utils import (
+    NAMESPACE_CATEGORIES,
+    NAMESPACE_DIFFICULTIES,
+    NAMESPACE_LANGUAGES,
+    get_namespace_versions,
+)
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_NAMESPACES = {
+    models.Category: NAMESPACE_CATEGORIES,
+    models.Difficulty: NAMESPACE_DIFFICULTIES,
+    models.ProgrammingLanguage: NAMESPACE_LANGUAGES,
+}
+
+
+@dataclass
+class ReferenceTable:
+    """Id/name maps of one reference model."""
+
+    names: Dict[int, str] = field(default_factory=dict)
+    ids: Dict[str, int] = field(default_factory=dict)
+    # Ids and names looked up and not found since the table was loaded.
+    misses: Set[int] = field(default_factory=set)
+    name_misses: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def load(cls, model: Type[django_models.Model]) -> "ReferenceTable":
+        table = cls()
+        for pk, name in model.objects.values_list("id", "name"):
+            table.names[pk] = name
+            table.ids[name.casefold()] = pk
+        return table
+
+
+class ReferenceRegistry:
+    """Per-process, read-mostly cache of reference id/name maps."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[Type[django_models.Model], ReferenceTable] = {}
+        self._versions: Optional[Dict[str, int]] = None
+        self._checked_at = 0.0
+        # Whether a miss already reloaded the tables at these versions.
+        self._reloaded_for_miss = False
+
+    @property
+    def refresh_interval(self) -> float:
+        return getattr(settings, "REFERENCE_REGISTRY_REFRESH_INTERVAL", 5)
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup in this process."""
+        self._versions = None
+
+    def _table(self, model: Type[django_models.Model]) -> ReferenceTable:
+        now = time.monotonic()
+        if (
+            self._versions is None
+            or now - self._checked_at >= self.refresh_interval
+        ):
+            with self._lock:
+                self._refresh(now)
+        return self._tables[model]
+
+    def _refresh(self, now: float) -> None:
+        # Read versions before the rows: a concurrent bump then only
+        # causes one extra reload instead of serving stale rows.
+        versions = get_namespace_versions(*REFERENCE_NAMESPACES.values())
+        if versions != self._versions:
+            self._load()
+            self._reloaded_for_miss = False
+            logger.debug(f"Reference registry reloaded at versions {versions}")
+        self._versions = versions
+        self._checked_at = now
+
+    def _load(self) -> None:
+        self._tables = {
+            model: ReferenceTable.load(model) for model in REFERENCE_NAMESPACES
+        }
+
+    def _reload_for_miss(
+        self, model: Type[django_models.Model], stale: ReferenceTable
+    ) -> ReferenceTable:
+        with self._lock:
+            # Another thread may have reloaded while this one waited.
+            reloaded = self._tables.get(model) is not stale
+            if not reloaded and not self._reloaded_for_miss:
+                self._load()
+                self._reloaded_for_miss = True
+                logger.debug("Reference registry reloaded for a miss")
+            return self._tables[model]
+
+    def name_of(
+        self, model: Type[django_models.Model], pk: Optional[int]
+    ) -> Optional[str]:
+        """Return the name of a reference object by id.
+
+        An unknown id may belong to an object created after the last
+        refresh, so the registry reloads once (per namespace version)
+        before giving up; the miss is remembered until the next one.
+        """
+        if pk is None:
+            return None
+        table = self._table(model)
+        name = table.names.get(pk)
+        if name is not None or pk in table.misses:
+            return name
+        table = self._reload_for_miss(model, table)
+        name = table.names.get(pk)
+        if name is None:
+            table.misses.add(pk)
+        return name
+
+    def id_of(
+        self, model: Type[django_models.Model], name: str
+    ) -> Optional[int]:
+        """Return the id of a reference object by case-insensitive name.
+
+        Unknown names reload the registry once, like ``name_of``.
+        """
+        key = name.strip().casefold()
+        table = self._table(model)
+        pk = table.ids.get(key)
+        if pk is not None or key in table.name_misses:
+            return pk
+        table = self._reload_for_miss(model, table)
+        pk = table.ids.get(key)
+        if pk is None:
+            table.name_misses.add(key)
+        return pk
+
+
+registry = ReferenceRegistry()
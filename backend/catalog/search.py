@@ -0,0 +1,503 @@
+"""Full-text search index for tasks and solutions.
+
+Documents live in shadow tables next to the catalog tables:
+
+- PostgreSQL: ``catalog_<kind>_search`` with a weighted ``tsvector`` column
+  and a GIN index (``simple`` configuration, so Russian and English text
+  are both tokenized without stemming surprises).
+- SQLite: ``catalog_<kind>_fts`` FTS5 virtual tables keyed by ``rowid``.
+
+Task documents index the name (title) and description (body). Solution
+documents index task name, language and author (title) and the
+explanation (body).
+
+Solution code has two indexes of its own:
+
+- ``catalog_codeblob_<suffix>`` holds the text of each ``CodeBlob``
+  under a trigram index (``pg_trgm`` GIN / FTS5 ``trigram`` tokenizer)
+  and answers case-sensitive substring queries. Solutions sharing a
+  blob share its entry, which is written once and dropped when the
+  blob is collected.
+- ``SolutionIdentifier`` rows list the distinct identifiers of each
+  solution for exact identifier lookups.
+
+All indexes are updated incrementally from ``catalog.signals`` (code
+indexes once the transaction commits); ``rebuild_search_index``
+repopulates them from scratch.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from catalog import models, validators
+
+logger = logging.getLogger(__name__)
+
+TASK = "task"
+SOLUTION = "solution"
+KINDS = (TASK, SOLUTION)
+CODE = "codeblob"
+
+# Private-use markers around matches; replaced after HTML escaping.
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# A letter or underscore followed by word characters: ``heapq``, ``_x``.
+# Single-character names are too common to be worth indexing.
+_IDENTIFIER_RE = re.compile(r"[^\W\d]\w+", re.UNICODE)
+IDENTIFIER_MAX_LENGTH = 64
+_GLOB_SPECIAL_RE = re.compile(r"([*?\[])")
+
+_available: Dict[Tuple[str, Tuple[str, ...]], bool] = {}
+
+
+def tokenize(query: str) -> List[str]:
+    """Split a user query into safe search tokens."""
+    return _TOKEN_RE.findall(query)
+
+
+def _table(connection, kind: str) -> str:
+    suffix = "fts" if connection.vendor == "sqlite" else "search"
+    return f"catalog_{kind}_{suffix}"
+
+
+def is_available(
+    using: str = DEFAULT_DB_ALIAS, kinds: Tuple[str, ...] = KINDS
+) -> bool:
+    """Return whether the database behind ``using`` has the given indexes."""
+    key = (using, kinds)
+    if key not in _available:
+        connection = connections[using]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            _available[key] = False
+        else:
+            tables = set(connection.introspection.table_names())
+            _available[key] = all(
+                _table(connection, kind) in tables for kind in kinds
+            )
+    return _available[key]
+
+
+def _reset_availability(using: str) -> None:
+    for key in [key for key in _available if key[0] == using]:
+        del _available[key]
+
+
+def _task_documents(
+    using: str, ids: Iterable[int]
+) -> List[Tuple[int, str, str]]:
+    return list(
+        models.ProgrammingTask.objects.using(using)
+        .filter(pk__in=list(ids))
+        .values_list("id", "name", "description")
+    )
+
+
+def _solution_documents(using: str, **filters) -> List[Tuple[int, str, str]]:
+    rows = models.Solution.objects.using(using).filter(**filters).values_list(
+        "id",
+        "task__name",
+        "language__name",
+        "user__username",
+        "explanation",
+    )
+    return [
+        (pk, f"{task_name} {language} {username}", explanation)
+        for pk, task_name, language, username, explanation in rows
+    ]
+
+
+def _write(
+    using: str, kind: str, documents: Sequence[Tuple[int, str, str]]
+) -> None:
+    if not documents:
+        return
+    connection = connections[using]
+    table = _table(connection, kind)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE rowid = %s",
+                [(pk,) for pk, _, _ in documents],
+            )
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, title, body) "
+                "VALUES (%s, %s, %s)",
+                documents,
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {table} (object_id, title, body, document) "
+                "VALUES (%s, %s, %s, "
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B')) "
+                "ON CONFLICT (object_id) DO UPDATE SET "
+                "title = EXCLUDED.title, body = EXCLUDED.body, "
+                "document = EXCLUDED.document",
+                [
+                    (pk, title, body, title, body)
+                    for pk, title, body in documents
+                ],
+            )
+
+
+def index_tasks(ids: Iterable[int], using: str = DEFAULT_DB_ALIAS) -> None:
+    """(Re)index tasks by id."""
+    if is_available(using):
+        _write(using, TASK, _task_documents(using, ids))
+
+
+def index_solutions(
+    ids: Optional[Iterable[int]] = None,
+    *,
+    task_ids: Optional[Iterable[int]] = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> None:
+    """(Re)index solutions by id or by the tasks they belong to."""
+    if not is_available(using):
+        return
+    if ids is not None:
+        _write(
+            using, SOLUTION, _solution_documents(using, pk__in=list(ids))
+        )
+    if task_ids is not None:
+        _write(
+            using,
+            SOLUTION,
+            _solution_documents(using, task_id__in=list(task_ids)),
+        )
+
+
+def remove(kind: str, ids: Iterable[int], using: str = DEFAULT_DB_ALIAS):
+    """Drop documents from the index."""
+    if not is_available(using, (kind,)):
+        return
+    connection = connections[using]
+    table = _table(connection, kind)
+    key = "rowid" if connection.vendor == "sqlite" else "object_id"
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {table} WHERE {key} = %s", [(pk,) for pk in ids]
+        )
+
+
+def match_sql(
+    kind: str, query: str, using: str = DEFAULT_DB_ALIAS
+) -> Optional[Tuple[str, List[str]]]:
+    """Return SQL selecting ids of documents matching ``query``.
+
+    Every token must match; the last one may be a prefix. Meant for
+    ``pk__in=RawSQL(...)``, so the match is a semi-join of the filtered
+    queryset. Returns ``None`` when the query has no tokens.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    connection = connections[using]
+    table = _table(connection, kind)
+    if connection.vendor == "sqlite":
+        return (
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s",
+            [_fts5_query(tokens)],
+        )
+    return (
+        f"SELECT object_id FROM {table} "
+        "WHERE document @@ to_tsquery('simple', %s)",
+        [_tsquery(tokens)],
+    )
+
+
+def rank_sql(
+    kind: str, query: str, column: str, using: str = DEFAULT_DB_ALIAS
+) -> Tuple[str, List[str]]:
+    """Return SQL ranking the document of the row whose id is ``column``.
+
+    A correlated subquery for ``order_by(RawSQL(...))`` over rows
+    filtered with ``match_sql``; lower ranks are better matches. Each
+    row is ranked through the index's primary key.
+    """
+    tokens = tokenize(query)
+    connection = connections[using]
+    table = _table(connection, kind)
+    if connection.vendor == "sqlite":
+        return (
+            f"(SELECT bm25({table}, 10.0, 1.0) FROM {table} "
+            f"WHERE {table} MATCH %s AND rowid = {column})",
+            [_fts5_query(tokens)],
+        )
+    return (
+        "(SELECT -ts_rank_cd(document, to_tsquery('simple', %s)) "
+        f"FROM {table} WHERE object_id = {column})",
+        [_tsquery(tokens)],
+    )
+
+
+def ranked_ids(
+    kind: str, query: str, using: str = DEFAULT_DB_ALIAS
+) -> List[int]:
+    """Return ids of all matching documents, best match first."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    connection = connections[using]
+    table = _table(connection, kind)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+                f"ORDER BY bm25({table}, 10.0, 1.0), rowid DESC",
+                [_fts5_query(tokens)],
+            )
+        else:
+            cursor.execute(
+                f"SELECT object_id FROM {table}, "
+                "to_tsquery('simple', %s) AS query "
+                "WHERE document @@ query "
+                "ORDER BY ts_rank_cd(document, query) DESC, object_id DESC",
+                [_tsquery(tokens)],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def highlights(
+    kind: str, query: str, ids: Sequence[int], using: str = DEFAULT_DB_ALIAS
+) -> Dict[int, str]:
+    """Return HTML-safe snippets with ``<mark>``-ed matches for ``ids``."""
+    tokens = tokenize(query)
+    if not tokens or not ids:
+        return {}
+    connection = connections[using]
+    table = _table(connection, kind)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"SELECT rowid, snippet({table}, -1, %s, %s, '…', 16) "
+                f"FROM {table} WHERE {table} MATCH %s "
+                f"AND rowid IN ({placeholders})",
+                [_MARK_START, _MARK_END, _fts5_query(tokens), *ids],
+            )
+        else:
+            cursor.execute(
+                "SELECT object_id, ts_headline('simple', "
+                "title || ' ' || body, to_tsquery('simple', %s), %s) "
+                f"FROM {table} WHERE object_id IN ({placeholders})",
+                [
+                    _tsquery(tokens),
+                    f"StartSel={_MARK_START}, StopSel={_MARK_END}, "
+                    "MaxWords=24, MinWords=8, MaxFragments=2",
+                    *ids,
+                ],
+            )
+        return {pk: _render_snippet(text) for pk, text in cursor.fetchall()}
+
+
+def rebuild(using: str = DEFAULT_DB_ALIAS, batch_size: int = 2000) -> int:
+    """Repopulate all indexes; returns the number of indexed objects."""
+    _reset_availability(using)
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for kind in (*KINDS, CODE):
+            if is_available(using, (kind,)):
+                cursor.execute(f"DELETE FROM {_table(connection, kind)}")
+    models.SolutionIdentifier.objects.using(using).all().delete()
+
+    total = 0
+    task_ids = models.ProgrammingTask.objects.using(using).values_list(
+        "id", flat=True
+    )
+    for batch in _batched(
+        task_ids.iterator(chunk_size=batch_size), batch_size
+    ):
+        index_tasks(batch, using=using)
+        total += len(batch)
+    solution_ids = models.Solution.objects.using(using).values_list(
+        "id", flat=True
+    )
+    for batch in _batched(
+        solution_ids.iterator(chunk_size=batch_size), batch_size
+    ):
+        index_solutions(batch, using=using)
+        index_code(batch, using=using)
+        total += len(batch)
+    logger.info(f"Search index rebuilt for {total} objects")
+    return total
+
+
+def identifiers(code: str) -> Set[str]:
+    """Return the distinct identifiers occurring in ``code``."""
+    return {
+        name
+        for name in _IDENTIFIER_RE.findall(code)
+        if len(name) <= IDENTIFIER_MAX_LENGTH
+    }
+
+
+def index_code(ids: Iterable[int], using: str = DEFAULT_DB_ALIAS) -> None:
+    """(Re)index the code of solutions by id.
+
+    Each distinct blob is decompressed and scanned once. Identifier rows
+    are diffed against the stored ones, so an edit that touches a few
+    lines only writes a few rows; blobs already in the trigram index
+    are left alone.
+    """
+    rows = list(
+        models.Solution.objects.using(using)
+        .filter(pk__in=list(ids))
+        .values_list("id", "code_blob_id")
+    )
+    if not rows:
+        return
+    texts = {
+        blob.pk: blob.text
+        for blob in models.CodeBlob.objects.using(using).filter(
+            pk__in={digest for _, digest in rows}
+        )
+    }
+    names = {digest: identifiers(text) for digest, text in texts.items()}
+    stored: Dict[int, Set[str]] = {pk: set() for pk, _ in rows}
+    for solution_id, name in models.SolutionIdentifier.objects.using(
+        using
+    ).filter(solution_id__in=list(stored)).values_list("solution_id", "name"):
+        stored[solution_id].add(name)
+
+    stale, fresh = [], []
+    for pk, digest in rows:
+        current = names.get(digest, set())
+        stale.extend((pk, name) for name in stored[pk] - current)
+        fresh.extend(
+            models.SolutionIdentifier(solution_id=pk, name=name)
+            for name in current - stored[pk]
+        )
+    for pk, names in _group(stale).items():
+        models.SolutionIdentifier.objects.using(using).filter(
+            solution_id=pk, name__in=names
+        ).delete()
+    models.SolutionIdentifier.objects.using(using).bulk_create(
+        fresh, batch_size=1000, ignore_conflicts=True
+    )
+    _write_code(using, texts)
+
+
+def _group(pairs: Iterable[Tuple[int, str]]) -> Dict[int, List[str]]:
+    grouped: Dict[int, List[str]] = {}
+    for pk, name in pairs:
+        grouped.setdefault(pk, []).append(name)
+    return grouped
+
+
+def blob_key(digest: str) -> int:
+    """FTS5 rowid of a blob: its digest's first 60 bits."""
+    return int(digest[:15], 16)
+
+
+def _write_code(using: str, texts: Dict[str, str]) -> None:
+    """Add blobs missing from the trigram index; blobs never change."""
+    if not texts or not is_available(using, (CODE,)):
+        return
+    connection = connections[using]
+    table = _table(connection, CODE)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            keys = {blob_key(digest): digest for digest in texts}
+            placeholders = ", ".join(["%s"] * len(keys))
+            cursor.execute(
+                f"SELECT rowid FROM {table} WHERE rowid IN ({placeholders})",
+                list(keys),
+            )
+            indexed = {key for (key,) in cursor.fetchall()}
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, digest, code) "
+                "VALUES (%s, %s, %s)",
+                [
+                    (key, digest, texts[digest])
+                    for key, digest in keys.items()
+                    if key not in indexed
+                ],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {table} (digest, code) VALUES (%s, %s) "
+                "ON CONFLICT (digest) DO NOTHING",
+                list(texts.items()),
+            )
+
+
+def remove_blobs(
+    digests: Iterable[str], using: str = DEFAULT_DB_ALIAS
+) -> None:
+    """Drop collected blobs from the trigram index."""
+    if not is_available(using, (CODE,)):
+        return
+    connection = connections[using]
+    table = _table(connection, CODE)
+    if connection.vendor == "sqlite":
+        sql, params = f"DELETE FROM {table} WHERE rowid = %s", [
+            (blob_key(digest),) for digest in digests
+        ]
+    else:
+        sql = f"DELETE FROM {table} WHERE digest = %s"
+        params = [(digest,) for digest in digests]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def code_match_sql(
+    fragment: str, using: str = DEFAULT_DB_ALIAS
+) -> Optional[Tuple[str, List[str]]]:
+    """Return SQL selecting digests of blobs containing ``fragment``.
+
+    Meant for ``code_blob__in=RawSQL(...)``, so visibility filters and
+    the substring lookup run as one statement. Trigram indexes need
+    three characters: shorter fragments scan every blob. Returns
+    ``None`` when the database has no code index.
+    """
+    if not is_available(using, (CODE,)):
+        return None
+    connection = connections[using]
+    table = _table(connection, CODE)
+    if connection.vendor == "sqlite":
+        # FTS5 trigram indexes serve case-sensitive GLOB patterns.
+        pattern = _GLOB_SPECIAL_RE.sub(r"[\1]", fragment)
+        return (
+            f"SELECT digest FROM {table} WHERE code GLOB %s",
+            [f"*{pattern}*"],
+        )
+    pattern = re.sub(r"([\\%_])", r"\\\1", fragment)
+    return (
+        f"SELECT digest FROM {table} WHERE code LIKE %s",
+        [f"%{pattern}%"],
+    )
+
+
+def _batched(iterable: Iterable[int], size: int):
+    batch: List[int] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _fts5_query(tokens: List[str]) -> str:
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _tsquery(tokens: List[str]) -> str:
+    terms = [token.lower() for token in tokens]
+    terms[-1] += ":*"
+    return " & ".join(terms)
+
+
+def _render_snippet(text: str) -> str:
+    escaped = validators.sanitize_html(text or "")
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
@@ -7,13 +7,39 @@ for API requests/responses.
 from __future__ import annotations
 
 from django.contrib.auth import get_user_model
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from catalog import models, services, validators
+from catalog import models, search, services, validators
+from catalog.references import registry
+from common.serializers import (
+    BatchPrimaryKeyRelatedField,
+    BulkListSerializer,
+    DynamicFieldsMixin,
+    Expansion,
+    FieldQuery,
+    Fieldset,
+)
 
 User = get_user_model()
 
 
+@extend_schema_field(OpenApiTypes.STR)
+class ReferenceNameField(serializers.ReadOnlyField):
+    """Name of a reference object resolved from its id via the registry.
+
+    Use with ``source="<fk>_id"`` so no JOIN is needed to render the name.
+    """
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return registry.name_of(self.model, value)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for Category model (reference data)."""
     
@@ -41,7 +67,63 @@ class ProgrammingLanguageSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_at", "updated_at")
 
 
-class ProgrammingTaskSerializer(serializers.ModelSerializer):
+@extend_schema_field(OpenApiTypes.STR)
+class SearchHighlightField(serializers.ReadOnlyField):
+    """HTML snippet with ``<mark>``-ed search matches, null outside search.
+
+    Snippets are put into the context by ``catalog.views``.
+    """
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs.setdefault("source", "*")
+        kwargs.setdefault("allow_null", True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        highlights = self.context.get("search_highlights", {})
+        return highlights.get(self.kind, {}).get(instance.pk)
+
+
+TASK_NAME_TAKEN = "Задача с таким названием уже существует."
+
+
+class ProgrammingTaskListSerializer(BulkListSerializer):
+    """Batch of new tasks, checked for name uniqueness with one query."""
+
+    taken_names = frozenset()
+
+    def to_internal_value(self, data):
+        if self.is_batch(data):
+            names = {
+                item["name"].strip()
+                for item in data
+                if isinstance(item, dict) and isinstance(item.get("name"), str)
+            }
+            self.taken_names = set(
+                models.ProgrammingTask.objects.filter(
+                    added_by=self.context["request"].user, name__in=names
+                ).values_list("name", flat=True)
+            )
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        attrs = super().run_child_validation(data)
+        if attrs["name"] in self.taken_names:
+            raise serializers.ValidationError({"name": TASK_NAME_TAKEN})
+        # Later items can't reuse the name either.
+        self.taken_names.add(attrs["name"])
+        return attrs
+
+    def create(self, validated_data):
+        return services.bulk_create_tasks(
+            user=self.context["request"].user, items=validated_data
+        )
+
+
+class ProgrammingTaskSerializer(
+    DynamicFieldsMixin, serializers.ModelSerializer
+):
     """Serializer for ProgrammingTask model with comprehensive validation.
     
     Validates:
@@ -50,10 +132,13 @@ class ProgrammingTaskSerializer(serializers.ModelSerializer):
     - URL format for resource link
     """
     
+    serializer_related_field = BatchPrimaryKeyRelatedField
     added_by = serializers.StringRelatedField(read_only=True)
+    search_highlight = SearchHighlightField(search.TASK)
 
     class Meta:
         model = models.ProgrammingTask
+        list_serializer_class = ProgrammingTaskListSerializer
         fields = (
             "id",
             "name",
@@ -65,6 +150,7 @@ class ProgrammingTaskSerializer(serializers.ModelSerializer):
             "status",
             "created_at",
             "updated_at",
+            "search_highlight",
         )
         read_only_fields = (
             "id",
@@ -73,6 +159,14 @@ class ProgrammingTaskSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        field_queries = {
+            # Highlights are looked up by primary key.
+            "search_highlight": FieldQuery(),
+        }
+        expandable_fields = {
+            "category": Expansion(CategorySerializer),
+            "difficulty": Expansion(DifficultySerializer),
+        }
 
     def validate_name(self, value: str) -> str:
         """Validate task name."""
@@ -95,18 +189,27 @@ class ProgrammingTaskSerializer(serializers.ModelSerializer):
         user = self.context["request"].user
         name = attrs.get("name")
 
-        if name and self.instance is None:  # Only on creation
+        # Only on creation; batches are checked by the list serializer.
+        in_batch = isinstance(self.parent, ProgrammingTaskListSerializer)
+        if name and self.instance is None and not in_batch:
             if models.ProgrammingTask.objects.filter(
                 name=name, added_by=user
             ).exists():
-                raise serializers.ValidationError(
-                    {"name": "Задача с таким названием уже существует."}
-                )
+                raise serializers.ValidationError({"name": TASK_NAME_TAKEN})
 
         return attrs
 
 
-class SolutionSerializer(serializers.ModelSerializer):
+class SolutionListSerializer(BulkListSerializer):
+    """Batch of new solutions."""
+
+    def create(self, validated_data):
+        return services.bulk_create_solutions(
+            user=self.context["request"].user, items=validated_data
+        )
+
+
+class SolutionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Solution model with code validation.
     
     Validates:
@@ -114,17 +217,20 @@ class SolutionSerializer(serializers.ModelSerializer):
     - Explanation text length
     """
     
+    serializer_related_field = BatchPrimaryKeyRelatedField
     user = serializers.StringRelatedField(read_only=True)
     task_detail = ProgrammingTaskSerializer(source="task", read_only=True)
-    language_name = serializers.CharField(
-        source="language.name", read_only=True
+    # Backed by the compressed blob, decompressed only when rendered.
+    code = serializers.CharField(trim_whitespace=False)
+    language_name = ReferenceNameField(
+        models.ProgrammingLanguage, source="language_id"
     )
-    positive_reviews_count = serializers.IntegerField(read_only=True)
-    negative_reviews_count = serializers.IntegerField(read_only=True)
     user_review = serializers.SerializerMethodField()
+    search_highlight = SearchHighlightField(search.SOLUTION)
 
     class Meta:
         model = models.Solution
+        list_serializer_class = SolutionListSerializer
         fields = (
             "id",
             "task",
@@ -140,7 +246,10 @@ class SolutionSerializer(serializers.ModelSerializer):
             "updated_at",
             "positive_reviews_count",
             "negative_reviews_count",
+            "code_length",
+            "code_lines",
             "user_review",
+            "search_highlight",
         )
         read_only_fields = (
             "id",
@@ -150,8 +259,19 @@ class SolutionSerializer(serializers.ModelSerializer):
             "updated_at",
             "positive_reviews_count",
             "negative_reviews_count",
+            "code_length",
+            "code_lines",
             "user_review",
         )
+        field_queries = {
+            "code": FieldQuery(select_related=("code_blob",)),
+            # Prefetched by SolutionViewSet.
+            "user_review": FieldQuery(),
+            "search_highlight": FieldQuery(),
+        }
+        expandable_fields = {
+            "language": Expansion(ProgrammingLanguageSerializer),
+        }
 
     def get_user_review(self, obj):
         """Get review by current user if exists."""
@@ -159,26 +279,19 @@ class SolutionSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return None
         
-        # Check if user_review_list was prefetched
-        if hasattr(obj, "user_review_list") and obj.user_review_list:
-            user_review = obj.user_review_list[0]
-            return {
-                "id": user_review.id,
-                "review_type": user_review.review_type,
-            }
-        
-        # Fallback: query directly if not prefetched
-        try:
-            user_review = obj.reviews.filter(added_by=request.user).first()
-            if user_review:
-                return {
-                    "id": user_review.id,
-                    "review_type": user_review.review_type,
-                }
-        except Exception:
-            pass
-        
-        return None
+        # Prefetched by SolutionViewSet: an empty list means no review, so
+        # only unprefetched instances (e.g. after publish) query here.
+        if hasattr(obj, "user_review_list"):
+            reviews = obj.user_review_list
+        else:
+            reviews = obj.reviews.filter(added_by=request.user)[:1]
+        user_review = next(iter(reviews), None)
+        if user_review is None:
+            return None
+        return {
+            "id": user_review.id,
+            "review_type": user_review.review_type,
+        }
 
     def validate_code(self, value: str) -> str:
         """Validate code snippet."""
@@ -199,11 +312,109 @@ class SolutionSerializer(serializers.ModelSerializer):
         return result.instance
 
 
+class ProgrammingTaskSummarySerializer(serializers.ModelSerializer):
+    """Task without its description, for embedding in list pages."""
+
+    added_by = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = models.ProgrammingTask
+        fields = (
+            "id",
+            "name",
+            "resource",
+            "difficulty",
+            "category",
+            "added_by",
+            "status",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class SolutionSummarySerializer(SolutionSerializer):
+    """Read-only list representation of a solution.
+
+    Carries code stats and previews instead of ``code`` and
+    ``explanation``; the view defers those columns, so list pages stay
+    small however large the solutions are. Retrieve returns the full body.
+    """
+
+    task_detail = ProgrammingTaskSummarySerializer(
+        source="task", read_only=True
+    )
+    explanation_preview = serializers.CharField(read_only=True)
+
+    class Meta(SolutionSerializer.Meta):
+        fields = (
+            "id",
+            "task",
+            "task_detail",
+            "code_length",
+            "code_lines",
+            "code_preview",
+            "language",
+            "language_name",
+            "explanation_preview",
+            "user",
+            "is_public",
+            "published_at",
+            "created_at",
+            "updated_at",
+            "positive_reviews_count",
+            "negative_reviews_count",
+            "user_review",
+            "search_highlight",
+        )
+        read_only_fields = fields
+
+
+class VisibleSolutionSummarySerializer(SolutionSummarySerializer):
+    """Solution summary embedded in other objects (``?expand=solution``).
+
+    Private solutions of other users render as ``null``: their detail
+    endpoint answers 404 to the same caller.
+    """
+
+    def get_attribute(self, instance):
+        solution = super().get_attribute(instance)
+        if solution is None or solution.is_public:
+            return solution
+        request = self.context.get("request")
+        if request and solution.user_id == request.user.pk:
+            return solution
+        return None
+
+
 class SolutionPublishSerializer(serializers.Serializer):
     is_public = serializers.BooleanField()
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewListSerializer(BulkListSerializer):
+    """Batch of reviews, at most one per solution."""
+
+    def to_internal_value(self, data):
+        self.seen_solutions = set()
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        attrs = super().run_child_validation(data)
+        if attrs["solution"].pk in self.seen_solutions:
+            raise serializers.ValidationError(
+                {"solution": "Решение уже оценено в этом запросе."}
+            )
+        self.seen_solutions.add(attrs["solution"].pk)
+        return attrs
+
+    def create(self, validated_data):
+        reviews, self.created = services.bulk_create_reviews(
+            user=self.context["request"].user, items=validated_data
+        )
+        return reviews
+
+
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Review model with ownership validation.
     
     Validates:
@@ -212,12 +423,13 @@ class ReviewSerializer(serializers.ModelSerializer):
     """
     
     added_by = serializers.StringRelatedField(read_only=True)
-    solution = serializers.PrimaryKeyRelatedField(
+    solution = BatchPrimaryKeyRelatedField(
         queryset=models.Solution.objects.all()
     )
 
     class Meta:
         model = models.Review
+        list_serializer_class = ReviewListSerializer
         fields = (
             "id",
             "solution",
@@ -227,6 +439,21 @@ class ReviewSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("id", "added_by", "created_at", "updated_at")
+        expandable_fields = {
+            "solution": Expansion(
+                VisibleSolutionSummarySerializer,
+                kwargs={
+                    "fieldset": Fieldset(
+                        exclude=(
+                            "task_detail",
+                            "explanation_preview",
+                            "user_review",
+                            "search_highlight",
+                        )
+                    )
+                },
+            ),
+        }
 
     def validate(self, attrs):
         """Validate that user is not reviewing their own solution."""
@@ -8,12 +8,29 @@ transactions.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from collections import defaultdict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 
 from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, Greatest, Length
 from django.utils import timezone
 
-from catalog import models
+from catalog import models, search
+from common.cache_utils import (
+    NAMESPACE_SOLUTIONS,
+    NAMESPACE_TASKS,
+    bump_on_commit,
+)
 from common.services import ServiceResult
 
 logger = logging.getLogger(__name__)
@@ -65,6 +82,7 @@ def create_solution(*, user, validated_data: Dict[str, Any]) -> ServiceResult:
     return ServiceResult(instance=solution, created=True)
 
 
+@transaction.atomic
 def publish_solution(
     solution: models.Solution, *, make_public: bool
 ) -> models.Solution:
@@ -95,13 +113,121 @@ def publish_solution(
     return solution
 
 
+REVIEW_COUNTER_FIELDS = {
+    models.Review.ReviewType.POSITIVE: "positive_reviews_count",
+    models.Review.ReviewType.NEGATIVE: "negative_reviews_count",
+}
+
+
+def adjust_review_counters(
+    solution_id: int,
+    *,
+    added: Optional[int] = None,
+    removed: Optional[int] = None,
+) -> None:
+    """Apply a review type change to the solution's counter columns.
+
+    Counters are updated in place with ``F()`` expressions so concurrent
+    reviews never overwrite each other.
+
+    Args:
+        solution_id: ID of the reviewed solution
+        added: Review type that was added, if any
+        removed: Review type that was removed, if any
+    """
+    if added == removed:
+        return
+    models.Solution.objects.filter(pk=solution_id).update(
+        **_review_counter_changes(added, removed)
+    )
+
+
+def _review_counter_changes(
+    added: Optional[int], removed: Optional[int]
+) -> Dict[str, Any]:
+    changes = {}
+    if added is not None:
+        field = REVIEW_COUNTER_FIELDS[added]
+        changes[field] = F(field) + 1
+    if removed is not None:
+        field = REVIEW_COUNTER_FIELDS[removed]
+        changes[field] = Greatest(F(field) - 1, 0)
+    return changes
+
+
+def _review_count_subquery(review_type: int):
+    return Coalesce(
+        Subquery(
+            models.Review.objects.filter(
+                solution=OuterRef("pk"), review_type=review_type
+            )
+            .order_by()
+            .values("solution")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def recount_review_counters(
+    *, batch_size: int = 10_000, dry_run: bool = False
+) -> int:
+    """Recompute review counters from the Review table to repair drift.
+
+    Solutions are processed in primary key ranges of ``batch_size`` so
+    every UPDATE stays short.
+
+    Args:
+        batch_size: Number of solution IDs per UPDATE statement
+        dry_run: Only report drifted solutions without updating them
+
+    Returns:
+        Number of solutions whose stored counters were wrong
+    """
+    positive = _review_count_subquery(models.Review.ReviewType.POSITIVE)
+    negative = _review_count_subquery(models.Review.ReviewType.NEGATIVE)
+    last_id = (
+        models.Solution.objects.order_by("-pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    drifted = 0
+    start = 0
+    while last_id is not None and start <= last_id:
+        batch = models.Solution.objects.filter(
+            pk__gte=start, pk__lt=start + batch_size
+        )
+        drifted += (
+            batch.annotate(
+                actual_positive=positive, actual_negative=negative
+            )
+            .filter(
+                ~Q(positive_reviews_count=F("actual_positive"))
+                | ~Q(negative_reviews_count=F("actual_negative"))
+            )
+            .count()
+        )
+        if not dry_run:
+            batch.update(
+                positive_reviews_count=positive,
+                negative_reviews_count=negative,
+            )
+        start += batch_size
+
+    logger.info(f"Review counters recounted: {drifted} solutions drifted")
+    return drifted
+
+
+@transaction.atomic
 def create_review(
     *, user, solution: models.Solution, review_type: int
 ) -> ServiceResult:
     """Create or update a review for a solution.
     
     One review per user per solution is allowed. If user already reviewed,
-    update the review type.
+    update the review type. The solution's review counters are adjusted
+    by the review's ``post_save`` receiver in the same transaction.
     
     Args:
         user: User creating/updating the review
@@ -123,7 +249,196 @@ def create_review(
         added_by=user,
         defaults={"review_type": review_type},
     )
-    
+
     action = "created" if created else "updated"
     logger.info(f"Review {review.id} {action} for solution {solution.id} by user {user.id}")
     return ServiceResult(instance=review, created=created)
+
+
+def code_storage_stats() -> Dict[str, int]:
+    """Summarize how much space deduplicated, compressed code takes.
+
+    Returns:
+        Dict with ``solutions``, ``blobs``, ``logical_bytes`` (code size
+        summed over solutions), ``unique_bytes`` (size of distinct code)
+        and ``stored_bytes`` (compressed payloads)
+    """
+    solutions = models.Solution.objects.aggregate(
+        solutions=Count("id"), logical_bytes=Sum("code_blob__size")
+    )
+    blobs = models.CodeBlob.objects.aggregate(
+        blobs=Count("digest"),
+        unique_bytes=Sum("size"),
+        stored_bytes=Sum(Length("data")),
+    )
+    return {
+        key: value or 0 for key, value in {**solutions, **blobs}.items()
+    }
+
+
+def collect_code_blobs(*, dry_run: bool = False) -> int:
+    """Repair blob reference counts and delete unreferenced blobs.
+
+    Runs outside of ``Solution.save()``, which only ever decrements
+    counts, so a blob is deleted only when no row points at it.
+
+    Args:
+        dry_run: Only count unreferenced blobs without touching them
+
+    Returns:
+        Number of unreferenced blobs
+    """
+    referencing = models.Solution.objects.filter(code_blob=OuterRef("pk"))
+    unreferenced = models.CodeBlob.objects.filter(~Exists(referencing))
+    if dry_run:
+        return unreferenced.count()
+
+    with transaction.atomic():
+        models.CodeBlob.objects.update(
+            ref_count=Coalesce(
+                Subquery(
+                    referencing.order_by()
+                    .values("code_blob")
+                    .annotate(total=Count("id"))
+                    .values("total")
+                ),
+                0,
+            )
+        )
+        digests = list(unreferenced.values_list("pk", flat=True))
+        deleted, _ = unreferenced.filter(pk__in=digests).delete()
+        # A blob re-acquired in between survives and keeps its entry.
+        search.remove_blobs(
+            set(digests)
+            - set(
+                models.CodeBlob.objects.filter(pk__in=digests).values_list(
+                    "pk", flat=True
+                )
+            )
+        )
+
+    logger.info(f"Code blobs collected: {deleted} unreferenced")
+    return deleted
+
+
+@transaction.atomic
+def bulk_create_tasks(
+    *, user, items: List[Dict[str, Any]]
+) -> List[models.ProgrammingTask]:
+    """Create many tasks with a fixed number of queries.
+
+    ``bulk_create`` sends no signals, so the search index and the cache
+    namespaces are updated here.
+
+    Args:
+        user: User creating the tasks
+        items: Validated task data, names already checked for uniqueness
+
+    Returns:
+        Created tasks, in input order
+    """
+    tasks = models.ProgrammingTask.objects.bulk_create(
+        models.ProgrammingTask(added_by=user, **item) for item in items
+    )
+    search.index_tasks([task.pk for task in tasks])
+    bump_on_commit(NAMESPACE_TASKS, NAMESPACE_SOLUTIONS)
+
+    logger.info(f"{len(tasks)} tasks bulk created by user {user.id}")
+    return tasks
+
+
+@transaction.atomic
+def bulk_create_solutions(
+    *, user, items: List[Dict[str, Any]]
+) -> List[models.Solution]:
+    """Create many solutions with a fixed number of queries.
+
+    Code blobs and code stats are handled by ``Solution.objects``; the
+    search and code indexes, task statuses and caches are updated here.
+    Each task that gets a public solution is synced once.
+
+    Args:
+        user: User creating the solutions
+        items: Validated solution data
+
+    Returns:
+        Created solutions, in input order
+    """
+    solutions = models.Solution.objects.bulk_create(
+        models.Solution(user=user, **item) for item in items
+    )
+    ids = [solution.pk for solution in solutions]
+    search.index_solutions(ids)
+    transaction.on_commit(partial(search.index_code, ids))
+    public_tasks = {
+        solution.task_id: solution.task
+        for solution in solutions
+        if solution.is_public
+    }
+    for task in public_tasks.values():
+        _sync_task_status(task, is_public=True)
+    bump_on_commit(NAMESPACE_SOLUTIONS, NAMESPACE_TASKS)
+
+    logger.info(f"{len(solutions)} solutions bulk created by user {user.id}")
+    return solutions
+
+
+@transaction.atomic
+def bulk_create_reviews(
+    *, user, items: List[Dict[str, Any]]
+) -> Tuple[List[models.Review], bool]:
+    """Create or update many reviews of one user.
+
+    Like ``create_review``, an existing review of the same solution is
+    updated. Counters are adjusted with one UPDATE per kind of change
+    rather than per solution.
+
+    Args:
+        user: User creating the reviews
+        items: Validated review data, at most one item per solution
+
+    Returns:
+        Created or updated reviews as stored, in input order, and
+        whether any of them was created
+    """
+    solution_ids = [item["solution"].pk for item in items]
+    previous = dict(
+        models.Review.objects.select_for_update()
+        .filter(added_by=user, solution_id__in=solution_ids)
+        .values_list("solution_id", "review_type")
+    )
+    models.Review.objects.bulk_create(
+        (
+            models.Review(
+                added_by=user,
+                solution=item["solution"],
+                review_type=item["review_type"],
+            )
+            for item in items
+        ),
+        update_conflicts=True,
+        unique_fields=("solution", "added_by"),
+        update_fields=("review_type", "updated_at"),
+    )
+    # Upserted objects keep their unsaved created_at; read the rows back.
+    stored = {
+        review.solution_id: review
+        for review in models.Review.objects.filter(
+            added_by=user, solution_id__in=solution_ids
+        )
+    }
+    reviews = [stored[pk] for pk in solution_ids]
+
+    changes = defaultdict(list)
+    for review in reviews:
+        removed = previous.get(review.solution_id)
+        if review.review_type != removed:
+            changes[review.review_type, removed].append(review.solution_id)
+    for (added, removed), ids in changes.items():
+        models.Solution.objects.filter(pk__in=ids).update(
+            **_review_counter_changes(added, removed)
+        )
+    bump_on_commit(NAMESPACE_SOLUTIONS)
+
+    logger.info(f"{len(reviews)} reviews bulk saved by user {user.id}")
+    return reviews, len(previous) < len(reviews)
@@ -1,36 +1,185 @@
-"""Django signals for cache invalidation."""
+"""Django signals for cache invalidation, search and denormalized counters."""
 
 import logging
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from catalog import models
+from catalog import models, search, services
+from catalog.references import registry
 from common.cache_utils import (
-    invalidate_category_cache,
-    invalidate_difficulty_cache,
-    invalidate_language_cache,
+    NAMESPACE_CATEGORIES,
+    NAMESPACE_DIFFICULTIES,
+    NAMESPACE_LANGUAGES,
+    NAMESPACE_SOLUTIONS,
+    NAMESPACE_TASKS,
+    bump_on_commit,
 )
 
 logger = logging.getLogger(__name__)
 
+# Fields whose changes must reach the search index
+TASK_SEARCH_FIELDS = frozenset({"name", "description"})
+SOLUTION_SEARCH_FIELDS = frozenset(
+    {"explanation", "task", "language", "user"}
+)
+
+
+def invalidate_reference_registry() -> None:
+    """Reload this worker's reference registry now and after commit.
+
+    Other workers pick the change up through the bumped namespace version.
+    """
+    registry.invalidate()
+    transaction.on_commit(registry.invalidate)
+
 
 @receiver([post_save, post_delete], sender=models.Category)
 def invalidate_categories_cache(sender, instance, **kwargs):
     """Invalidate category cache when Category is saved or deleted."""
     logger.info(f"Category {instance.id} changed, invalidating cache")
-    invalidate_category_cache()
+    bump_on_commit(NAMESPACE_CATEGORIES)
+    invalidate_reference_registry()
 
 
 @receiver([post_save, post_delete], sender=models.Difficulty)
 def invalidate_difficulties_cache(sender, instance, **kwargs):
     """Invalidate difficulty cache when Difficulty is saved or deleted."""
     logger.info(f"Difficulty {instance.id} changed, invalidating cache")
-    invalidate_difficulty_cache()
+    bump_on_commit(NAMESPACE_DIFFICULTIES)
+    invalidate_reference_registry()
 
 
 @receiver([post_save, post_delete], sender=models.ProgrammingLanguage)
 def invalidate_languages_cache(sender, instance, **kwargs):
     """Invalidate language cache when ProgrammingLanguage is saved or deleted."""
     logger.info(f"ProgrammingLanguage {instance.id} changed, invalidating cache")
-    invalidate_language_cache()
+    bump_on_commit(NAMESPACE_LANGUAGES)
+    invalidate_reference_registry()
+
+
+@receiver([post_save, post_delete], sender=models.ProgrammingTask)
+def invalidate_tasks_cache(sender, instance, **kwargs):
+    """Invalidate task and solution responses when a task changes.
+
+    Solutions embed their task, so both namespaces are bumped.
+    """
+    bump_on_commit(NAMESPACE_TASKS, NAMESPACE_SOLUTIONS)
+
+
+@receiver([post_save, post_delete], sender=models.Solution)
+def invalidate_solutions_cache(sender, instance, **kwargs):
+    """Invalidate solution and task responses when a solution changes.
+
+    Task listings depend on solutions through the ``solved_by`` filter.
+    """
+    bump_on_commit(NAMESPACE_SOLUTIONS, NAMESPACE_TASKS)
+
+
+@receiver([post_save, post_delete], sender=models.Review)
+def invalidate_reviews_cache(sender, instance, **kwargs):
+    """Invalidate solution responses, which carry review counters."""
+    bump_on_commit(NAMESPACE_SOLUTIONS)
+
+
+@receiver(post_save, sender=models.Review)
+def move_review_counter(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Apply the saved review's type to its solution's counters.
+
+    Covers every ``save()``: services, the admin, the shell. Fixtures
+    (``raw``) carry their solutions' counters, and ``bulk_create`` sends
+    no signals, so bulk services adjust the counters themselves.
+    """
+    if raw or not _touches(update_fields, {"solution", "review_type"}):
+        return
+    previous = instance._stored
+    instance._stored = (instance.solution_id, instance.review_type)
+    if previous is not None and previous[0] == instance.solution_id:
+        services.adjust_review_counters(
+            instance.solution_id,
+            added=instance.review_type,
+            removed=previous[1],
+        )
+        return
+    if previous is not None:
+        services.adjust_review_counters(previous[0], removed=previous[1])
+    services.adjust_review_counters(
+        instance.solution_id, added=instance.review_type
+    )
+
+
+@receiver(post_delete, sender=models.Review)
+def release_review_counter(sender, instance, origin=None, **kwargs):
+    """Decrement the solution's review counter when a Review is deleted."""
+    # Skip cascades from the solution itself: its row is going away anyway.
+    if isinstance(origin, models.Solution) or (
+        getattr(origin, "model", None) is models.Solution
+    ):
+        return
+    services.adjust_review_counters(
+        instance.solution_id, removed=instance.review_type
+    )
+
+
+def _touches(update_fields, indexed_fields) -> bool:
+    return update_fields is None or not indexed_fields.isdisjoint(
+        update_fields
+    )
+
+
+@receiver(post_save, sender=models.ProgrammingTask)
+def index_task(
+    sender, instance, created, update_fields=None, using=None, **kwargs
+):
+    """Refresh the task's search document and those of its solutions.
+
+    Solution documents embed the task name, so they follow renames.
+    """
+    if not _touches(update_fields, TASK_SEARCH_FIELDS):
+        return
+    search.index_tasks([instance.pk], using=using)
+    if not created:
+        search.index_solutions(task_ids=[instance.pk], using=using)
+
+
+@receiver(post_save, sender=models.Solution)
+def index_solution(
+    sender, instance, update_fields=None, using=None, **kwargs
+):
+    """Refresh the solution's search document and code indexes.
+
+    Code is decompressed and scanned after commit, outside the write.
+    """
+    if _touches(update_fields, SOLUTION_SEARCH_FIELDS):
+        search.index_solutions([instance.pk], using=using)
+    if _touches(update_fields, {"code_blob"}):
+        transaction.on_commit(
+            partial(search.index_code, [instance.pk], using=using),
+            using=using,
+        )
+
+
+@receiver(post_delete, sender=models.ProgrammingTask)
+def unindex_task(sender, instance, using=None, **kwargs):
+    """Drop the task's search document."""
+    search.remove(search.TASK, [instance.pk], using=using)
+
+
+@receiver(post_delete, sender=models.Solution)
+def unindex_solution(sender, instance, using=None, **kwargs):
+    """Drop the solution's search documents.
+
+    Identifier rows go away with the solution through the FK cascade;
+    the code blob keeps its trigram entry until it is collected.
+    """
+    search.remove(search.SOLUTION, [instance.pk], using=using)
+
 
+@receiver(post_delete, sender=models.Solution)
+def release_code_blob(sender, instance, using=None, **kwargs):
+    """Drop the deleted solution's reference to its code blob."""
+    models.CodeBlob.objects.db_manager(using).release(instance.code_blob_id)
@@ -1,11 +1,23 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from catalog import models
+from catalog.references import registry
 
 User = get_user_model()
 
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-api-tests",
+    }
+}
+
 
 class ProgrammingTaskAPITests(APITestCase):
     """Tests for ProgrammingTask API endpoints."""
@@ -269,6 +281,164 @@ class SolutionAPITests(APITestCase):
         self.assertIn(public_solution.id, solution_ids)
         self.assertIn(private_solution.id, solution_ids)
 
+    def test_list_returns_summary_without_loading_code(self):
+        """Test that list pages carry code stats instead of code."""
+        code = "\n".join(f"line_{i} = {i}" for i in range(50)) + "\n"
+        solution = models.Solution.objects.create(
+            task=self.task,
+            code=code,
+            language=self.language,
+            user=self.user,
+            explanation="x" * 1000,
+            is_public=True,
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/solutions/")
+
+        item = response.data["results"][0]
+        self.assertNotIn("code", item)
+        self.assertNotIn("explanation", item)
+        self.assertNotIn("description", item["task_detail"])
+        self.assertEqual(item["code_length"], len(code))
+        self.assertEqual(item["code_lines"], 50)
+        self.assertEqual(
+            item["code_preview"].splitlines(),
+            [f"line_{i} = {i}" for i in range(10)],
+        )
+        self.assertEqual(
+            len(item["explanation_preview"]),
+            models.EXPLANATION_PREVIEW_CHARS,
+        )
+        [page_sql] = [
+            query["sql"]
+            for query in queries
+            if '"catalog_solution"."code_preview"' in query["sql"]
+        ]
+        self.assertNotIn("catalog_codeblob", page_sql)
+        self.assertNotRegex(page_sql, r'"catalog_programmingtask"\."desc')
+
+        response = self.client.get(f"/api/solutions/{solution.id}/")
+        self.assertEqual(response.data["code"], code)
+        self.assertEqual(response.data["code_lines"], 50)
+
+    def test_code_stats_follow_partial_updates(self):
+        """Test that saving only ``code`` also refreshes its stats."""
+        solution = models.Solution.objects.create(
+            task=self.task,
+            code="a = 1",
+            language=self.language,
+            user=self.user,
+        )
+
+        solution.code = "a = 1\nb = 2"
+        solution.save(update_fields=["code"])
+
+        solution.refresh_from_db()
+        self.assertEqual(solution.code_length, 11)
+        self.assertEqual(solution.code_lines, 2)
+        self.assertEqual(solution.code_preview, "a = 1\nb = 2")
+
+    def test_raw_code_download(self):
+        """Test streamed raw code with an ETag and conditional GET."""
+        code = "".join(f"x_{i} = {i}  # ёж\n" for i in range(20_000))
+        solution = models.Solution.objects.create(
+            task=self.task,
+            code=code,
+            language=self.language,
+            user=self.user,
+            is_public=True,
+        )
+        url = f"/api/solutions/{solution.id}/raw/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content)
+        self.assertEqual(body.decode("utf-8"), code)
+        self.assertEqual(int(response["Content-Length"]), len(body))
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"], 'inline; filename="lcs.cpp"'
+        )
+
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        solution.code = "changed"
+        solution.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_raw_code_ranges(self):
+        """Test byte ranges, suffix ranges and If-Range."""
+        code = "".join(f"line {i}\n" for i in range(30_000))
+        raw = code.encode("utf-8")
+        solution = models.Solution.objects.create(
+            task=self.task,
+            code=code,
+            language=self.language,
+            user=self.user,
+            is_public=True,
+        )
+        url = f"/api/solutions/{solution.id}/raw/"
+        etag = self.client.get(url)["ETag"]
+
+        for header, expected in (
+            ("bytes=0-9", raw[:10]),
+            ("bytes=100000-200000", raw[100000:200001]),
+            ("bytes=-7", raw[-7:]),
+            (f"bytes={len(raw) - 3}-", raw[-3:]),
+        ):
+            response = self.client.get(url, HTTP_RANGE=header)
+            self.assertEqual(
+                response.status_code, status.HTTP_206_PARTIAL_CONTENT
+            )
+            self.assertEqual(b"".join(response.streaming_content), expected)
+            self.assertEqual(int(response["Content-Length"]), len(expected))
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(
+            response["Content-Range"], f"bytes 10-19/{len(raw)}"
+        )
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(raw)}-")
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+        self.assertEqual(response["Content-Range"], f"bytes */{len(raw)}")
+
+        response = self.client.get(
+            url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        response = self.client.get(
+            url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_raw_code_respects_visibility(self):
+        """Test that private solutions are only served to their author."""
+        solution = models.Solution.objects.create(
+            task=self.task,
+            code="int main() {}",
+            language=self.language,
+            user=self.user,
+        )
+        url = f"/api/solutions/{solution.id}/raw/"
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"int main() {}")
+
 
 class ReviewAPITests(APITestCase):
     """Tests for Review API endpoints."""
@@ -340,3 +510,615 @@ class ReviewAPITests(APITestCase):
         response2 = self.client.post("/api/reviews/", payload, format="json")
         self.assertEqual(response2.status_code, status.HTTP_200_OK)
         self.assertEqual(models.Review.objects.count(), 1)
+
+
+class SparseFieldsetAPITests(APITestCase):
+    """Tests for ?fields=, ?exclude= and ?expand= pushed into queries."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.author = User.objects.create_user(
+            username="fieldauthor", password="testpass123"
+        )
+        self.reviewer = User.objects.create_user(
+            username="fieldreviewer", password="testpass123"
+        )
+        self.category, _ = models.Category.objects.get_or_create(name="Math")
+        self.difficulty, _ = models.Difficulty.objects.get_or_create(
+            name="Easy"
+        )
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Go"
+        )
+        for index in range(3):
+            task = models.ProgrammingTask.objects.create(
+                name=f"Sum {index}",
+                description="Add two numbers",
+                difficulty=self.difficulty,
+                category=self.category,
+                added_by=self.author,
+                status=models.ProgrammingTask.TaskStatus.PUBLIC,
+            )
+            solution = models.Solution.objects.create(
+                task=task,
+                code="func sum(a, b int) int { return a + b }",
+                language=self.language,
+                user=self.author,
+                is_public=True,
+            )
+            models.Review.objects.create(
+                solution=solution,
+                added_by=self.reviewer,
+                review_type=models.Review.ReviewType.POSITIVE,
+            )
+        # Load reference names up front so only request queries count.
+        registry.name_of(models.ProgrammingLanguage, self.language.id)
+
+    def get_with_queries(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query["sql"] for query in queries]
+
+    def test_fields_select_columns(self):
+        """Test that ?fields= limits both the payload and the SELECT."""
+        response, queries = self.get_with_queries(
+            "/api/tasks/", {"fields": "id,name"}
+        )
+
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "name"}
+        )
+        page_sql = queries[-1]
+        self.assertNotIn('"description"', page_sql)
+        self.assertNotIn("auth_user", page_sql)
+
+    def test_exclude_drops_joins_and_prefetches(self):
+        """Test that excluded nested fields are not joined or prefetched."""
+        self.client.force_authenticate(user=self.reviewer)
+
+        response, queries = self.get_with_queries(
+            "/api/solutions/", {"exclude": "task_detail,user_review"}
+        )
+
+        item = response.data["results"][0]
+        self.assertNotIn("task_detail", item)
+        self.assertNotIn("user_review", item)
+        self.assertEqual(len(queries), 2)  # COUNT and the page
+        self.assertNotIn("catalog_programmingtask", queries[-1])
+
+    def test_default_solution_list_has_constant_queries(self):
+        """Test that nested task authors are joined, not fetched per row."""
+        self.client.force_authenticate(user=self.reviewer)
+
+        response, queries = self.get_with_queries("/api/solutions/", {})
+
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(
+            response.data["results"][0]["task_detail"]["added_by"],
+            "fieldauthor",
+        )
+        self.assertEqual(len(queries), 3)  # COUNT, page, user reviews
+
+    def test_expand_nested_objects(self):
+        """Test that expansions render nested objects via one JOIN."""
+        response, queries = self.get_with_queries(
+            "/api/tasks/", {"fields": "id,name", "expand": "category"}
+        )
+
+        item = response.data["results"][0]
+        self.assertEqual(set(item), {"id", "name", "category"})
+        self.assertEqual(item["category"]["name"], "Math")
+        self.assertIn('JOIN "catalog_category"', queries[-1])
+
+    def test_review_solution_expansion(self):
+        """Test reviews render solution ids by default and expand on demand."""
+        response, queries = self.get_with_queries("/api/reviews/", {})
+        self.assertIsInstance(response.data["results"][0]["solution"], int)
+        self.assertNotIn("catalog_solution", queries[-1])
+
+        response, queries = self.get_with_queries(
+            "/api/reviews/", {"expand": "solution"}
+        )
+        solution = response.data["results"][0]["solution"]
+        self.assertEqual(solution["language_name"], "Go")
+        self.assertEqual(solution["user"], "fieldauthor")
+        self.assertNotIn("task_detail", solution)
+        self.assertEqual(len(queries), 2)
+
+    def test_review_expansion_hides_private_solutions(self):
+        """Test that expanding reviews never embeds hidden solutions."""
+        solution = models.Solution.objects.first()
+        solution.is_public = False
+        solution.code = "SECRET_TOKEN = 1"
+        solution.save()
+        review = solution.reviews.get()
+
+        def expanded():
+            response, _ = self.get_with_queries(
+                "/api/reviews/", {"expand": "solution"}
+            )
+            return {
+                item["id"]: item["solution"]
+                for item in response.data["results"]
+            }
+
+        self.assertIsNone(expanded()[review.id])
+        self.assertNotIn("SECRET_TOKEN", str(expanded()))
+        self.client.force_authenticate(user=self.author)
+        self.assertEqual(expanded()[review.id]["id"], solution.id)
+
+    def test_unknown_fields_rejected(self):
+        """Test that unknown names produce a 400 with the offending names."""
+        response = self.client.get(
+            "/api/solutions/", {"fields": "id,secret", "expand": "task"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class KeysetPaginationAPITests(APITestCase):
+    """Tests for opt-in cursor pagination on catalog listings."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username="pageuser", password="testpass123"
+        )
+        self.category, _ = models.Category.objects.get_or_create(name="Paging")
+        self.difficulty, _ = models.Difficulty.objects.get_or_create(
+            name="Easy"
+        )
+        self.tasks = [
+            models.ProgrammingTask.objects.create(
+                name=f"Paged Task {i}",
+                difficulty=self.difficulty,
+                category=self.category,
+                added_by=self.user,
+                status=models.ProgrammingTask.TaskStatus.PUBLIC,
+            )
+            for i in range(7)
+        ]
+        # Force timestamp ties so the id tiebreaker is exercised.
+        same_moment = self.tasks[0].created_at
+        models.ProgrammingTask.objects.filter(
+            id__in=[t.id for t in self.tasks[2:5]]
+        ).update(created_at=same_moment)
+
+    def collect_pages(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_cursor_pages_cover_all_rows_once(self):
+        """Test that following next links visits every row exactly once."""
+        ids, pages = self.collect_pages(
+            "/api/tasks/?pagination=cursor&page_size=3"
+        )
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), {t.id for t in self.tasks})
+
+        expected = list(
+            models.ProgrammingTask.objects.order_by(
+                "-created_at", "-id"
+            ).values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        """Test that previous links walk back to the same rows."""
+        first = self.client.get("/api/tasks/?pagination=cursor&page_size=3")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(
+            [t["id"] for t in back.data["results"]],
+            [t["id"] for t in first.data["results"]],
+        )
+
+    def test_seek_bounds_the_index_range(self):
+        """Test that the seek starts with a range on created_at."""
+        with CaptureQueriesContext(connection) as queries:
+            ids, _ = self.collect_pages(
+                "/api/tasks/?pagination=cursor&page_size=3"
+            )
+
+        self.assertEqual(len(ids), len(self.tasks))
+        self.assertEqual(len(set(ids)), len(self.tasks))
+        self.assertIn(
+            '"catalog_programmingtask"."created_at" <= ',
+            queries[-1]["sql"],
+        )
+
+    def test_page_size_is_bounded(self):
+        """Test that page_size cannot exceed the configured maximum."""
+        response = self.client.get(
+            "/api/tasks/?pagination=cursor&page_size=100000"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), len(self.tasks))
+
+    def test_invalid_cursor_returns_not_found(self):
+        """Test that a tampered cursor is rejected."""
+        response = self.client.get("/api/tasks/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_mode_skips_count_query(self):
+        """Test that cursor pages never issue COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/tasks/?pagination=cursor")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("COUNT(" in q["sql"].upper() for q in queries.captured_queries)
+        )
+
+    def test_page_number_mode_is_default(self):
+        """Test that listings without the opt-in keep page-number shape."""
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(response.data["count"], len(self.tasks))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReferenceCacheAPITests(APITestCase):
+    """Tests for versioned caching of reference endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.category, _ = models.Category.objects.get_or_create(name="Caching")
+
+    def category_names(self):
+        response = self.client.get("/api/categories/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {c["name"] for c in response.data}
+
+    def test_list_is_served_from_cache(self):
+        """Test that a repeated list request does not hit the database."""
+        self.category_names()
+        with self.assertNumQueries(0):
+            self.assertIn("Caching", self.category_names())
+
+    def test_save_invalidates_list(self):
+        """Test that saving a category bumps the cached list."""
+        self.assertIn("Caching", self.category_names())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Renamed"
+            self.category.save()
+
+        names = self.category_names()
+        self.assertIn("Renamed", names)
+        self.assertNotIn("Caching", names)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ListingCacheAPITests(APITestCase):
+    """Tests for cached task and solution listings."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="cacheauthor", password="testpass123"
+        )
+        self.reviewer = User.objects.create_user(
+            username="cachereviewer", password="testpass123"
+        )
+        self.category, _ = models.Category.objects.get_or_create(name="Cache")
+        self.difficulty, _ = models.Difficulty.objects.get_or_create(name="Easy")
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        self.task = models.ProgrammingTask.objects.create(
+            name="Cached Task",
+            difficulty=self.difficulty,
+            category=self.category,
+            added_by=self.author,
+            status=models.ProgrammingTask.TaskStatus.PUBLIC,
+        )
+        self.solution = models.Solution.objects.create(
+            task=self.task,
+            code="print('cached')",
+            language=self.language,
+            user=self.author,
+            is_public=True,
+        )
+
+    def result_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_anonymous_listing_served_from_cache(self):
+        """Test that repeated anonymous listings skip the database."""
+        self.result_ids("/api/tasks/?status=public")
+        with self.assertNumQueries(0):
+            self.result_ids("/api/tasks/?status=public")
+        self.client.get(f"/api/solutions/{self.solution.id}/")
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/solutions/{self.solution.id}/")
+
+    def test_query_param_order_shares_entry(self):
+        """Test that equivalent query strings hit the same entry."""
+        self.result_ids(f"/api/solutions/?task={self.task.id}&language=1")
+        with self.assertNumQueries(0):
+            self.result_ids(f"/api/solutions/?language=1&task={self.task.id}")
+
+    def test_new_solution_invalidates_listing(self):
+        """Test that saving a solution invalidates cached listings."""
+        self.assertEqual(
+            self.result_ids("/api/solutions/"), [self.solution.id]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            newer = models.Solution.objects.create(
+                task=self.task,
+                code="print('newer')",
+                language=self.language,
+                user=self.author,
+                is_public=True,
+            )
+
+        self.assertEqual(
+            self.result_ids("/api/solutions/"), [newer.id, self.solution.id]
+        )
+
+    def test_reference_rename_invalidates_expanded_tasks(self):
+        """Test that expanded task pages show renamed references."""
+        list_url = "/api/tasks/?expand=category,difficulty"
+        detail_url = f"/api/tasks/{self.task.id}/?expand=category"
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Renamed Cache"
+            self.category.save()
+            self.difficulty.name = "Renamed Easy"
+            self.difficulty.save()
+
+        item = self.client.get(list_url).data["results"][0]
+        self.assertEqual(item["category"]["name"], "Renamed Cache")
+        self.assertEqual(item["difficulty"]["name"], "Renamed Easy")
+        self.assertEqual(
+            self.client.get(detail_url).data["category"]["name"],
+            "Renamed Cache",
+        )
+
+    def test_review_invalidates_counters(self):
+        """Test that a new review shows up in cached solution counters."""
+        url = f"/api/solutions/{self.solution.id}/"
+        self.assertEqual(
+            self.client.get(url).data["positive_reviews_count"], 0
+        )
+
+        self.client.force_authenticate(user=self.reviewer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/reviews/",
+                {
+                    "solution": self.solution.id,
+                    "review_type": models.Review.ReviewType.POSITIVE,
+                },
+                format="json",
+            )
+        self.client.force_authenticate(user=None)
+
+        self.assertEqual(
+            self.client.get(url).data["positive_reviews_count"], 1
+        )
+
+    def test_scopes_are_separated(self):
+        """Test that private data cached for a user never leaks to others."""
+        private = models.Solution.objects.create(
+            task=self.task,
+            code="print('private')",
+            language=self.language,
+            user=self.author,
+            is_public=False,
+        )
+        self.client.force_authenticate(user=self.author)
+        self.assertIn(private.id, self.result_ids("/api/solutions/"))
+
+        self.client.force_authenticate(user=None)
+        self.assertNotIn(private.id, self.result_ids("/api/solutions/"))
+
+        self.client.force_authenticate(user=self.reviewer)
+        self.assertNotIn(private.id, self.result_ids("/api/solutions/"))
+
+
+class BulkCreateAPITests(APITestCase):
+    """Tests for batch writes of tasks, solutions and reviews."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username="importer", password="testpass123"
+        )
+        self.reviewer = User.objects.create_user(
+            username="bulkreviewer", password="testpass123"
+        )
+        self.category, _ = models.Category.objects.get_or_create(name="Bulk")
+        self.difficulty, _ = models.Difficulty.objects.get_or_create(
+            name="Easy"
+        )
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        self.task = models.ProgrammingTask.objects.create(
+            name="Existing",
+            difficulty=self.difficulty,
+            category=self.category,
+            added_by=self.user,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def task_items(self, count, prefix="Task"):
+        return [
+            {
+                "name": f"{prefix} {i}",
+                "description": f"Bulk task number {i}",
+                "difficulty": self.difficulty.id,
+                "category": self.category.id,
+            }
+            for i in range(count)
+        ]
+
+    def post_tasks(self, items):
+        return self.client.post("/api/tasks/bulk/", items, format="json")
+
+    def test_bulk_tasks_use_constant_queries(self):
+        """Test that query count doesn't grow with the batch size."""
+        with CaptureQueriesContext(connection) as small:
+            response = self.post_tasks(self.task_items(2, "Small"))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as large:
+            response = self.post_tasks(self.task_items(50, "Large"))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.data["ids"]), 50)
+        tasks = models.ProgrammingTask.objects.in_bulk(response.data["ids"])
+        self.assertEqual(tasks[response.data["ids"][7]].name, "Large 7")
+        self.assertEqual(tasks[response.data["ids"][7]].added_by, self.user)
+        # Indexed despite bulk_create sending no signals.
+        results = self.client.get(
+            "/api/tasks/", {"search": "Large"}
+        ).data["results"]
+        self.assertEqual(len(results), 20)
+
+    def test_bulk_tasks_report_errors_per_item(self):
+        """Test per-item errors and that invalid batches save nothing."""
+        items = self.task_items(4)
+        items[1]["name"] = "Existing"
+        items[2]["name"] = items[0]["name"]
+        items[3]["category"] = 999999
+
+        response = self.post_tasks(items)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data["detail"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("name", errors[1])
+        self.assertIn("name", errors[2])
+        self.assertIn("category", errors[3])
+        self.assertEqual(models.ProgrammingTask.objects.count(), 1)
+
+    def test_bulk_limits(self):
+        """Test auth, empty batches and the batch size limit."""
+        with self.settings(BULK_MAX_ITEMS=3):
+            response = self.post_tasks(self.task_items(4))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.post_tasks([])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=None)
+        for url in ("/api/tasks/bulk/", "/api/reviews/bulk/"):
+            response = self.client.post(url, [], format="json")
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+
+    def test_bulk_solutions(self):
+        """Test blobs, code stats, indexes and task status sync."""
+        code = "import heapq\nheapq.heapify(items)\n"
+        items = [
+            {
+                "task": self.task.id,
+                "code": code,
+                "language": self.language.id,
+                "is_public": i == 0,
+            }
+            for i in range(3)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/solutions/bulk/", items, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        solutions = models.Solution.objects.filter(
+            pk__in=response.data["ids"]
+        )
+        self.assertEqual(len({s.code_blob_id for s in solutions}), 1)
+        self.assertEqual(models.CodeBlob.objects.get().ref_count, 3)
+        self.assertEqual({s.code_lines for s in solutions}, {2})
+        self.assertEqual(solutions[0].code, code.strip())
+        self.task.refresh_from_db()
+        self.assertEqual(
+            self.task.status, models.ProgrammingTask.TaskStatus.PUBLIC
+        )
+        response = self.client.get(
+            "/api/solutions/", {"identifier": "heapify"}
+        )
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_bulk_reviews_create_and_update(self):
+        """Test review upserts and their counter changes."""
+        solutions = models.Solution.objects.bulk_create(
+            models.Solution(
+                task=self.task,
+                code=f"print({i})",
+                language=self.language,
+                user=self.user,
+                is_public=True,
+            )
+            for i in range(3)
+        )
+        self.client.force_authenticate(user=self.reviewer)
+        positive = models.Review.ReviewType.POSITIVE
+        negative = models.Review.ReviewType.NEGATIVE
+        self.client.post(
+            "/api/reviews/",
+            {"solution": solutions[0].id, "review_type": positive},
+            format="json",
+        )
+
+        response = self.client.post(
+            "/api/reviews/bulk/",
+            [
+                {"solution": solution.id, "review_type": negative}
+                for solution in solutions
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(models.Review.objects.count(), 3)
+        counters = models.Solution.objects.values_list(
+            "positive_reviews_count", "negative_reviews_count"
+        )
+        self.assertEqual(set(counters), {(0, 1)})
+
+        # Only updates: nothing was created.
+        response = self.client.post(
+            "/api/reviews/bulk/",
+            [{"solution": solutions[1].id, "review_type": positive}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["ids"],
+            list(
+                models.Review.objects.filter(
+                    solution=solutions[1]
+                ).values_list("id", flat=True)
+            ),
+        )
+
+        response = self.client.post(
+            "/api/reviews/bulk/",
+            [{"solution": solutions[0].id, "review_type": positive}] * 2,
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["detail"][0], {})
+        self.assertIn("solution", response.data["detail"][1])
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from catalog import models
+from common.compiled_serializers import CompiledSerializer
+
+User = get_user_model()
+
+
+class CompiledSerializerParityTests(APITestCase):
+    """Tests that compiled list pages match DRF's serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="ownerpass1")
+        cls.reader = User.objects.create_user("reader", password="readpass1")
+        category = models.Category.objects.create(name="Compiled Graphs")
+        difficulty, _ = models.Difficulty.objects.get_or_create(name="Hard")
+        python, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        go, _ = models.ProgrammingLanguage.objects.get_or_create(name="Go")
+        tasks = [
+            models.ProgrammingTask.objects.create(
+                name=f"Shortest path {n}",
+                description="Find the shortest path",
+                resource="https://example.com/task" if n % 2 else "",
+                category=category,
+                difficulty=difficulty,
+                added_by=cls.owner if n % 3 else cls.reader,
+                status=(
+                    models.ProgrammingTask.TaskStatus.PRIVATE
+                    if n % 4 == 0
+                    else models.ProgrammingTask.TaskStatus.PUBLIC
+                ),
+            )
+            for n in range(12)
+        ]
+        solutions = [
+            models.Solution.objects.create(
+                task=tasks[n % 6 + 1],
+                code=f"def solve():\n    return {n}\n" * (n + 1),
+                language=python if n % 2 else go,
+                explanation="Dijkstra with a heap " * n,
+                user=cls.owner if n % 2 else cls.reader,
+                is_public=n % 5 != 0,
+            )
+            for n in range(15)
+        ]
+        for solution in solutions[:8]:
+            author = solution.user
+            models.Review.objects.create(
+                solution=solution,
+                added_by=cls.reader if author == cls.owner else cls.owner,
+                review_type=models.Review.ReviewType.POSITIVE,
+            )
+
+    def get(self, path, user, compiled):
+        self.client.force_authenticate(user=user)
+        with override_settings(COMPILED_SERIALIZERS=compiled):
+            return self.client.get(f"/api/{path}")
+
+    def test_lists_match_drf_serializers(self):
+        """Test fieldsets, expansions, search, pagination and users."""
+        paths = [
+            "tasks/",
+            "tasks/?expand=category,difficulty",
+            "tasks/?fields=id,name,added_by",
+            "tasks/?exclude=description&status=public",
+            "tasks/?search=shortest",
+            "tasks/?pagination=cursor&page_size=5",
+            "solutions/",
+            "solutions/?expand=language",
+            "solutions/?fields=id,task,code_preview,user_review",
+            "solutions/?search=dijkstra",
+            "reviews/",
+            "reviews/?expand=solution",
+        ]
+        for user in (None, self.owner, self.reader):
+            for path in paths:
+                with self.subTest(path=path, user=user):
+                    expected = self.get(path, user, compiled=False)
+                    with mock.patch.object(
+                        CompiledSerializer,
+                        "many",
+                        autospec=True,
+                        side_effect=CompiledSerializer.many,
+                    ) as many:
+                        response = self.get(path, user, compiled=True)
+                    many.assert_called_once()
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.content, expected.content)
@@ -0,0 +1,99 @@
+"""Tests for the synthetic load data generator."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F, Q
+from django.test import TestCase
+
+from catalog import models, search
+
+User = get_user_model()
+
+
+class GenerateLoadDataTests(TestCase):
+    """Tests for the generate_load_data command."""
+
+    def generate(self, **options):
+        options = {
+            "users": 12,
+            "tasks": 8,
+            "solutions": 30,
+            "reviews": 120,
+            "code_median": 200,
+            "batch_size": 7,
+            **options,
+        }
+        call_command("generate_load_data", stdout=StringIO(), **options)
+
+    def snapshot(self, prefix):
+        solutions = models.Solution.objects.filter(
+            user__username__startswith=f"{prefix}_"
+        ).order_by("pk")
+        return [
+            (
+                solution.task.name,
+                solution.user.username.removeprefix(prefix),
+                solution.code,
+                solution.created_at,
+                solution.task.created_at,
+                sorted(
+                    (
+                        review.added_by.username.removeprefix(prefix),
+                        review.review_type,
+                    )
+                    for review in solution.reviews.all()
+                ),
+            )
+            for solution in solutions.select_related("task", "user")
+        ]
+
+    def test_generates_consistent_catalog(self):
+        """Test that counters, statuses and indexes match the rows."""
+        self.generate()
+
+        self.assertEqual(User.objects.count(), 12)
+        self.assertEqual(models.Review.objects.count(), 120)
+        mismatched = models.Solution.objects.annotate(
+            positive=Count("reviews", filter=Q(reviews__review_type=1)),
+            negative=Count("reviews", filter=Q(reviews__review_type=0)),
+        ).exclude(
+            positive_reviews_count=F("positive"),
+            negative_reviews_count=F("negative"),
+        )
+        self.assertFalse(mismatched.exists())
+        self.assertFalse(
+            models.Review.objects.filter(
+                added_by=F("solution__user")
+            ).exists()
+        )
+        self.assertFalse(
+            models.ProgrammingTask.objects.filter(
+                status=models.ProgrammingTask.TaskStatus.PRIVATE,
+                solutions__is_public=True,
+            ).exists()
+        )
+        solution = models.Solution.objects.first()
+        self.assertEqual(solution.code_length, len(solution.code))
+        task = models.ProgrammingTask.objects.first()
+        self.assertIn(
+            task.pk, search.ranked_ids(search.TASK, task.name.split()[0])
+        )
+
+    def test_same_seed_gives_same_data(self):
+        """Test that a seed reproduces names, code, timing and reviews."""
+        self.generate(seed=7, prefix="first")
+        self.generate(seed=7, prefix="second")
+        self.generate(seed=8, prefix="third")
+
+        first = self.snapshot("first")
+        self.assertEqual(len(first), 30)
+        self.assertEqual(first, self.snapshot("second"))
+        self.assertNotEqual(first, self.snapshot("third"))
+
+    def test_rejects_impossible_review_count(self):
+        """Test that more reviews than user pairs allow is refused."""
+        with self.assertRaisesMessage(CommandError, "Too many reviews"):
+            self.generate(users=2, solutions=3, reviews=4)
+        self.assertFalse(User.objects.exists())
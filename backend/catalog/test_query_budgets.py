@@ -0,0 +1,202 @@
+"""Query budgets per viewset action.
+
+Each list is requested with several page sizes under one budget (see
+``common.testing.QueryBudgetMixin``), so a per-row query fails here as
+soon as it is introduced.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from catalog import loadgen, models
+from catalog.references import registry
+from common.testing import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Shares one generated dataset, large enough for full pages."""
+
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        loadgen.LoadGenerator(
+            users=30,
+            tasks=80,
+            solutions=150,
+            reviews=600,
+            seed=3,
+            public_ratio=0.8,
+            code_median=200,
+            prefix="budget",
+        ).run()
+        # The busiest author: owns private rows and has reviewed others.
+        cls.user = (
+            User.objects.annotate(n=Count("solutions"))
+            .order_by("-n", "pk")
+            .first()
+        )
+        cls.task = models.ProgrammingTask.objects.filter(
+            status=models.ProgrammingTask.TaskStatus.PUBLIC
+        ).first()
+        cls.solution = models.Solution.objects.filter(is_public=True).first()
+
+    def setUp(self):
+        # Loaded once per worker in production; keep it out of budgets.
+        registry.invalidate()
+        for reference in (
+            models.Category,
+            models.Difficulty,
+            models.ProgrammingLanguage,
+        ):
+            registry.name_of(reference, 0)
+
+    def login(self):
+        self.client.force_authenticate(self.user)
+
+
+class ReferenceQueryBudgetTests(QueryBudgetTestCase):
+    """Budgets of the reference data viewsets."""
+
+    def test_reference_lists(self):
+        """Test that reference lists run one query each."""
+        for path in ("categories", "difficulties", "languages"):
+            with self.subTest(path=path):
+                with self.assertQueryBudget(1, joins=0):
+                    response = self.client.get(f"/api/{path}/")
+                self.assertTrue(response.data)
+
+    def test_reference_detail(self):
+        """Test that a reference detail runs one query."""
+        category = models.Category.objects.first()
+        with self.assertQueryBudget(1, joins=0):
+            self.client.get(f"/api/categories/{category.pk}/")
+
+
+class TaskQueryBudgetTests(QueryBudgetTestCase):
+    """Budgets of ProgrammingTaskViewSet."""
+
+    def test_list(self):
+        """Test task lists, anonymous and authenticated."""
+        self.assertListBudget("/api/tasks/", queries=1, joins=1)
+        self.login()
+        self.assertListBudget("/api/tasks/", queries=1, joins=1)
+
+    def test_list_page_number(self):
+        """Test the default page-number list, count included."""
+        with self.assertQueryBudget(2, joins=1):
+            self.client.get("/api/tasks/")
+
+    def test_list_expanded(self):
+        """Test that expanding references adds JOINs, not queries."""
+        self.assertListBudget(
+            "/api/tasks/?expand=category,difficulty", queries=1, joins=3
+        )
+
+    def test_retrieve(self):
+        """Test a task detail."""
+        with self.assertQueryBudget(1, joins=1):
+            self.client.get(f"/api/tasks/{self.task.pk}/")
+
+
+class SolutionQueryBudgetTests(QueryBudgetTestCase):
+    """Budgets of SolutionViewSet."""
+
+    def test_list(self):
+        """Test solution lists, anonymous and authenticated."""
+        self.assertListBudget("/api/solutions/", queries=1, joins=3)
+        self.login()
+        # The user's reviews are prefetched in one extra query, whether
+        # or not the page has any.
+        self.assertListBudget("/api/solutions/", queries=2, joins=3)
+
+    def test_list_filtered_and_sparse(self):
+        """Test filters and sparse fieldsets stay within the budget."""
+        self.login()
+        self.assertListBudget(
+            f"/api/solutions/?task={self.task.pk}&fields=id,task",
+            queries=1,
+            joins=0,
+            page_sizes=(1,),
+        )
+        self.assertListBudget(
+            "/api/solutions/?fields=id,user_review", queries=2, joins=0
+        )
+
+    def test_retrieve(self):
+        """Test a solution detail, code blob included."""
+        self.login()
+        with self.assertQueryBudget(2, joins=4):
+            self.client.get(f"/api/solutions/{self.solution.pk}/")
+
+    def test_raw(self):
+        """Test the raw code download."""
+        with self.assertQueryBudget(2, joins=1):
+            response = self.client.get(
+                f"/api/solutions/{self.solution.pk}/raw/"
+            )
+            b"".join(response.streaming_content)
+
+
+class ReviewQueryBudgetTests(QueryBudgetTestCase):
+    """Budgets of ReviewViewSet."""
+
+    def test_list(self):
+        """Test review lists, plain and with solutions expanded."""
+        self.assertListBudget("/api/reviews/", queries=1, joins=1)
+        self.assertListBudget(
+            "/api/reviews/?expand=solution", queries=1, joins=3
+        )
+
+    def test_create(self):
+        """Test that creating a review doesn't load unrelated rows."""
+        self.login()
+        solution = (
+            models.Solution.objects.filter(is_public=True)
+            .exclude(user=self.user)
+            .exclude(reviews__added_by=self.user)
+            .first()
+        )
+        with self.assertQueryBudget(5):
+            response = self.client.post(
+                "/api/reviews/",
+                {"solution": solution.pk, "review_type": 1},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    """Budgets of admin change lists, which render ``__str__``."""
+
+    def test_changelists(self):
+        """Test that change lists don't query per row."""
+        admin = User.objects.create_superuser("root", password="rootpass1")
+        self.client.force_login(admin)
+        changelists = {"programmingtask": 3, "solution": 3, "review": 4}
+        for model, joins in changelists.items():
+            with self.subTest(model=model):
+                # Session, user, filter choices, counts and one page;
+                # without list_select_related the page would join every
+                # relation, code blobs included.
+                with self.assertQueryBudget(8, joins=joins):
+                    response = self.client.get(
+                        f"/admin/catalog/{model}/"
+                    )
+                self.assertEqual(response.status_code, 200)
+
+    def test_solution_str_reads_selected_relations(self):
+        """Test that ``str()`` runs no queries once relations are joined."""
+        solution = models.Solution.objects.select_related(
+            "task", "language"
+        ).get(pk=self.solution.pk)
+        with self.assertQueryBudget(0):
+            label = str(solution)
+        self.assertEqual(
+            label,
+            f"{self.solution.task.name} ({self.solution.language.name})",
+        )
@@ -0,0 +1,168 @@
+"""Tests for the in-process reference data registry."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from catalog import models
+from catalog.references import ReferenceRegistry, registry
+from common.cache_utils import NAMESPACE_LANGUAGES, bump_namespace
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "reference-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReferenceRegistryTests(TestCase):
+    """Tests for ReferenceRegistry lookups and refreshes."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.registry = ReferenceRegistry()
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+
+    def language_name(self):
+        return self.registry.name_of(
+            models.ProgrammingLanguage, self.language.id
+        )
+
+    def test_lookups_by_id_and_name(self):
+        """Test id and case-insensitive name resolution."""
+        self.assertEqual(
+            self.language_name(),
+            "Python",
+        )
+        self.assertEqual(
+            self.registry.id_of(models.ProgrammingLanguage, " python "),
+            self.language.id,
+        )
+        self.assertIsNone(
+            self.registry.id_of(models.ProgrammingLanguage, "Cobol-9000")
+        )
+
+    def test_lookups_stay_in_memory_between_refreshes(self):
+        """Test that warm lookups issue no queries."""
+        self.language_name()
+        with self.assertNumQueries(0):
+            self.registry.id_of(models.Category, "Arrays")
+            self.language_name()
+
+    @override_settings(REFERENCE_REGISTRY_REFRESH_INTERVAL=0)
+    def test_reloads_when_shared_version_changes(self):
+        """Test that another worker's edit is picked up via the version."""
+        self.language_name()
+        models.ProgrammingLanguage.objects.filter(pk=self.language.pk).update(
+            name="Python 3"
+        )
+        self.assertEqual(
+            self.language_name(),
+            "Python",
+        )
+
+        bump_namespace(NAMESPACE_LANGUAGES)
+        self.assertEqual(
+            self.language_name(),
+            "Python 3",
+        )
+
+    def test_unknown_id_forces_reload(self):
+        """Test that rows created after the last refresh are found."""
+        self.language_name()
+        created = models.ProgrammingLanguage.objects.bulk_create(
+            [models.ProgrammingLanguage(name="Brand New Lang")]
+        )[0]
+        self.assertEqual(
+            self.registry.name_of(models.ProgrammingLanguage, created.id),
+            "Brand New Lang",
+        )
+
+
+    def test_unknown_ids_reload_once_per_version(self):
+        """Test that bogus ids don't reload the tables on every lookup."""
+        self.language_name()
+        with self.assertNumQueries(3):
+            self.assertIsNone(
+                self.registry.name_of(models.ProgrammingLanguage, 999999)
+            )
+        with self.assertNumQueries(0):
+            for pk in (999999, 999998, 999997):
+                self.assertIsNone(
+                    self.registry.name_of(models.ProgrammingLanguage, pk)
+                )
+
+        bump_namespace(NAMESPACE_LANGUAGES)
+        self.registry.invalidate()
+        self.language_name()
+        with self.assertNumQueries(3):
+            self.registry.name_of(models.ProgrammingLanguage, 999999)
+
+class ReferenceFilterAPITests(APITestCase):
+    """Tests for registry-backed solution filters."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username="refuser", password="testpass123"
+        )
+        self.category, _ = models.Category.objects.get_or_create(name="Trees")
+        self.difficulty, _ = models.Difficulty.objects.get_or_create(
+            name="Hard"
+        )
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Go"
+        )
+        task = models.ProgrammingTask.objects.create(
+            name="Invert Tree",
+            difficulty=self.difficulty,
+            category=self.category,
+            added_by=self.user,
+            status=models.ProgrammingTask.TaskStatus.PUBLIC,
+        )
+        self.solution = models.Solution.objects.create(
+            task=task,
+            code="func invert() {}",
+            language=self.language,
+            user=self.user,
+            is_public=True,
+        )
+
+    def result_ids(self, query):
+        response = self.client.get(f"/api/solutions/?{query}")
+        return [s["id"] for s in response.data["results"]]
+
+    def test_category_and_difficulty_filters_by_name(self):
+        """Test case-insensitive name filters backed by the registry."""
+        self.assertEqual(self.result_ids("category=trees"), [self.solution.id])
+        self.assertEqual(
+            self.result_ids("difficulty=HARD"), [self.solution.id]
+        )
+        self.assertEqual(self.result_ids("category=Unknown"), [])
+
+    def test_filter_on_category_created_after_refresh(self):
+        """Test that a category unknown to the registry is reloaded."""
+        registry.invalidate()
+        self.assertEqual(self.result_ids("category=trees"), [self.solution.id])
+        # bulk_create sends no signals, like a write on another worker.
+        category = models.Category.objects.bulk_create(
+            [models.Category(name="Tries")]
+        )[0]
+        self.solution.task.category = category
+        self.solution.task.save()
+        self.assertEqual(
+            self.result_ids("category=tries"), [self.solution.id]
+        )
+
+    def test_language_name_rendered_without_join(self):
+        """Test that language_name is resolved from the registry."""
+        response = self.client.get(f"/api/solutions/{self.solution.id}/")
+        self.assertEqual(response.data["language_name"], "Go")
@@ -0,0 +1,310 @@
+"""Tests for the full-text search index and ranked ``?search=``."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from catalog import models, search, services
+
+User = get_user_model()
+
+
+class SearchAPITests(APITestCase):
+    """Tests for ranked task and solution search."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.assertTrue(search.is_available())
+        self.user = User.objects.create_user(
+            username="searcher", password="testpass123"
+        )
+        self.other_user = User.objects.create_user(
+            username="stranger", password="testpass123"
+        )
+        self.category, _ = models.Category.objects.get_or_create(name="Graphs")
+        self.difficulty, _ = models.Difficulty.objects.get_or_create(
+            name="Medium"
+        )
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        self.dijkstra = self.create_task(
+            "Dijkstra shortest path",
+            "Find the shortest path in a weighted graph",
+        )
+        self.bfs = self.create_task(
+            "Breadth-first search",
+            "Traverse a graph and find the shortest path by edges",
+        )
+        self.sorting = self.create_task(
+            "Merge sort", "Sort an array <b>stably</b>"
+        )
+
+    def create_task(self, name, description, **kwargs):
+        kwargs.setdefault("added_by", self.user)
+        kwargs.setdefault("status", models.ProgrammingTask.TaskStatus.PUBLIC)
+        return models.ProgrammingTask.objects.create(
+            name=name,
+            description=description,
+            difficulty=self.difficulty,
+            category=self.category,
+            **kwargs,
+        )
+
+    def create_solution(self, task, explanation, **kwargs):
+        kwargs.setdefault("user", self.user)
+        kwargs.setdefault("is_public", True)
+        return models.Solution.objects.create(
+            task=task,
+            code="print(1)",
+            language=self.language,
+            explanation=explanation,
+            **kwargs,
+        )
+
+    def search_tasks(self, query):
+        response = self.client.get("/api/tasks/", {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_tasks_ranked_by_relevance(self):
+        """Test that name matches outrank description-only matches."""
+        results = self.search_tasks("shortest path")
+
+        self.assertEqual(
+            [task["id"] for task in results],
+            [self.dijkstra.id, self.bfs.id],
+        )
+
+    def test_last_term_matches_prefix(self):
+        """Test search-as-you-type on the last term."""
+        results = self.search_tasks("dijk")
+
+        self.assertEqual([task["id"] for task in results], [self.dijkstra.id])
+
+    def test_snippets_mark_matches_and_escape_html(self):
+        """Test that highlights wrap matches and escape stored HTML."""
+        results = self.search_tasks("stably")
+
+        snippet = results[0]["search_highlight"]
+        self.assertIn("<mark>stably</mark>", snippet)
+        self.assertNotIn("<b>", snippet)
+
+    def test_no_highlight_without_search(self):
+        """Test that plain listings carry a null highlight."""
+        response = self.client.get("/api/tasks/")
+
+        self.assertIsNone(response.data["results"][0]["search_highlight"])
+
+    def test_search_respects_visibility(self):
+        """Test that other users' private tasks are not found."""
+        self.create_task(
+            "Hidden shortest path",
+            "",
+            added_by=self.other_user,
+            status=models.ProgrammingTask.TaskStatus.PRIVATE,
+        )
+
+        results = self.search_tasks("hidden")
+
+        self.assertEqual(results, [])
+
+    def test_search_pages_cover_every_visible_match(self):
+        """Test that counts and pages include every visible match."""
+        for n in range(25):
+            self.create_task(f"Graph walk {n}", "", added_by=self.other_user)
+        mine = self.create_task(
+            "Graph walk draft",
+            "",
+            status=models.ProgrammingTask.TaskStatus.PRIVATE,
+        )
+        self.client.force_authenticate(user=self.user)
+
+        ids, url = [], "/api/tasks/?search=graph+walk&page_size=10"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data["count"], 26)
+            ids.extend(task["id"] for task in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(len(set(ids)), 26)
+        self.assertIn(mine.id, ids)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test incremental index maintenance on save and delete."""
+        self.sorting.name = "Quick sort"
+        self.sorting.save()
+        self.assertEqual(self.search_tasks("merge"), [])
+        self.assertEqual(len(self.search_tasks("quick")), 1)
+
+        self.sorting.delete()
+        self.assertEqual(self.search_tasks("quick"), [])
+
+    def test_solution_search_by_explanation_and_task_name(self):
+        """Test solution documents and their reindex on task rename."""
+        solution = self.create_solution(
+            self.dijkstra, "Uses a binary heap as priority queue"
+        )
+        self.create_solution(self.bfs, "Plain queue")
+
+        response = self.client.get("/api/solutions/", {"search": "heap"})
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [solution.id]
+        )
+        self.assertIn(
+            "<mark>heap</mark>", response.data["results"][0]["search_highlight"]
+        )
+        self.assertNotIn(
+            "search_highlight", response.data["results"][0]["task_detail"]
+        )
+
+        self.dijkstra.name = "Bellman-Ford"
+        self.dijkstra.save()
+        response = self.client.get("/api/solutions/", {"search": "bellman"})
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [solution.id]
+        )
+
+    def test_rebuild_command_restores_index(self):
+        """Test that rebuild_search_index repopulates a wiped index."""
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM catalog_task_fts")
+        self.assertEqual(self.search_tasks("dijkstra"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(len(self.search_tasks("dijkstra")), 1)
+
+
+class CodeSearchAPITests(APITestCase):
+    """Tests for code substring and identifier filters on solutions."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.assertTrue(search.is_available(kinds=(search.CODE,)))
+        self.user = User.objects.create_user(
+            username="coder", password="testpass123"
+        )
+        self.other_user = User.objects.create_user(
+            username="lurker", password="testpass123"
+        )
+        category, _ = models.Category.objects.get_or_create(name="Heaps")
+        difficulty, _ = models.Difficulty.objects.get_or_create(name="Easy")
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        self.task = models.ProgrammingTask.objects.create(
+            name="Top K",
+            difficulty=difficulty,
+            category=category,
+            added_by=self.user,
+        )
+        self.heap = self.create_solution(
+            "import heapq\nheapq.heappush(items, -x)  # 100% [sic]"
+        )
+        self.sort = self.create_solution("items.sort(reverse=True)")
+
+    def create_solution(self, code, **kwargs):
+        kwargs.setdefault("user", self.user)
+        kwargs.setdefault("is_public", True)
+        with self.captureOnCommitCallbacks(execute=True):
+            return models.Solution.objects.create(
+                task=self.task, code=code, language=self.language, **kwargs
+            )
+
+    def code_index_size(self):
+        table = search._table(connection, search.CODE)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+
+    def filter_ids(self, **params):
+        response = self.client.get("/api/solutions/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item["id"] for item in response.data["results"]}
+
+    def test_identifier_filter(self):
+        """Test exact identifier lookups, all names required."""
+        self.assertEqual(self.filter_ids(identifier="heapq"), {self.heap.id})
+        self.assertEqual(
+            self.filter_ids(identifier="heapq,heappush"), {self.heap.id}
+        )
+        self.assertEqual(self.filter_ids(identifier="heapq sort"), set())
+        # Identifiers match whole names only.
+        self.assertEqual(self.filter_ids(identifier="heap"), set())
+
+    def test_code_contains_filter(self):
+        """Test case-sensitive substring lookups, including wildcards."""
+        self.assertEqual(
+            self.filter_ids(code_contains="heappush(items"), {self.heap.id}
+        )
+        self.assertEqual(
+            self.filter_ids(code_contains="items"),
+            {self.heap.id, self.sort.id},
+        )
+        self.assertEqual(self.filter_ids(code_contains="HEAPQ"), set())
+        self.assertEqual(
+            self.filter_ids(code_contains="100% [sic]"), {self.heap.id}
+        )
+        self.assertEqual(self.filter_ids(code_contains="1*0"), set())
+
+    def test_index_follows_code_edits(self):
+        """Test incremental maintenance of both code indexes."""
+        self.sort.code = "import bisect\nbisect.insort(items, x)"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sort.save(update_fields=["code", "updated_at"])
+
+        self.assertEqual(self.filter_ids(identifier="sort"), set())
+        self.assertEqual(self.filter_ids(identifier="insort"), {self.sort.id})
+        self.assertEqual(
+            self.filter_ids(code_contains="bisect.insort"), {self.sort.id}
+        )
+
+        self.sort.delete()
+        self.assertEqual(self.filter_ids(code_contains="bisect"), set())
+
+    def test_code_is_indexed_once_per_blob(self):
+        """Test that solutions sharing code share one trigram entry."""
+        self.assertEqual(self.code_index_size(), 2)
+        with self.captureOnCommitCallbacks() as callbacks:
+            twin = models.Solution.objects.create(
+                task=self.task,
+                code=self.sort.code,
+                language=self.language,
+                user=self.other_user,
+                is_public=True,
+            )
+        # Indexing waits for the commit.
+        self.assertEqual(self.filter_ids(identifier="sort"), {self.sort.id})
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.code_index_size(), 2)
+        self.assertEqual(
+            self.filter_ids(code_contains="items.sort"),
+            {self.sort.id, twin.id},
+        )
+        self.assertEqual(
+            self.filter_ids(identifier="sort"), {self.sort.id, twin.id}
+        )
+
+        twin.delete()
+        self.sort.delete()
+        services.collect_code_blobs()
+        self.assertEqual(self.code_index_size(), 1)
+
+    def test_code_filters_respect_visibility(self):
+        """Test that private solutions of others are never matched."""
+        self.create_solution(
+            "import heapq  # private", user=self.other_user, is_public=False
+        )
+
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.filter_ids(identifier="heapq"), {self.heap.id})
+        self.assertEqual(
+            self.filter_ids(code_contains="heapq"), {self.heap.id}
+        )
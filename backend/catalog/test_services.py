@@ -230,3 +230,249 @@ class CreateReviewServiceTests(TestCase):
         self.assertEqual(result2.instance.id, review_id)
         self.assertEqual(result2.instance.review_type, models.Review.ReviewType.POSITIVE)
         self.assertEqual(models.Review.objects.count(), 1)
+
+    def test_bulk_reviews_return_stored_rows(self):
+        """Test that bulk upserts return the rows as stored."""
+        existing = services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.NEGATIVE,
+        ).instance
+        other = models.Solution.objects.create(
+            task=self.task,
+            code="def factorial(n): return math.factorial(n)",
+            language=self.language,
+            user=self.user1,
+            is_public=True,
+        )
+        positive = models.Review.ReviewType.POSITIVE
+
+        reviews, created = services.bulk_create_reviews(
+            user=self.user2,
+            items=[
+                {"solution": self.solution, "review_type": positive},
+                {"solution": other, "review_type": positive},
+            ],
+        )
+
+        self.assertTrue(created)
+        self.assertEqual(reviews[0].pk, existing.pk)
+        self.assertEqual(reviews[0].created_at, existing.created_at)
+        self.assertEqual(reviews[0].review_type, positive)
+        self.assertEqual(reviews[1].solution_id, other.pk)
+
+    def test_bulk_reviews_report_updates_only(self):
+        """Test that a batch of existing reviews reports nothing created."""
+        existing = services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.NEGATIVE,
+        ).instance
+
+        reviews, created = services.bulk_create_reviews(
+            user=self.user2,
+            items=[
+                {
+                    "solution": self.solution,
+                    "review_type": models.Review.ReviewType.POSITIVE,
+                }
+            ],
+        )
+
+        self.assertFalse(created)
+        self.assertEqual(reviews[0].created_at, existing.created_at)
+        self.assertEqual(models.Review.objects.count(), 1)
+
+    def assertCounters(self, positive, negative):
+        self.solution.refresh_from_db()
+        self.assertEqual(self.solution.positive_reviews_count, positive)
+        self.assertEqual(self.solution.negative_reviews_count, negative)
+
+    def test_review_counters_follow_create_flip_and_delete(self):
+        """Test that counters stay exact through create, flip and delete."""
+        services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.POSITIVE,
+        )
+        self.assertCounters(1, 0)
+
+        # Same type again is a no-op
+        services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.POSITIVE,
+        )
+        self.assertCounters(1, 0)
+
+        services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.NEGATIVE,
+        )
+        self.assertCounters(0, 1)
+
+        models.Review.objects.get(solution=self.solution).delete()
+        self.assertCounters(0, 0)
+
+    def test_review_counters_follow_direct_saves(self):
+        """Test that ORM writes outside the services keep counters exact."""
+        review = models.Review.objects.create(
+            solution=self.solution,
+            added_by=self.user2,
+            review_type=models.Review.ReviewType.POSITIVE,
+        )
+        self.assertCounters(1, 0)
+
+        review = models.Review.objects.get(pk=review.pk)
+        review.review_type = models.Review.ReviewType.NEGATIVE
+        review.save()
+        self.assertCounters(0, 1)
+
+        # Saved without the stored type loaded.
+        review = models.Review.objects.only("id").get(pk=review.pk)
+        review.review_type = models.Review.ReviewType.POSITIVE
+        review.save(update_fields=["review_type", "updated_at"])
+        self.assertCounters(1, 0)
+
+        review.save(update_fields=["updated_at"])
+        self.assertCounters(1, 0)
+
+    def test_review_counters_follow_admin_edits(self):
+        """Test that changing a review's type in the admin moves counters."""
+        review = models.Review.objects.create(
+            solution=self.solution,
+            added_by=self.user2,
+            review_type=models.Review.ReviewType.NEGATIVE,
+        )
+        self.client.force_login(
+            User.objects.create_superuser("root", password="rootpass1")
+        )
+
+        response = self.client.post(
+            f"/admin/catalog/review/{review.pk}/change/",
+            {
+                "solution": self.solution.pk,
+                "added_by": self.user2.pk,
+                "review_type": models.Review.ReviewType.POSITIVE,
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertCounters(1, 0)
+
+    def test_user_deletion_releases_review_counters(self):
+        """Test that cascading review deletion decrements counters."""
+        services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.POSITIVE,
+        )
+        self.user2.delete()
+        self.assertCounters(0, 0)
+
+    def test_recount_repairs_drift(self):
+        """Test that recount_review_counters fixes drifted counters."""
+        services.create_review(
+            user=self.user2,
+            solution=self.solution,
+            review_type=models.Review.ReviewType.NEGATIVE,
+        )
+        models.Solution.objects.filter(pk=self.solution.pk).update(
+            positive_reviews_count=5, negative_reviews_count=0
+        )
+
+        self.assertEqual(services.recount_review_counters(dry_run=True), 1)
+        self.assertCounters(5, 0)
+
+        self.assertEqual(services.recount_review_counters(batch_size=1), 1)
+        self.assertCounters(0, 1)
+        self.assertEqual(services.recount_review_counters(), 0)
+
+
+class CodeStorageTests(TestCase):
+    """Tests for deduplicated, compressed solution code."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        category, _ = models.Category.objects.get_or_create(name="Arrays")
+        difficulty, _ = models.Difficulty.objects.get_or_create(name="Easy")
+        self.language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        self.task = models.ProgrammingTask.objects.create(
+            name="Sum Array",
+            difficulty=difficulty,
+            category=category,
+            added_by=self.user,
+        )
+        self.code = "total = 0\nfor x in items:\n    total += x\n" * 20
+
+    def create_solution(self, code):
+        return models.Solution.objects.create(
+            task=self.task, code=code, language=self.language, user=self.user
+        )
+
+    def assertRefCount(self, code, expected):
+        digest = models.CodeBlob.digest_of(code.encode("utf-8"))
+        self.assertEqual(
+            models.CodeBlob.objects.get(pk=digest).ref_count, expected
+        )
+
+    def test_identical_code_is_stored_once_and_compressed(self):
+        """Test deduplication and that payloads are smaller than code."""
+        first = self.create_solution(self.code)
+        second = self.create_solution(self.code)
+
+        self.assertEqual(first.code_blob_id, second.code_blob_id)
+        self.assertEqual(models.CodeBlob.objects.count(), 1)
+        self.assertRefCount(self.code, 2)
+        blob = models.CodeBlob.objects.get()
+        self.assertLess(len(blob.data), blob.size)
+
+    def test_code_is_decompressed_lazily(self):
+        """Test that code is only read when accessed."""
+        solution = self.create_solution(self.code)
+
+        solution = models.Solution.objects.get(pk=solution.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(solution.code, self.code)
+        with self.assertNumQueries(0):
+            self.assertEqual(solution.code, self.code)
+
+    def test_edits_and_deletes_move_references(self):
+        """Test reference counts across edits and deletes."""
+        first = self.create_solution(self.code)
+        second = self.create_solution(self.code)
+
+        second.code = "print(sum(items))"
+        second.save(update_fields=["code", "updated_at"])
+        self.assertRefCount(self.code, 1)
+        self.assertRefCount(second.code, 1)
+        second.refresh_from_db()
+        self.assertEqual(second.code, "print(sum(items))")
+        self.assertEqual(second.code_lines, 1)
+
+        first.delete()
+        self.assertRefCount(self.code, 0)
+
+    def test_collect_deletes_unreferenced_blobs(self):
+        """Test garbage collection and reference count repair."""
+        kept = self.create_solution(self.code)
+        self.create_solution("print(1)").delete()
+        models.CodeBlob.objects.filter(pk=kept.code_blob_id).update(
+            ref_count=7
+        )
+
+        self.assertEqual(services.collect_code_blobs(dry_run=True), 1)
+        self.assertEqual(services.collect_code_blobs(), 1)
+
+        self.assertEqual(list(models.CodeBlob.objects.all()), [kept.code_blob])
+        self.assertRefCount(self.code, 1)
+        stats = services.code_storage_stats()
+        self.assertEqual(stats["solutions"], 1)
+        self.assertEqual(stats["logical_bytes"], len(self.code))
+        self.assertLess(stats["stored_bytes"], stats["logical_bytes"])
@@ -0,0 +1,164 @@
+"""Tests for NDJSON catalog export and import."""
+
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from catalog import models, search
+
+User = get_user_model()
+
+
+class CatalogTransferTests(TestCase):
+    """Tests for the export_catalog and import_catalog commands."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.author = User.objects.create_user(
+            username="exporter", password="testpass123"
+        )
+        self.reviewer = User.objects.create_user(
+            username="critic", password="testpass123"
+        )
+        category, _ = models.Category.objects.get_or_create(name="Graphs")
+        difficulty, _ = models.Difficulty.objects.get_or_create(name="Hard")
+        language, _ = models.ProgrammingLanguage.objects.get_or_create(
+            name="Python"
+        )
+        self.task = models.ProgrammingTask.objects.create(
+            name="Dijkstra",
+            description="Shortest paths",
+            difficulty=difficulty,
+            category=category,
+            added_by=self.author,
+            status=models.ProgrammingTask.TaskStatus.PUBLIC,
+        )
+        self.solution = models.Solution.objects.create(
+            task=self.task,
+            code="import heapq\nheapq.heappop(queue)\n",
+            language=language,
+            explanation="Binary heap",
+            user=self.author,
+            is_public=True,
+        )
+        models.Review.objects.create(
+            solution=self.solution,
+            added_by=self.reviewer,
+            review_type=models.Review.ReviewType.NEGATIVE,
+        )
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def export(self, name):
+        call_command("export_catalog", self.path(name), stderr=StringIO())
+        return self.path(name)
+
+    def import_(self, path):
+        call_command("import_catalog", path, stdout=StringIO())
+
+    def test_round_trip(self):
+        """Test that an import restores an export, indexes included."""
+        path = self.export("catalog.ndjson.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as lines:
+            exported = [json.loads(line)["model"] for line in lines]
+        self.assertEqual(exported[-2:], ["task", "solution"])
+        created_at = self.solution.created_at
+        models.ProgrammingTask.objects.all().delete()
+        User.objects.all().delete()
+
+        self.import_(path)
+
+        solution = models.Solution.objects.select_related("task").get()
+        self.assertEqual(solution.code, self.solution.code)
+        self.assertEqual(solution.code_lines, 2)
+        self.assertEqual(solution.created_at, created_at)
+        self.assertEqual(solution.task.added_by.username, "exporter")
+        self.assertEqual(solution.negative_reviews_count, 1)
+        self.assertEqual(
+            solution.reviews.get().added_by.username, "critic"
+        )
+        self.assertFalse(
+            User.objects.get(username="critic").has_usable_password()
+        )
+        self.assertEqual(
+            search.ranked_ids(search.TASK, "dijkstra"), [solution.task_id]
+        )
+        self.assertTrue(
+            solution.identifiers.filter(name="heappop").exists()
+        )
+
+    def test_reimport_merges_by_natural_key(self):
+        """Test that re-importing an export adds nothing."""
+        path = self.export("catalog.ndjson")
+
+        self.import_(path)
+
+        self.assertEqual(models.ProgrammingTask.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(self.task.solutions.get(), self.solution)
+        self.assertEqual(models.Review.objects.count(), 1)
+        self.assertEqual(models.CodeBlob.objects.get().ref_count, 1)
+
+    def test_import_counts_a_reviewer_once(self):
+        """Test that a reviewer listed twice in a solution is kept once."""
+        path = self.path("reviews.ndjson")
+        review = {
+            "user": "critic",
+            "review_type": models.Review.ReviewType.POSITIVE,
+        }
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(
+                json.dumps(
+                    {
+                        "model": "solution",
+                        "task": ["Dijkstra", "exporter"],
+                        "user": "critic",
+                        "language": "Python",
+                        "code": "print('twice')",
+                        "reviews": [review, review],
+                    }
+                )
+                + "\n"
+            )
+
+        self.import_(path)
+
+        solution = models.Solution.objects.get(user=self.reviewer)
+        self.assertEqual(solution.reviews.count(), 1)
+        self.assertEqual(solution.positive_reviews_count, 1)
+
+    def test_import_reports_failing_line(self):
+        """Test that unresolvable records name their line."""
+        path = self.path("broken.ndjson")
+        with open(path, "w", encoding="utf-8") as out:
+            out.write('{"model": "user", "username": "newcomer"}\n\n')
+            out.write(
+                json.dumps(
+                    {
+                        "model": "task",
+                        "name": "Orphan",
+                        "owner": "nobody",
+                        "category": "Graphs",
+                        "difficulty": "Hard",
+                    }
+                )
+                + "\n"
+            )
+
+        with self.assertRaisesMessage(CommandError, "line 3: unknown user"):
+            self.import_(path)
+
+        # Chunks before the failing one stay imported.
+        self.assertTrue(User.objects.filter(username="newcomer").exists())
+        self.assertFalse(
+            models.ProgrammingTask.objects.filter(name="Orphan").exists()
+        )
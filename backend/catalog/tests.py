@@ -71,7 +71,8 @@ class SolutionApiTests(APITestCase):
         response = self.client.post("/api/solutions/", payload, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(models.Solution.objects.count(), initial_count + 1)
-        solution = models.Solution.objects.get(code="print(2)")
+        solution = models.Solution.objects.get(pk=response.data["id"])
+        self.assertEqual(solution.code, "print(2)")
         self.assertEqual(solution.task, self.task)
         self.assertEqual(solution.user, self.user)
 
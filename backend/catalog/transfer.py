@@ -0,0 +1,531 @@
+"""Streaming NDJSON export and import of the whole catalog.
+
+Every line is one JSON object with a ``model`` key. Exports list reference
+data, users, tasks and solutions in dependency order. Foreign keys are
+written as natural keys: reference names, usernames, and
+``[task name, owner username]`` for tasks. Reviews are nested in their
+solution, because solutions have no natural key of their own.
+
+Exports read through ``.iterator()`` (server-side cursors on PostgreSQL)
+and imports insert chunks of consecutive lines with ``bulk_create``, so
+memory use depends on the chunk size, not on the size of the catalog.
+
+Imports merge reference data, users and tasks with existing rows by
+natural key. Solutions are matched on task, author and code digest:
+existing ones are left as they are, reviews included, so importing an
+export twice adds nothing. A reviewer listed twice in a solution counts
+once. Imported users get an unusable password. ``bulk_create`` sends no
+signals, so indexes, counters and caches are maintained here.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models as django_models
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.utils.dateparse import parse_datetime
+
+from catalog import models, search, services
+from catalog.references import registry
+from common.cache_utils import (
+    NAMESPACE_CATEGORIES,
+    NAMESPACE_DIFFICULTIES,
+    NAMESPACE_LANGUAGES,
+    NAMESPACE_SOLUTIONS,
+    NAMESPACE_TASKS,
+    bump_namespace,
+)
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 2000
+
+CATEGORY = "category"
+DIFFICULTY = "difficulty"
+LANGUAGE = "language"
+USER = "user"
+TASK = "task"
+SOLUTION = "solution"
+REVIEW = "review"
+
+REFERENCE_MODELS = {
+    CATEGORY: models.Category,
+    DIFFICULTY: models.Difficulty,
+    LANGUAGE: models.ProgrammingLanguage,
+}
+
+# Fields every record of a model must have, checked before anything of
+# its chunk is written.
+REQUIRED_FIELDS = {
+    CATEGORY: ("name",),
+    DIFFICULTY: ("name",),
+    LANGUAGE: ("name",),
+    USER: ("username",),
+    TASK: ("name", "owner", "category", "difficulty"),
+    SOLUTION: ("task", "user", "language", "code"),
+}
+REVIEW_REQUIRED_FIELDS = ("user", "review_type")
+
+Record = Dict[str, Any]
+
+
+class CatalogImportError(Exception):
+    """A line of an import can't be applied."""
+
+    def __init__(self, line: int, message: str):
+        self.line = line
+        super().__init__(f"line {line}: {message}")
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        # Keep microseconds, which DjangoJSONEncoder drops.
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def export_catalog(
+    out: TextIO, *, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Counter:
+    """Write the catalog to ``out`` as NDJSON.
+
+    Returns:
+        Number of exported records by model
+    """
+    counts = Counter()
+    encoder = _Encoder(ensure_ascii=False)
+    for model, records in _export_records(chunk_size):
+        for record in records:
+            out.write(encoder.encode({"model": model, **record}))
+            out.write("\n")
+            counts[model] += 1
+    logger.info(f"Catalog exported: {dict(counts)}")
+    return counts
+
+
+def _export_records(
+    chunk_size: int,
+) -> Iterator[Tuple[str, Iterable[Record]]]:
+    for model, reference in REFERENCE_MODELS.items():
+        fields = ["name"]
+        if reference is models.Category:
+            fields.append("description")
+        yield model, reference.objects.order_by("pk").values(
+            *fields
+        ).iterator(chunk_size=chunk_size)
+
+    yield USER, User.objects.order_by("pk").values(
+        "username", "email", "first_name", "last_name", "date_joined"
+    ).iterator(chunk_size=chunk_size)
+
+    yield TASK, (
+        _task_record(row)
+        for row in models.ProgrammingTask.objects.order_by("pk")
+        .values(
+            "name",
+            "description",
+            "resource",
+            "status",
+            "created_at",
+            "updated_at",
+            "category__name",
+            "difficulty__name",
+            owner=F("added_by__username"),
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    yield SOLUTION, (
+        _solution_record(solution)
+        for solution in models.Solution.objects.order_by("pk")
+        .select_related("task__added_by", "user", "language", "code_blob")
+        .prefetch_related(
+            Prefetch(
+                "reviews",
+                queryset=models.Review.objects.select_related(
+                    "added_by"
+                ).order_by("pk"),
+            )
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _task_record(row: Record) -> Record:
+    row["category"] = row.pop("category__name")
+    row["difficulty"] = row.pop("difficulty__name")
+    return row
+
+
+def _solution_record(solution: models.Solution) -> Record:
+    return {
+        "task": [solution.task.name, solution.task.added_by.username],
+        "user": solution.user.username,
+        "language": solution.language.name,
+        "code": solution.code,
+        "explanation": solution.explanation,
+        "is_public": solution.is_public,
+        "published_at": solution.published_at,
+        "created_at": solution.created_at,
+        "updated_at": solution.updated_at,
+        "reviews": [
+            {
+                "user": review.added_by.username,
+                "review_type": review.review_type,
+                "created_at": review.created_at,
+                "updated_at": review.updated_at,
+            }
+            for review in solution.reviews.all()
+        ],
+    }
+
+
+Line = Tuple[int, Record]
+
+
+class CatalogImporter:
+    """Apply NDJSON lines written by ``export_catalog``.
+
+    Consecutive lines of one model are applied together, at most
+    ``chunk_size`` per transaction.
+    """
+
+    def __init__(self, *, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.created = Counter()
+        self.skipped = Counter()
+        self._reference_ids: Dict[type, Dict[str, int]] = {}
+
+    def run(self, lines: Iterable[str]) -> Counter:
+        """Import all lines.
+
+        Returns:
+            Number of created records by model (reviews included)
+
+        Raises:
+            CatalogImportError: On malformed or unresolvable lines; the
+                chunks before it stay imported
+        """
+        model: Optional[str] = None
+        chunk: List[Line] = []
+        try:
+            for number, text in enumerate(lines, start=1):
+                if not text.strip():
+                    continue
+                record = _parse(number, text)
+                if record["model"] != model or len(chunk) >= self.chunk_size:
+                    self._apply(model, chunk)
+                    model, chunk = record["model"], []
+                chunk.append((number, record))
+            self._apply(model, chunk)
+        finally:
+            bump_namespace(
+                NAMESPACE_CATEGORIES,
+                NAMESPACE_DIFFICULTIES,
+                NAMESPACE_LANGUAGES,
+                NAMESPACE_TASKS,
+                NAMESPACE_SOLUTIONS,
+            )
+            registry.invalidate()
+        logger.info(f"Catalog imported: {dict(self.created)}")
+        return self.created
+
+    def _apply(self, model: Optional[str], chunk: List[Line]) -> None:
+        if not chunk:
+            return
+        handlers = {
+            USER: self.import_users,
+            TASK: self.import_tasks,
+            SOLUTION: self.import_solutions,
+        }
+        with transaction.atomic():
+            if model in REFERENCE_MODELS:
+                self.import_references(REFERENCE_MODELS[model], model, chunk)
+            else:
+                handlers[model](chunk)
+
+    def import_references(
+        self, reference: type, model: str, chunk: List[Line]
+    ) -> None:
+        existing = set(
+            reference.objects.filter(
+                name__in=[record["name"] for _, record in chunk]
+            ).values_list("name", flat=True)
+        )
+        objects = []
+        for number, record in chunk:
+            if record["name"] in existing:
+                self.skipped[model] += 1
+                continue
+            existing.add(record["name"])
+            objects.append(
+                reference(
+                    name=record["name"], **_pick(record, "description")
+                )
+            )
+        reference.objects.bulk_create(objects)
+        self._reference_ids.pop(reference, None)
+        self.created[model] += len(objects)
+
+    def import_users(self, chunk: List[Line]) -> None:
+        existing = set(
+            User.objects.filter(
+                username__in=[record["username"] for _, record in chunk]
+            ).values_list("username", flat=True)
+        )
+        users = []
+        for number, record in chunk:
+            if record["username"] in existing:
+                self.skipped[USER] += 1
+                continue
+            existing.add(record["username"])
+            user = User(
+                username=record["username"],
+                password=make_password(None),
+                **_pick(record, "email", "first_name", "last_name"),
+            )
+            if record.get("date_joined"):
+                user.date_joined = _datetime(number, record, "date_joined")
+            users.append(user)
+        User.objects.bulk_create(users)
+        self.created[USER] += len(users)
+
+    def import_tasks(self, chunk: List[Line]) -> None:
+        owners = self._user_ids(chunk, lambda record: [record["owner"]])
+        existing = set(
+            models.ProgrammingTask.objects.filter(
+                name__in={record["name"] for _, record in chunk},
+                added_by_id__in=owners.values(),
+            ).values_list("name", "added_by__username")
+        )
+        tasks, lines = [], []
+        for number, record in chunk:
+            key = (record["name"], record["owner"])
+            if key in existing:
+                self.skipped[TASK] += 1
+                continue
+            existing.add(key)
+            tasks.append(
+                models.ProgrammingTask(
+                    added_by_id=owners[record["owner"]],
+                    category_id=self._reference_id(
+                        number, models.Category, record["category"]
+                    ),
+                    difficulty_id=self._reference_id(
+                        number, models.Difficulty, record["difficulty"]
+                    ),
+                    name=record["name"],
+                    **_pick(record, "description", "resource", "status"),
+                )
+            )
+            lines.append((number, record))
+        models.ProgrammingTask.objects.bulk_create(tasks)
+        _restore_timestamps(models.ProgrammingTask, tasks, lines)
+        search.index_tasks([task.pk for task in tasks])
+        self.created[TASK] += len(tasks)
+
+    def import_solutions(self, chunk: List[Line]) -> None:
+        users = self._user_ids(
+            chunk,
+            lambda record: [record["user"]]
+            + [review["user"] for review in record.get("reviews", ())],
+        )
+        tasks = self._task_ids(chunk)
+        keys = [
+            (
+                _lookup(number, tasks, tuple(record["task"]), "task"),
+                users[record["user"]],
+                models.CodeBlob.digest_of(record["code"].encode("utf-8")),
+            )
+            for number, record in chunk
+        ]
+        existing = set(
+            models.Solution.objects.filter(
+                task_id__in={task_id for task_id, _, _ in keys},
+                user_id__in={user_id for _, user_id, _ in keys},
+                code_blob_id__in={digest for _, _, digest in keys},
+            ).values_list("task_id", "user_id", "code_blob_id")
+        )
+        solutions, lines, reviews_of = [], [], []
+        for key, (number, record) in zip(keys, chunk):
+            if key in existing:
+                self.skipped[SOLUTION] += 1
+                continue
+            existing.add(key)
+            reviews = _unique_reviews(record.get("reviews", ()))
+            self.skipped[REVIEW] += len(record.get("reviews", ())) - len(
+                reviews
+            )
+            counters = Counter(review["review_type"] for review in reviews)
+            solutions.append(
+                models.Solution(
+                    task_id=key[0],
+                    user_id=key[1],
+                    language_id=self._reference_id(
+                        number, models.ProgrammingLanguage, record["language"]
+                    ),
+                    published_at=_datetime(number, record, "published_at"),
+                    **{
+                        field: counters[review_type]
+                        for review_type, field in (
+                            services.REVIEW_COUNTER_FIELDS.items()
+                        )
+                    },
+                    code=record["code"],
+                    **_pick(record, "explanation", "is_public"),
+                )
+            )
+            lines.append((number, record))
+            reviews_of.append(reviews)
+        models.Solution.objects.bulk_create(solutions)
+        _restore_timestamps(models.Solution, solutions, lines)
+
+        reviews, review_lines = [], []
+        for solution, (number, _), records in zip(
+            solutions, lines, reviews_of
+        ):
+            for review in records:
+                reviews.append(
+                    models.Review(
+                        solution_id=solution.pk,
+                        added_by_id=users[review["user"]],
+                        review_type=review["review_type"],
+                    )
+                )
+                review_lines.append((number, review))
+        models.Review.objects.bulk_create(reviews)
+        _restore_timestamps(models.Review, reviews, review_lines)
+
+        ids = [solution.pk for solution in solutions]
+        search.index_solutions(ids)
+        search.index_code(ids)
+        self.created[SOLUTION] += len(solutions)
+        self.created[REVIEW] += len(reviews)
+
+    def _reference_id(self, line: int, reference: type, name: str) -> int:
+        if reference not in self._reference_ids:
+            self._reference_ids[reference] = dict(
+                reference.objects.values_list("name", "id")
+            )
+        return _lookup(
+            line, self._reference_ids[reference], name, reference.__name__
+        )
+
+    def _user_ids(self, chunk: List[Line], usernames) -> Dict[str, int]:
+        wanted = {
+            username for _, record in chunk for username in usernames(record)
+        }
+        found = dict(
+            User.objects.filter(username__in=wanted).values_list(
+                "username", "id"
+            )
+        )
+        for number, record in chunk:
+            for username in usernames(record):
+                _lookup(number, found, username, "user")
+        return found
+
+    def _task_ids(self, chunk: List[Line]) -> Dict[Tuple[str, str], int]:
+        keys = {tuple(record["task"]) for _, record in chunk}
+        rows = models.ProgrammingTask.objects.filter(
+            name__in={name for name, _ in keys},
+            added_by__username__in={owner for _, owner in keys},
+        ).values_list("name", "added_by__username", "id")
+        return {
+            (name, owner): pk
+            for name, owner, pk in rows
+            if (name, owner) in keys
+        }
+
+
+def _unique_reviews(reviews: Iterable[Record]) -> List[Record]:
+    """Keep the first review of each user; reviews are unique per user."""
+    seen = set()
+    unique = []
+    for review in reviews:
+        if review["user"] not in seen:
+            seen.add(review["user"])
+            unique.append(review)
+    return unique
+
+
+def _parse(number: int, text: str) -> Record:
+    try:
+        record = json.loads(text)
+    except ValueError as exc:
+        raise CatalogImportError(number, f"invalid JSON ({exc})") from exc
+    if not isinstance(record, dict) or "model" not in record:
+        raise CatalogImportError(number, "expected an object with 'model'")
+    model = record["model"]
+    if model not in REQUIRED_FIELDS:
+        raise CatalogImportError(number, f"unknown model '{model}'")
+    _require(number, record, REQUIRED_FIELDS[model])
+    if model == SOLUTION:
+        task = record["task"]
+        if not isinstance(task, list) or len(task) != 2:
+            raise CatalogImportError(
+                number, "'task' must be [name, owner username]"
+            )
+        reviews = record.get("reviews", [])
+        if not isinstance(reviews, list):
+            raise CatalogImportError(number, "'reviews' must be a list")
+        for review in reviews:
+            _require(number, review, REVIEW_REQUIRED_FIELDS)
+    return record
+
+
+def _require(number: int, record: Any, fields: Iterable[str]) -> None:
+    if not isinstance(record, dict):
+        raise CatalogImportError(number, "expected an object")
+    for field in fields:
+        if record.get(field) is None:
+            raise CatalogImportError(number, f"missing '{field}'")
+
+
+def _pick(record: Record, *fields: str) -> Record:
+    return {field: record[field] for field in fields if field in record}
+
+
+def _datetime(number: int, record: Record, field: str):
+    value = record.get(field)
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CatalogImportError(number, f"invalid datetime in '{field}'")
+    return parsed
+
+
+def _lookup(number: int, mapping: Dict, key, what: str):
+    try:
+        return mapping[key]
+    except KeyError:
+        raise CatalogImportError(number, f"unknown {what} {key!r}") from None
+
+
+def _restore_timestamps(
+    model: type, objects: List[django_models.Model], lines: List[Line]
+) -> None:
+    """Put exported timestamps back over the ones ``auto_now`` set."""
+    fields = []
+    for name in ("created_at", "updated_at"):
+        if all(name in record for _, record in lines):
+            fields.append(name)
+    if not objects or not fields:
+        return
+    for obj, (number, record) in zip(objects, lines):
+        for name in fields:
+            setattr(obj, name, _datetime(number, record, name))
+    model.objects.bulk_update(objects, fields, batch_size=500)
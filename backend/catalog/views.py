@@ -1,60 +1,192 @@
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Prefetch
+from django.db.models.functions import Left
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.utils.http import content_disposition_header, quote_etag
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view
 from django_ratelimit.decorators import ratelimit
 from rest_framework import mixins, pagination, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
-from catalog import filters, models, serializers, services
-from common.cache_utils import CACHE_TIMEOUT_REFERENCES
-from common.mixins import StaffWritePermissionMixin
+from catalog import filters, models, search, serializers, services
+from catalog.references import registry
+from common import compression
+from common.cache_utils import (
+    CACHE_KEY_CATEGORIES,
+    CACHE_KEY_DIFFICULTIES,
+    CACHE_KEY_LANGUAGES,
+    CACHE_KEY_SOLUTION_DETAIL,
+    CACHE_KEY_SOLUTIONS,
+    CACHE_KEY_TASK_DETAIL,
+    CACHE_KEY_TASKS,
+    CACHE_TIMEOUT_REFERENCES,
+    CACHE_TIMEOUT_TASKS,
+    NAMESPACE_CATEGORIES,
+    NAMESPACE_DIFFICULTIES,
+    NAMESPACE_LANGUAGES,
+    NAMESPACE_SOLUTIONS,
+    NAMESPACE_TASKS,
+    cache_response,
+)
+from common.http import RangeNotSatisfiable, parse_range, slice_chunks
+from common.mixins import (
+    BulkCreateMixin,
+    CompiledReadMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    StaffWritePermissionMixin,
+)
+from common.pagination import CatalogPagination
 from common.permissions import IsOwnerOrReadOnly
+from common.serializers import BulkCreateResultSerializer
 
 
 class NoPagination(pagination.PageNumberPagination):
     page_size = None
 
 
-@method_decorator(cache_page(CACHE_TIMEOUT_REFERENCES), name="list")
-class CategoryViewSet(StaffWritePermissionMixin):
+def bulk_schema(serializer_class, *, upserts=False):
+    # Batches that only update existing rows answer 200.
+    codes = (200, 201) if upserts else (201,)
+    return extend_schema_view(
+        bulk=extend_schema(
+            request=serializer_class(many=True),
+            responses={code: BulkCreateResultSerializer for code in codes},
+        )
+    )
+
+
+class SearchHighlightMixin:
+    """Add match snippets of the current search to list serializers.
+
+    Snippets are computed for the rendered page only and passed to the
+    serializer as ``search_highlights`` ({kind: {pk: html}}).
+    """
+
+    filter_backends = (
+        DjangoFilterBackend,
+        filters.RankedSearchFilter,
+        OrderingFilter,
+    )
+    search_index = None
+    # Set by ``RankedSearchFilter`` when the full-text index was used
+    search_query = None
+    search_using = None
+
+    def get_serializer(self, *args, **kwargs):
+        if self.search_query and kwargs.get("many") and args:
+            objects = list(args[0])
+            context = self.get_serializer_context()
+            context["search_highlights"] = {
+                self.search_index: search.highlights(
+                    self.search_index,
+                    self.search_query,
+                    [obj.pk for obj in objects],
+                    using=self.search_using,
+                )
+            }
+            kwargs["context"] = context
+            args = (objects, *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+
+@method_decorator(
+    cache_response(
+        CACHE_KEY_CATEGORIES,
+        [NAMESPACE_CATEGORIES],
+        timeout=CACHE_TIMEOUT_REFERENCES,
+    ),
+    name="list",
+)
+class CategoryViewSet(ReplicaReadMixin, StaffWritePermissionMixin):
     queryset = models.Category.objects.all().order_by("name")
     serializer_class = serializers.CategorySerializer
     pagination_class = NoPagination
 
 
-@method_decorator(cache_page(CACHE_TIMEOUT_REFERENCES), name="list")
-class DifficultyViewSet(StaffWritePermissionMixin):
+@method_decorator(
+    cache_response(
+        CACHE_KEY_DIFFICULTIES,
+        [NAMESPACE_DIFFICULTIES],
+        timeout=CACHE_TIMEOUT_REFERENCES,
+    ),
+    name="list",
+)
+class DifficultyViewSet(ReplicaReadMixin, StaffWritePermissionMixin):
     queryset = models.Difficulty.objects.all().order_by("name")
     serializer_class = serializers.DifficultySerializer
     pagination_class = NoPagination
 
 
-@method_decorator(cache_page(CACHE_TIMEOUT_REFERENCES), name="list")
-class ProgrammingLanguageViewSet(StaffWritePermissionMixin):
+@method_decorator(
+    cache_response(
+        CACHE_KEY_LANGUAGES,
+        [NAMESPACE_LANGUAGES],
+        timeout=CACHE_TIMEOUT_REFERENCES,
+    ),
+    name="list",
+)
+class ProgrammingLanguageViewSet(
+    ReplicaReadMixin, StaffWritePermissionMixin
+):
     queryset = models.ProgrammingLanguage.objects.all().order_by("name")
     serializer_class = serializers.ProgrammingLanguageSerializer
     pagination_class = NoPagination
 
 
+@method_decorator(
+    cache_response(
+        CACHE_KEY_TASKS,
+        # ?expand= embeds category and difficulty names.
+        [NAMESPACE_TASKS, NAMESPACE_CATEGORIES, NAMESPACE_DIFFICULTIES],
+        timeout=CACHE_TIMEOUT_TASKS,
+        vary_on_user=True,
+    ),
+    name="list",
+)
+@method_decorator(
+    cache_response(
+        CACHE_KEY_TASK_DETAIL,
+        # ?expand= embeds category and difficulty names.
+        [NAMESPACE_TASKS, NAMESPACE_CATEGORIES, NAMESPACE_DIFFICULTIES],
+        timeout=CACHE_TIMEOUT_TASKS,
+        vary_on_user=True,
+    ),
+    name="retrieve",
+)
 @method_decorator(
     ratelimit(key="ip", rate="100/m", block=True), name="dispatch"
 )
-class ProgrammingTaskViewSet(viewsets.ModelViewSet):
-    queryset = models.ProgrammingTask.objects.select_related(
-        "category", "difficulty", "added_by"
-    ).all()
+@bulk_schema(serializers.ProgrammingTaskSerializer)
+class ProgrammingTaskViewSet(
+    ReplicaReadMixin,
+    CompiledReadMixin,
+    SearchHighlightMixin,
+    SparseFieldsetMixin,
+    BulkCreateMixin,
+    viewsets.ModelViewSet,
+):
+    # Joins and columns follow the selected fields (see
+    # SerializerQueryMixin).
+    queryset = models.ProgrammingTask.objects.all()
     serializer_class = serializers.ProgrammingTaskSerializer
+    pagination_class = CatalogPagination
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     )
     filterset_class = filters.TaskFilter
     search_fields = ("name",)
+    search_index = search.TASK
     ordering_fields = ("created_at",)
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = self.select_serialized(super().get_queryset())
         action = self.action or "list"
 
         # For detail actions (update, delete), return all tasks
@@ -83,41 +215,79 @@ class ProgrammingTaskViewSet(viewsets.ModelViewSet):
         serializer.save(added_by=self.request.user)
 
 
+@method_decorator(
+    cache_response(
+        CACHE_KEY_SOLUTIONS,
+        [NAMESPACE_SOLUTIONS, NAMESPACE_LANGUAGES],
+        timeout=CACHE_TIMEOUT_TASKS,
+        vary_on_user=True,
+    ),
+    name="list",
+)
+@method_decorator(
+    cache_response(
+        CACHE_KEY_SOLUTION_DETAIL,
+        [NAMESPACE_SOLUTIONS, NAMESPACE_LANGUAGES],
+        timeout=CACHE_TIMEOUT_TASKS,
+        vary_on_user=True,
+    ),
+    name="retrieve",
+)
 @method_decorator(
     ratelimit(key="ip", rate="100/m", block=True), name="dispatch"
 )
-class SolutionViewSet(viewsets.ModelViewSet):
+@bulk_schema(serializers.SolutionSerializer)
+class SolutionViewSet(
+    ReplicaReadMixin,
+    CompiledReadMixin,
+    SearchHighlightMixin,
+    SparseFieldsetMixin,
+    BulkCreateMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = serializers.SolutionSerializer
+    pagination_class = CatalogPagination
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     )
     filterset_class = filters.SolutionFilter
     search_fields = ("task__name", "language__name", "user__username")
+    search_index = search.SOLUTION
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return serializers.SolutionSummarySerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
-        base_qs = models.Solution.objects.select_related(
-            "task", "task__category", "task__difficulty", "language", "user"
-        )
+        if self.action == "raw":
+            # Only what the response headers need; the code is streamed
+            # from its blob afterwards.
+            return self.visible(
+                models.Solution.objects.select_related("task").only(
+                    "id", "user_id", "language_id", "code_blob_id",
+                    "task__name",
+                )
+            )
 
-        # Annotate review counts
-        base_qs = base_qs.annotate(
-            positive_reviews_count=Count(
-                "reviews",
-                filter=Q(
-                    reviews__review_type=models.Review.ReviewType.POSITIVE
-                ),
-            ),
-            negative_reviews_count=Count(
-                "reviews",
-                filter=Q(
-                    reviews__review_type=models.Review.ReviewType.NEGATIVE
-                ),
-            ),
-        )
+        # Reference names come from the in-process registry; joins and
+        # columns follow the selected fields, so list pages (summaries)
+        # don't load code, explanations or task descriptions.
+        base_qs = self.select_serialized(models.Solution.objects.all())
+        if self.action == "list" and self.fieldset_includes(
+            "explanation_preview"
+        ):
+            base_qs = base_qs.annotate(
+                explanation_preview=Left(
+                    "explanation", models.EXPLANATION_PREVIEW_CHARS
+                )
+            )
 
-        # Prefetch user's review if authenticated
-        if self.request.user.is_authenticated:
+        # Prefetch user's review if authenticated and requested
+        if self.request.user.is_authenticated and self.fieldset_includes(
+            "user_review"
+        ):
             user_review_qs = models.Review.objects.filter(
                 added_by=self.request.user
             )
@@ -129,15 +299,78 @@ class SolutionViewSet(viewsets.ModelViewSet):
                 )
             )
 
+        return self.visible(base_qs)
+
+    def visible(self, queryset):
         if not self.request.user.is_authenticated:
-            return base_qs.filter(is_public=True)
-        return base_qs.filter(
-            Q(is_public=True) | Q(user=self.request.user)
-        ).distinct()
+            return queryset.filter(is_public=True)
+        # Both branches hit the same table, so no DISTINCT is needed.
+        return queryset.filter(Q(is_public=True) | Q(user=self.request.user))
 
     def perform_create(self, serializer):
         serializer.save()
 
+    @extend_schema(
+        responses={(200, "text/plain"): OpenApiTypes.STR},
+        description=(
+            "Solution code as text/plain. Supports single byte ranges "
+            "(Range, If-Range) and If-None-Match against the content hash."
+        ),
+    )
+    @action(detail=True, methods=["get"], url_path="raw")
+    def raw(self, request, pk=None):
+        solution = self.get_object()
+        etag = quote_etag(solution.code_blob_id)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        blob = models.CodeBlob.objects.only("codec", "data", "size").get(
+            pk=solution.code_blob_id
+        )
+        byte_range = None
+        if_range = request.headers.get("If-Range")
+        if if_range is None or if_range == etag:
+            try:
+                byte_range = parse_range(
+                    request.headers.get("Range"), blob.size
+                )
+            except RangeNotSatisfiable:
+                response = HttpResponse(
+                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+                )
+                response["Content-Range"] = f"bytes */{blob.size}"
+                return response
+
+        chunks = compression.iter_decompress(blob.codec, blob.data)
+        if byte_range is None:
+            response = StreamingHttpResponse(chunks)
+            response["Content-Length"] = blob.size
+        else:
+            start, stop = byte_range
+            response = StreamingHttpResponse(
+                slice_chunks(chunks, start, stop),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+            )
+            response["Content-Length"] = stop - start
+            response["Content-Range"] = (
+                f"bytes {start}-{stop - 1}/{blob.size}"
+            )
+        response["Content-Type"] = "text/plain; charset=utf-8"
+        response["Content-Disposition"] = content_disposition_header(
+            False,
+            models.code_file_name(
+                solution.task.name,
+                registry.name_of(
+                    models.ProgrammingLanguage, solution.language_id
+                ),
+            ),
+        )
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        return response
+
     @action(detail=True, methods=["post"], url_path="publish")
     def publish(self, request, pk=None):
         solution = self.get_object()
@@ -154,25 +387,29 @@ class SolutionViewSet(viewsets.ModelViewSet):
 @method_decorator(
     ratelimit(key="ip", rate="100/m", block=True), name="dispatch"
 )
+@bulk_schema(serializers.ReviewSerializer, upserts=True)
 class ReviewViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+    ReplicaReadMixin,
+    CompiledReadMixin,
+    SparseFieldsetMixin,
+    BulkCreateMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
 ):
     serializer_class = serializers.ReviewSerializer
+    pagination_class = CatalogPagination
     filterset_class = filters.ReviewFilter
 
     def get_permissions(self):
         """Allow read access without auth, require auth for create."""
-        if self.action == "create":
+        if self.action in ("create", "bulk"):
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
 
     def get_queryset(self):
-        return models.Review.objects.select_related(
-            "solution",
-            "solution__task",
-            "solution__language",
-            "added_by",
-        ).all()
+        # Solutions are rendered as ids unless expanded.
+        return self.select_serialized(models.Review.objects.all())
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "common"
+
+    def ready(self):
+        """Install query instrumentation on every new connection."""
+        from common import middleware, slow_queries
+
+        connection_created.connect(
+            middleware.install, dispatch_uid="middleware.install"
+        )
+        connection_created.connect(
+            slow_queries.install, dispatch_uid="slow_queries.install"
+        )
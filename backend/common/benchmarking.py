@@ -0,0 +1,315 @@
+"""Endpoint benchmarks: measurement, JSON baselines and regression reports.
+
+A benchmark issues real requests through the test client, so routing,
+middleware, permissions, querysets and serializers are all covered. Each
+scenario is measured in two passes: one request under
+``CaptureQueriesContext`` for the query count and response size, then,
+after a few warm-up requests, timed requests without it, since capturing
+queries slows the cursor.
+
+Query counts and sizes are deterministic for a given dataset and are
+compared exactly (sizes within ``BYTES_TOLERANCE``); median latencies
+are compared with a relative tolerance and an absolute floor, so noise
+on sub-millisecond endpoints isn't reported.
+
+``load`` measures a running server instead: it keeps a number of
+requests in flight over HTTP, to compare how much concurrency a worker
+process sustains (``bench_concurrency`` command).
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import math
+import os
+import platform
+import statistics
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+Results = Dict[str, Dict[str, Any]]
+
+BASELINE_VERSION = 1
+# Tail percentiles of a few dozen requests are too noisy to gate on.
+LATENCY_METRICS = ("p50_ms",)
+WARMUP_REQUESTS = 3
+BYTES_TOLERANCE = 0.01
+LATENCY_FLOOR_MS = 0.5
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One request to benchmark."""
+
+    name: str
+    path: str
+    method: str = "get"
+    data: Optional[Dict[str, Any]] = None
+    user: Any = None
+    expected_status: int = 200
+    # Overrides the run's iteration count, e.g. for password hashing.
+    iterations: Optional[int] = None
+    extra: Dict[str, str] = field(default_factory=dict)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _request(client, scenario: Scenario):
+    handler = getattr(client, scenario.method)
+    kwargs = dict(scenario.extra)
+    if scenario.data is not None:
+        kwargs["data"] = scenario.data
+        if scenario.method != "get":
+            kwargs["format"] = "json"
+    response = handler(scenario.path, **kwargs)
+    if response.status_code != scenario.expected_status:
+        raise AssertionError(
+            f"{scenario.name}: {scenario.method.upper()} {scenario.path} "
+            f"returned {response.status_code}"
+        )
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+        return response, size
+    return response, len(response.content)
+
+
+def measure(client, scenario: Scenario, *, iterations: int) -> Dict[str, Any]:
+    """Run ``scenario`` and summarize queries, size and latency."""
+    client.force_authenticate(scenario.user)
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            _, size = _request(client, scenario)
+        # Read now: every request clears the log the context slices.
+        query_count = len(queries)
+        for _ in range(WARMUP_REQUESTS):
+            _request(client, scenario)
+        samples = []
+        iterations = scenario.iterations or iterations
+        for _ in range(iterations):
+            started = time.perf_counter()
+            _request(client, scenario)
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        client.force_authenticate(None)
+    return {
+        "queries": query_count,
+        "bytes": size,
+        "p50_ms": round(percentile(samples, 0.5), 3),
+        "p90_ms": round(percentile(samples, 0.9), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "iterations": iterations,
+    }
+
+
+def environment() -> Dict[str, str]:
+    """Describe where results were recorded; latencies depend on it."""
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.node(),
+    }
+
+
+def save_baseline(path: str, results: Results, dataset: Dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as out:
+        json.dump(
+            {
+                "version": BASELINE_VERSION,
+                "dataset": dataset,
+                "environment": environment(),
+                "results": results,
+            },
+            out,
+            indent=2,
+            sort_keys=True,
+        )
+        out.write("\n")
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """Read a baseline, or None if there is none."""
+    try:
+        with open(path, encoding="utf-8") as baseline:
+            data = json.load(baseline)
+    except FileNotFoundError:
+        return None
+    if data.get("version") != BASELINE_VERSION:
+        return None
+    return data
+
+
+def compare(
+    baseline: Results, current: Results, *, tolerance: float
+) -> List[str]:
+    """List regressions of ``current`` against ``baseline``.
+
+    Args:
+        baseline: Results of the baseline run
+        current: Results of this run
+        tolerance: Allowed relative latency increase, e.g. 0.25
+
+    Returns:
+        One human-readable line per regressed metric
+    """
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{name}: queries {before['queries']} -> {result['queries']}"
+            )
+        if result["bytes"] > before["bytes"] * (1 + BYTES_TOLERANCE):
+            regressions.append(
+                f"{name}: bytes {before['bytes']} -> {result['bytes']}"
+            )
+        for metric in LATENCY_METRICS:
+            old, new = before[metric], result[metric]
+            if new > old * (1 + tolerance) and new - old > LATENCY_FLOOR_MS:
+                regressions.append(
+                    f"{name}: {metric} {old:.2f} -> {new:.2f} "
+                    f"({_change(old, new)})"
+                )
+    return regressions
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "new" if new else "="
+    return f"{(new - old) / old:+.0%}"
+
+
+def format_report(current: Results, baseline: Optional[Results]) -> str:
+    """Render results as a table, with changes against ``baseline``."""
+    baseline = baseline or {}
+    width = max(len(name) for name in current)
+    lines = [
+        f"{'scenario':<{width}}  {'p50 ms':>16}  {'p90 ms':>16}  "
+        f"{'p99 ms':>8}  {'queries':>9}  {'bytes':>16}"
+    ]
+    for name, result in current.items():
+        before = baseline.get(name, {})
+        cells = []
+        for metric, cell_width in (("p50_ms", 16), ("p90_ms", 16)):
+            cell = f"{result[metric]:.2f}"
+            if metric in before:
+                cell += f" ({_change(before[metric], result[metric])})"
+            cells.append(f"{cell:>{cell_width}}")
+        cells.append(f"{result['p99_ms']:>8.2f}")
+        queries = str(result["queries"])
+        if "queries" in before and before["queries"] != result["queries"]:
+            queries += f" ({result['queries'] - before['queries']:+d})"
+        cells.append(f"{queries:>9}")
+        size = str(result["bytes"])
+        if "bytes" in before:
+            size += f" ({_change(before['bytes'], result['bytes'])})"
+        cells.append(f"{size:>16}")
+        lines.append(f"{name:<{width}}  " + "  ".join(cells))
+    return "\n".join(lines)
+
+
+def load(
+    url: str,
+    *,
+    concurrency: int,
+    duration: float,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Keep ``concurrency`` GET requests to ``url`` in flight.
+
+    Every client thread sends its next request as soon as the previous
+    one is answered, over one keep-alive connection, for ``duration``
+    seconds. Run it from another machine than the server, or at least
+    mind that the client threads take CPU time from it.
+
+    Returns:
+        Request count, throughput, latency percentiles, statuses and
+        connection errors by type
+    """
+    parts = urlsplit(url)
+    target = parts.path or "/"
+    if parts.query:
+        target += f"?{parts.query}"
+    connection_class = (
+        http.client.HTTPSConnection
+        if parts.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    lock = threading.Lock()
+    samples: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+
+    def client(deadline: float) -> None:
+        conn = None
+        latencies, codes, failures = [], Counter(), Counter()
+        while time.perf_counter() < deadline:
+            if conn is None:
+                conn = connection_class(parts.netloc, timeout=30)
+            started = time.perf_counter()
+            try:
+                conn.request("GET", target, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                failures[type(e).__name__] += 1
+                conn.close()
+                conn = None
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            codes[response.status] += 1
+            if response.will_close:
+                conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+        with lock:
+            samples.extend(latencies)
+            statuses.update(codes)
+            errors.update(failures)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(started + duration,))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "requests_per_second": round(len(samples) / elapsed, 1),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "errors": dict(errors),
+    }
+    if samples:
+        result.update(
+            p50_ms=round(percentile(samples, 0.5), 3),
+            p90_ms=round(percentile(samples, 0.9), 3),
+            p99_ms=round(percentile(samples, 0.99), 3),
+        )
+    return result
@@ -1,13 +1,31 @@
-"""Caching utilities for the application."""
+"""Caching utilities for the application.
 
+Cached entries are grouped into namespaces. Every namespace has a version
+counter stored in the cache and every key embeds the current version of
+the namespaces it depends on, so invalidating a namespace is a single
+INCR: readers move on to fresh keys and stale entries simply expire.
+"""
+
+import hashlib
 import logging
-from typing import Any, Callable
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable
+
 from django.core.cache import cache
-from django.views.decorators.cache import cache_page
+from django.db import transaction
+from rest_framework.response import Response
+
+from common import metrics, timing
 
 logger = logging.getLogger(__name__)
 
 
+def _count_lookups(helper: str, gets: int, hits: int) -> None:
+    timing.count("cache_gets", gets)
+    timing.count("cache_hits", hits)
+    metrics.count_cache(helper, hits, gets - hits)
+
+
 def get_or_set_cache(
     key: str, func: Callable, timeout: int = 300, *args, **kwargs
 ) -> Any:
@@ -21,25 +39,18 @@ def get_or_set_cache(
     Returns:
         Cached or computed value
     """
-    value = cache.get(key)
-    if value is None:
-        value = func(*args, **kwargs)
+    with timing.span("cache"):
+        value = cache.get(key)
+    _count_lookups("get_or_set", 1, int(value is not None))
+    if value is not None:
+        return value
+    value = func(*args, **kwargs)
+    with timing.span("cache"):
         cache.set(key, value, timeout)
+    timing.count("cache_sets")
     return value
 
 
-def cache_view(timeout: int = 300):
-    """Decorator to cache view results.
-
-    Args:
-        timeout: Cache timeout in seconds
-
-    Returns:
-        Decorated view
-    """
-    return cache_page(timeout)
-
-
 # Cache timeout constants
 CACHE_TIMEOUT_REFERENCES = (
     3600  # 1 hour for categories, difficulties, languages
@@ -51,108 +62,188 @@ CACHE_TIMEOUT_SHORT = 60  # 1 minute for frequently changing data
 CACHE_KEY_CATEGORIES = "categories:all"
 CACHE_KEY_DIFFICULTIES = "difficulties:all"
 CACHE_KEY_LANGUAGES = "languages:all"
-CACHE_KEY_TASKS = "tasks:list:{}"  # {} for filter hash
-CACHE_KEY_TASK_DETAIL = "task:detail:{}"  # {} for task id
+CACHE_KEY_TASKS = "tasks:list"
+CACHE_KEY_TASK_DETAIL = "tasks:detail"
+CACHE_KEY_SOLUTIONS = "solutions:list"
+CACHE_KEY_SOLUTION_DETAIL = "solutions:detail"
+
+# Cache namespaces and the key holding each namespace's version
+NAMESPACE_CATEGORIES = "categories"
+NAMESPACE_DIFFICULTIES = "difficulties"
+NAMESPACE_LANGUAGES = "languages"
+NAMESPACE_TASKS = "tasks"
+NAMESPACE_SOLUTIONS = "solutions"
+CACHE_VERSION_KEY = "cache_version:{}"  # {} for namespace
 
-# Cache version keys for cache versioning
-CACHE_VERSION_CATEGORIES = "cache_version:categories"
-CACHE_VERSION_DIFFICULTIES = "cache_version:difficulties"
-CACHE_VERSION_LANGUAGES = "cache_version:languages"
-CACHE_VERSION_TASKS = "cache_version:tasks"
 
+def get_namespace_versions(*namespaces: str) -> Dict[str, int]:
+    """Fetch the current versions of namespaces in one round-trip.
 
-def invalidate_cache_pattern(pattern: str) -> None:
-    """Invalidate cache keys matching a pattern.
+    Namespaces without a stored version start at 1.
 
     Args:
-        pattern: Cache key pattern (supports wildcards with *)
+        namespaces: Namespace names
+
+    Returns:
+        Mapping of namespace to its current version
     """
+    keys = {CACHE_VERSION_KEY.format(ns): ns for ns in namespaces}
     try:
-        if hasattr(cache, "delete_pattern"):
-            deleted = cache.delete_pattern(pattern)
-            logger.info(
-                f"Invalidated cache pattern"
-                f" '{pattern}': {deleted} keys deleted"
-            )
-        elif hasattr(cache, "get_master_client"):
-            client = cache.get_master_client()
-            if hasattr(client, "keys"):
-                keys = client.keys(pattern)
-                if keys:
-                    client.delete(*keys)
-                    logger.info(
-                        f"Invalidated cache pattern"
-                        f" '{pattern}': {len(keys)} keys deleted"
-                    )
-        else:
-            logger.warning(
-                f"delete_pattern not available,"
-                f" clearing all cache for pattern '{pattern}'"
-            )
-            cache.clear()
+        with timing.span("cache"):
+            found = cache.get_many(list(keys))
     except Exception as e:
-        logger.error(f"Error invalidating cache pattern '{pattern}': {e}")
+        logger.error(f"Error reading cache versions {namespaces}: {e}")
+        found = {}
+    _count_lookups("versions", len(keys), len(found))
 
+    versions = {}
+    for key, namespace in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = 1
+            cache.add(key, version, timeout=None)
+        versions[namespace] = int(version)
+    return versions
 
-def invalidate_reference_caches() -> None:
-    """Invalidate all reference data caches
-        (categories, difficulties, languages).
 
-    This function invalidates caches by incrementing version numbers,
-    which automatically invalidates all cached views using cache_page.
+def bump_namespace(*namespaces: str) -> None:
+    """Invalidate namespaces by incrementing their versions.
+
+    Args:
+        namespaces: Namespace names
     """
-    try:
-        cache.incr(CACHE_VERSION_CATEGORIES, ignore_missing=True)
-        cache.incr(CACHE_VERSION_DIFFICULTIES, ignore_missing=True)
-        cache.incr(CACHE_VERSION_LANGUAGES, ignore_missing=True)
-
-        patterns = [
-            "codeyard:views.decorators.cache.cache_page.*categories*",
-            "codeyard:views.decorators.cache.cache_page.*difficulties*",
-            "codeyard:views.decorators.cache.cache_page.*languages*",
-        ]
-        for pattern in patterns:
-            invalidate_cache_pattern(pattern)
-
-        logger.info(
-            "Invalidated reference data caches"
-            " (categories, difficulties, languages)"
-        )
-    except Exception as e:
-        logger.error(f"Error invalidating reference caches: {e}")
+    for namespace in namespaces:
+        key = CACHE_VERSION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No stored version means readers used the implicit 1.
+            cache.add(key, 2, timeout=None)
+        except Exception as e:
+            logger.error(f"Error bumping cache namespace '{namespace}': {e}")
+            continue
+        logger.info(f"Invalidated cache namespace '{namespace}'")
+
+
+def bump_on_commit(*namespaces: str) -> None:
+    """Bump cache namespaces once the current transaction commits.
+
+    Bumping earlier would let a concurrent reader cache pre-commit data
+    under the new version.
+    """
+    transaction.on_commit(lambda: bump_namespace(*namespaces))
 
 
-def invalidate_category_cache() -> None:
-    """Invalidate category cache."""
-    try:
-        cache.incr(CACHE_VERSION_CATEGORIES, ignore_missing=True)
-        invalidate_cache_pattern(
-            "codeyard:views.decorators.cache.cache_page.*categories*"
-        )
-        logger.info("Invalidated category cache")
-    except Exception as e:
-        logger.error(f"Error invalidating category cache: {e}")
+def make_versioned_key(
+    prefix: str, namespaces: Iterable[str], *parts: Any
+) -> str:
+    """Build a cache key that embeds the versions of its namespaces.
 
+    Args:
+        prefix: Key prefix, e.g. ``CACHE_KEY_CATEGORIES``
+        namespaces: Namespaces the cached value depends on
+        parts: Extra key components
 
-def invalidate_difficulty_cache() -> None:
-    """Invalidate difficulty cache."""
-    try:
-        cache.incr(CACHE_VERSION_DIFFICULTIES, ignore_missing=True)
-        invalidate_cache_pattern(
-            "codeyard:views.decorators.cache.cache_page.*difficulties*"
-        )
-        logger.info("Invalidated difficulty cache")
-    except Exception as e:
-        logger.error(f"Error invalidating difficulty cache: {e}")
+    Returns:
+        Cache key string
+    """
+    namespaces = tuple(namespaces)
+    versions = get_namespace_versions(*namespaces)
+    stamp = ".".join(str(versions[ns]) for ns in namespaces)
+    return ":".join([prefix, f"v{stamp}", *(str(part) for part in parts)])
 
 
-def invalidate_language_cache() -> None:
-    """Invalidate language cache."""
-    try:
-        cache.incr(CACHE_VERSION_LANGUAGES, ignore_missing=True)
-        invalidate_cache_pattern(
-            "codeyard:views.decorators.cache.cache_page.*languages*"
+def request_fingerprint(request, **view_kwargs: Any) -> str:
+    """Hash the parts of a request that select a cached response.
+
+    Query parameters are normalized (sorted keys and values), so
+    ``?a=1&b=2`` and ``?b=2&a=1`` share an entry.
+
+    Args:
+        request: Incoming request
+        view_kwargs: URL kwargs of the view, e.g. ``pk``
+
+    Returns:
+        Hex digest identifying the request
+    """
+    params = sorted(
+        (key, sorted(request.GET.getlist(key))) for key in request.GET
+    )
+    raw = repr(
+        (
+            request.get_host(),
+            request.path,
+            params,
+            sorted(view_kwargs.items()),
         )
-        logger.info("Invalidated language cache")
-    except Exception as e:
-        logger.error(f"Error invalidating language cache: {e}")
+    )
+    digest = hashlib.md5(raw.encode("utf-8"), usedforsecurity=False)
+    return digest.hexdigest()
+
+
+def cache_scope(request) -> str:
+    """Return the audience a response is cached for.
+
+    Anonymous visitors share one scope; authenticated users each get their
+    own, since they also see their private objects.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return "anon"
+
+
+def cache_response(
+    key_prefix: str,
+    namespaces: Iterable[str],
+    timeout: int = CACHE_TIMEOUT_SHORT,
+    vary_on_user: bool = False,
+):
+    """Cache successful GET responses of a DRF view under versioned keys.
+
+    The serialized ``response.data`` is cached, so content negotiation
+    still happens per request. Use with ``method_decorator`` on viewset
+    actions.
+
+    Args:
+        key_prefix: Key prefix for the cached responses
+        namespaces: Namespaces whose bump invalidates the responses
+        timeout: Cache timeout in seconds
+        vary_on_user: Keep separate entries per user (see ``cache_scope``)
+
+    Returns:
+        View decorator
+    """
+    namespaces = tuple(namespaces)
+
+    def key_parts(request, kwargs):
+        parts = [request_fingerprint(request, **kwargs)]
+        if vary_on_user:
+            parts.insert(0, cache_scope(request))
+        return parts
+
+    def decorator(view_func: Callable) -> Callable:
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+
+            key = make_versioned_key(
+                key_prefix, namespaces, *key_parts(request, kwargs)
+            )
+            with timing.span("cache"):
+                data = cache.get(key)
+            _count_lookups("response", 1, int(data is not None))
+            if data is not None:
+                return Response(data)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                with timing.span("cache"):
+                    cache.set(key, response.data, timeout)
+                timing.count("cache_sets")
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,286 @@
+"""Compiled representations for read-only serializer output.
+
+For every row and every field, DRF's ``Serializer.to_representation``
+calls the field's ``get_attribute`` (a generic lookup handling mappings,
+callables, ``ObjectDoesNotExist`` and missing attributes), checks the
+result for ``None`` and calls the field's ``to_representation``.
+``compile_representation`` does that dispatch once per serializer
+instead: each readable field of the bound serializer (fieldset,
+expansions and context already applied) becomes a ``(name, getter,
+convert)`` step, and the serializer's ``to_representation`` is replaced
+by a loop over the steps.
+
+Steps are specialised only where the field uses DRF's own
+implementation, so the output is the same by construction:
+
+- model columns are read with ``operator.attrgetter``, primary key
+  relations from their ``<fk>_id`` column, ``source="*"`` is the row
+- int, str, bool, choice, datetime and method fields convert directly
+- nested serializers are compiled in turn
+
+Anything else (custom fields, dotted sources, properties, annotations,
+serializers overriding ``to_representation``) keeps calling its own
+``get_attribute`` and ``to_representation``. Values are built from
+model instances rather than ``values()`` rows, so views keep their
+prefetches, ``only()`` columns and model properties.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from rest_framework import fields, relations, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+from common import timing
+from common.serializers import DynamicFieldsMixin
+
+Getter = Callable[[Any], Any]
+Converter = Callable[[Any], Any]
+Step = Tuple[str, Getter, Converter]
+
+# Returned by getters of fields DRF would leave out (``SkipField``).
+_SKIP = object()
+
+# to_representation implementations that only walk the fields.
+PLAIN_REPRESENTATIONS = {
+    serializers.Serializer.to_representation,
+    DynamicFieldsMixin.to_representation,
+}
+
+
+def _identity(value):
+    return value
+
+
+class CompiledSerializer:
+    """Representation of a serializer's fields as precomputed steps."""
+
+    def __init__(self, steps: List[Step]):
+        self.steps = steps
+
+    def to_representation(self, instance) -> Dict[str, Any]:
+        row = {}
+        for name, getter, convert in self.steps:
+            value = getter(instance)
+            if value is None:
+                row[name] = None
+            elif value is not _SKIP:
+                row[name] = convert(value)
+        return row
+
+    def many(self, data) -> List[Dict[str, Any]]:
+        # Like ListSerializer, nested relations may pass a manager.
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        to_representation = self.to_representation
+        return [to_representation(instance) for instance in data]
+
+
+def compile_serializer(
+    serializer: serializers.BaseSerializer,
+) -> Optional[CompiledSerializer]:
+    """Compile a bound serializer (or the child of a list serializer).
+
+    Returns None when the serializer has its own ``to_representation``.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if type(serializer).to_representation not in PLAIN_REPRESENTATIONS:
+        return None
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    return CompiledSerializer(
+        [
+            (field.field_name, *_compile_field(field, model))
+            for field in serializer._readable_fields
+        ]
+    )
+
+
+def compile_representation(serializer: serializers.BaseSerializer) -> bool:
+    """Make ``serializer.data`` use a compiled representation.
+
+    Returns whether the serializer could be compiled. Time spent
+    rendering is still reported as the ``serialize`` timing.
+    """
+    compiled = compile_serializer(serializer)
+    if compiled is None:
+        return False
+    if isinstance(serializer, serializers.ListSerializer):
+        represent = compiled.many
+    else:
+        represent = compiled.to_representation
+
+    def to_representation(data):
+        if timing.current() is None:
+            return represent(data)
+        with timing.span("serialize"):
+            return represent(data)
+
+    serializer.to_representation = to_representation
+    return True
+
+
+def _compile_field(field, model) -> Tuple[Getter, Converter]:
+    if isinstance(field, serializers.BaseSerializer):
+        nested = None
+        if not isinstance(field, serializers.ListSerializer):
+            nested = compile_serializer(field)
+        if nested is None:
+            return _field_getter(field), field.to_representation
+        getter = _source_getter(field, model) or _field_getter(field)
+        return getter, nested.to_representation
+
+    getter = _primary_key_getter(field, model)
+    if getter is not None:
+        if field.pk_field is None:
+            return getter, _identity
+        return getter, field.pk_field.to_representation
+
+    getter = _source_getter(field, model) or _field_getter(field)
+    converter = CONVERTERS.get(type(field).to_representation)
+    if converter is None:
+        return getter, field.to_representation
+    return getter, converter(field)
+
+
+def _model_field(model, name: str):
+    if model is None:
+        return None
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return model_field if model_field.concrete else None
+
+
+def _source_getter(field, model) -> Optional[Getter]:
+    """Getter for a row, or a model column or forward relation of it."""
+    get_attribute = type(field).get_attribute
+    if get_attribute is relations.RelatedField.get_attribute:
+        if field.use_pk_only_optimization():
+            return None
+    elif get_attribute is not fields.Field.get_attribute:
+        return None
+    if not field.source_attrs:
+        return _identity
+    if len(field.source_attrs) != 1:
+        return None
+    name = field.source_attrs[0]
+    model_field = _model_field(model, name)
+    if model_field is None:
+        return None
+    # get_field() also finds foreign keys by their "<fk>_id" column.
+    if model_field.is_relation and name == model_field.name:
+        return _relation_getter(name)
+    return attrgetter(name)
+
+
+def _primary_key_getter(field, model) -> Optional[Getter]:
+    """Read the ``<fk>_id`` column of primary key relations."""
+    if (
+        type(field).get_attribute is not relations.RelatedField.get_attribute
+        or type(field).to_representation
+        is not relations.PrimaryKeyRelatedField.to_representation
+        or len(field.source_attrs) != 1
+    ):
+        return None
+    model_field = _model_field(model, field.source_attrs[0])
+    if model_field is None or not model_field.is_relation:
+        return None
+    return attrgetter(model_field.attname)
+
+
+def _relation_getter(name: str) -> Getter:
+    def getter(instance):
+        try:
+            return getattr(instance, name)
+        except ObjectDoesNotExist:
+            return None
+
+    return getter
+
+
+def _field_getter(field) -> Getter:
+    """The field's own ``get_attribute``, with DRF's None/skip handling."""
+    get_attribute = field.get_attribute
+
+    def getter(instance):
+        try:
+            attribute = get_attribute(instance)
+        except SkipField:
+            return _SKIP
+        if isinstance(attribute, PKOnlyObject) and attribute.pk is None:
+            return None
+        return attribute
+
+    return getter
+
+
+def _boolean(field) -> Converter:
+    fallback = field.to_representation
+
+    def convert(value):
+        if value is True or value is False:
+            return value
+        return fallback(value)
+
+    return convert
+
+
+def _choice(field) -> Converter:
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == "":
+            return value
+        return choices.get(str(value), value)
+
+    return convert
+
+
+def _datetime(field) -> Converter:
+    fallback = field.to_representation
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != fields.ISO_8601:
+        return fallback
+    field_timezone = (
+        field.timezone
+        if hasattr(field, "timezone")
+        else field.default_timezone()
+    )
+    if field_timezone is None:
+        return fallback
+
+    def convert(value):
+        if type(value) is not datetime or value.tzinfo is None:
+            return fallback(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            return value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _method(field) -> Converter:
+    return getattr(field.parent, field.method_name)
+
+
+# Field.to_representation implementation -> converter factory
+CONVERTERS: Dict[Callable, Callable[[Any], Converter]] = {
+    fields.IntegerField.to_representation: lambda field: int,
+    fields.CharField.to_representation: lambda field: str,
+    fields.BooleanField.to_representation: _boolean,
+    fields.ChoiceField.to_representation: _choice,
+    fields.DateTimeField.to_representation: _datetime,
+    fields.ReadOnlyField.to_representation: lambda field: _identity,
+    fields.SerializerMethodField.to_representation: _method,
+    relations.StringRelatedField.to_representation: lambda field: str,
+}
@@ -0,0 +1,103 @@
+"""Compression helpers for stored blobs.
+
+zstd is used when the optional ``zstandard`` package is installed,
+zlib otherwise. Payloads that don't shrink are stored as-is. The codec
+name is stored next to each payload, so blobs written with either codec
+stay readable as long as their codec is available.
+"""
+
+import io
+import zlib
+from typing import Iterator, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+CODEC_RAW = "raw"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+CHUNK_SIZE = 64 * 1024
+
+
+def default_codec() -> str:
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def compress(data: bytes, codec: Optional[str] = None) -> Tuple[str, bytes]:
+    """Compress ``data``.
+
+    Args:
+        data: Raw bytes
+        codec: Codec to use, ``default_codec()`` when omitted
+
+    Returns:
+        Tuple of the codec actually used and the payload
+    """
+    codec = codec or default_codec()
+    if codec == CODEC_ZSTD:
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif codec == CODEC_ZLIB:
+        payload = zlib.compress(data, ZLIB_LEVEL)
+    else:
+        return CODEC_RAW, data
+    if len(payload) >= len(data):
+        return CODEC_RAW, data
+    return codec, payload
+
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    """Reverse ``compress``.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed
+    """
+    payload = bytes(payload)
+    if codec == CODEC_RAW:
+        return payload
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd blob found but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown codec '{codec}'")
+
+
+def iter_decompress(
+    codec: str, payload: bytes, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Like ``decompress``, but yield the output in chunks.
+
+    Only the compressed payload and one chunk are held at a time.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed
+    """
+    payload = memoryview(payload)
+    if codec == CODEC_RAW:
+        for start in range(0, len(payload), chunk_size):
+            yield bytes(payload[start:start + chunk_size])
+    elif codec == CODEC_ZLIB:
+        decompressor = zlib.decompressobj()
+        pending = payload
+        while pending:
+            chunk = decompressor.decompress(pending, chunk_size)
+            pending = decompressor.unconsumed_tail
+            if chunk:
+                yield chunk
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+    elif codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd blob found but zstandard is not installed")
+        yield from zstandard.ZstdDecompressor().read_to_iter(
+            io.BytesIO(payload), write_size=chunk_size
+        )
+    else:
+        raise ValueError(f"Unknown codec '{codec}'")
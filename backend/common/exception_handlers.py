@@ -64,7 +64,8 @@ def custom_exception_handler(exc, context):
                 "status_code": response.status_code,
             }
 
-            if isinstance(response.data, dict):
+            # Lists carry per-item errors of batch requests.
+            if isinstance(response.data, (dict, list)):
                 error_data["detail"] = response.data
             else:
                 error_data["detail"] = str(response.data)
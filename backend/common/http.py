@@ -0,0 +1,62 @@
+"""HTTP helpers for streamed downloads with ``Range`` support."""
+
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range starts past the end of the content."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range ``Range`` header.
+
+    Multiple ranges and malformed headers are ignored, which RFC 9110
+    allows: the full content is sent instead.
+
+    Args:
+        header: Value of the ``Range`` header, if any
+        size: Length of the content in bytes
+
+    Returns:
+        ``(start, stop)`` with ``stop`` exclusive, or None for the full
+        content
+
+    Raises:
+        RangeNotSatisfiable: If the range selects no bytes
+    """
+    match = BYTE_RANGE_RE.match((header or "").replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the final ``last`` bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size
+    start = int(first)
+    stop = size if not last else min(int(last) + 1, size)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, stop
+
+
+def slice_chunks(
+    chunks: Iterable[bytes], start: int, stop: int
+) -> Iterator[bytes]:
+    """Yield bytes ``start:stop`` of a chunked stream without joining it."""
+    offset = 0
+    for chunk in chunks:
+        end = offset + len(chunk)
+        if end > start:
+            yield chunk[max(start - offset, 0):stop - offset]
+        if end >= stop:
+            return
+        offset = end
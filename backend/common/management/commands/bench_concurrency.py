@@ -0,0 +1,94 @@
+"""Measure how many concurrent requests a running server sustains."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common import benchmarking
+
+
+class Command(BaseCommand):
+    """Management command wrapping ``common.benchmarking.load``."""
+
+    help = (
+        "Keep N GET requests to a URL in flight and report throughput "
+        "and latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url", help="URL to request, e.g. http://localhost:8000/api/tasks/"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 8, 32, 64],
+            help="Requests in flight; several values run one after the "
+            "other (default 1 8 32 64)",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds per concurrency level (default 10)",
+        )
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            help="Extra request header, 'Name: value' (repeatable)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as JSON",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the benchmark."""
+        if "://" not in options["url"]:
+            raise CommandError("The URL must be absolute (http://...)")
+        headers = {}
+        for header in options["header"]:
+            name, sep, value = header.partition(":")
+            if not sep:
+                raise CommandError(f"Invalid header: {header!r}")
+            headers[name.strip()] = value.strip()
+
+        results = []
+        for concurrency in options["concurrency"]:
+            result = benchmarking.load(
+                options["url"],
+                concurrency=concurrency,
+                duration=options["duration"],
+                headers=headers,
+            )
+            results.append(result)
+            if not options["json"]:
+                self.stdout.write(self.format(result))
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+
+    @staticmethod
+    def format(result):
+        line = (
+            f"concurrency {result['concurrency']:>4}: "
+            f"{result['requests_per_second']:>8.1f} req/s"
+        )
+        if result["requests"]:
+            line += (
+                f"  p50 {result['p50_ms']:.1f}ms"
+                f"  p90 {result['p90_ms']:.1f}ms"
+                f"  p99 {result['p99_ms']:.1f}ms"
+            )
+        statuses = " ".join(
+            f"{code}x{n}" for code, n in result["statuses"].items()
+        )
+        line += f"  status {statuses or '-'}"
+        if result["errors"]:
+            errors = " ".join(
+                f"{name}x{n}" for name, n in result["errors"].items()
+            )
+            line += f"  errors {errors}"
+        return line
@@ -0,0 +1,61 @@
+"""Show or clear the slow query log."""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from common import slow_queries
+
+
+class Command(BaseCommand):
+    """Management command reading ``common.slow_queries``."""
+
+    help = "Show the slowest recent queries with their plans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of entries to show, newest first (default 20)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the entries as JSON",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Empty the log",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the report."""
+        if options["clear"]:
+            slow_queries.clear()
+            self.stdout.write(self.style.SUCCESS("✓ Slow query log cleared"))
+            return
+
+        entries = slow_queries.recent(limit=options["limit"])
+        if options["json"]:
+            self.stdout.write(json.dumps(entries, indent=2))
+            return
+        if not entries:
+            self.stdout.write("No slow queries recorded")
+            return
+        for entry in entries:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"#{entry['id']} {entry['at']} {entry['duration_ms']}ms "
+                    f"{entry['view']}.{entry['action']} {entry['path']}"
+                )
+            )
+            self.stdout.write(entry["sql"])
+            self.stdout.write(f"Params: {entry['params']}")
+            for frame in entry["stack"]:
+                self.stdout.write(f"  at {frame}")
+            if entry["plan"]:
+                label = "EXPLAIN ANALYZE" if entry["analyzed"] else "EXPLAIN"
+                self.stdout.write(f"{label}:\n{entry['plan']}")
+            self.stdout.write("")
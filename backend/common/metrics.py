@@ -0,0 +1,192 @@
+"""Prometheus metrics of the API, served by ``common.views.MetricsView``.
+
+Gunicorn runs several worker processes, each with its own counters. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (``entrypoint.sh`` does), every
+worker writes its samples to memory-mapped files in that directory and
+the endpoint aggregates the files of all workers, so any worker answers
+for the whole server. ``gunicorn.conf.py`` removes the live gauges of
+workers that exit. Without the variable (``runserver``, tests) the
+metrics of the current process are served.
+"""
+
+from __future__ import annotations
+
+import os
+import resource
+from typing import Tuple
+
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUESTS = Counter(
+    "codeyard_http_requests_total",
+    "HTTP requests by view, action, method and status.",
+    ["view", "action", "method", "status"],
+)
+LATENCY = Histogram(
+    "codeyard_http_request_duration_seconds",
+    "Time spent below the metrics middleware.",
+    ["view", "action"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "codeyard_http_response_size_bytes",
+    "Response body size, for responses that aren't streamed.",
+    ["view", "action"],
+    buckets=SIZE_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "codeyard_db_queries_per_request",
+    "Database queries run by one request.",
+    ["view", "action"],
+    buckets=QUERY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "codeyard_cache_requests_total",
+    "Lookups of the common.cache_utils helpers by result.",
+    ["helper", "result"],
+)
+RATELIMITED = Counter(
+    "codeyard_ratelimit_rejections_total",
+    "Requests rejected by django_ratelimit.",
+    ["view"],
+)
+IN_PROGRESS = Gauge(
+    "codeyard_http_requests_in_progress",
+    "Requests being handled by live workers.",
+    multiprocess_mode="livesum",
+)
+WORKERS = Gauge(
+    "codeyard_workers",
+    "Live worker processes.",
+    multiprocess_mode="livesum",
+)
+WORKER_STARTED = Gauge(
+    "codeyard_worker_start_time_seconds",
+    "Start time of each live worker, since the epoch.",
+    multiprocess_mode="liveall",
+)
+WORKER_MAX_RSS = Gauge(
+    "codeyard_worker_max_rss_bytes",
+    "Peak resident memory of each live worker.",
+    multiprocess_mode="liveall",
+)
+
+DB_POOL_CHECKOUTS = Counter(
+    "codeyard_db_pool_checkouts_total",
+    "Connections requested from the psycopg pool.",
+    ["database"],
+)
+DB_POOL_WAITS = Counter(
+    "codeyard_db_pool_waits_total",
+    "Checkouts that had to wait for a free connection.",
+    ["database"],
+)
+DB_POOL_WAIT_SECONDS = Counter(
+    "codeyard_db_pool_wait_seconds_total",
+    "Time spent waiting for a free connection.",
+    ["database"],
+)
+DB_POOL_TIMEOUTS = Counter(
+    "codeyard_db_pool_timeouts_total",
+    "Checkouts that failed, waiting longer than the pool timeout.",
+    ["database"],
+)
+DB_POOL_CONNECTIONS = Counter(
+    "codeyard_db_pool_connections_opened_total",
+    "Connections opened by the pool.",
+    ["database"],
+)
+DB_POOL_LOST = Counter(
+    "codeyard_db_pool_connections_lost_total",
+    "Pooled connections found broken by a health check or on return.",
+    ["database"],
+)
+DB_POOL_SIZE = Gauge(
+    "codeyard_db_pool_size",
+    "Connections held by the pools of live workers.",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_AVAILABLE = Gauge(
+    "codeyard_db_pool_available",
+    "Idle connections in the pools of live workers.",
+    ["database"],
+    multiprocess_mode="livesum",
+)
+
+# psycopg_pool counters (reset by pop_stats()) and their scale.
+POOL_STATS = {
+    "requests_num": (DB_POOL_CHECKOUTS, 1),
+    "requests_queued": (DB_POOL_WAITS, 1),
+    "requests_wait_ms": (DB_POOL_WAIT_SECONDS, 0.001),
+    "requests_errors": (DB_POOL_TIMEOUTS, 1),
+    "connections_num": (DB_POOL_CONNECTIONS, 1),
+    "connections_lost": (DB_POOL_LOST, 1),
+    "returns_bad": (DB_POOL_LOST, 1),
+}
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def register_worker() -> None:
+    """Set the worker gauges; called once per process."""
+    WORKERS.set(1)
+    WORKER_STARTED.set_to_current_time()
+    update_worker()
+
+
+def update_worker() -> None:
+    # ru_maxrss is in kilobytes on Linux.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    WORKER_MAX_RSS.set(usage.ru_maxrss * 1024)
+
+
+def update_db_pools() -> None:
+    """Move the counters of this worker's connection pools to metrics."""
+    for connection in connections.all(initialized_only=True):
+        if connection.vendor != "postgresql":
+            continue
+        if not connection.settings_dict["OPTIONS"].get("pool"):
+            continue
+        alias = connection.alias
+        stats = connection.pool.pop_stats()
+        for key, (metric, scale) in POOL_STATS.items():
+            if stats.get(key):
+                metric.labels(alias).inc(stats[key] * scale)
+        DB_POOL_SIZE.labels(alias).set(stats["pool_size"])
+        DB_POOL_AVAILABLE.labels(alias).set(stats["pool_available"])
+
+
+def count_cache(helper: str, hits: int, misses: int) -> None:
+    if hits:
+        CACHE_REQUESTS.labels(helper, "hit").inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(helper, "miss").inc(misses)
+
+
+def render() -> Tuple[bytes, str]:
+    """Return the exposition of all workers and its content type."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,376 @@
+"""Request instrumentation middleware.
+
+``MetricsMiddleware`` feeds the Prometheus metrics of ``common.metrics``
+for every request: count, latency, response size and queries per view
+and action, rate-limit rejections and connection pool usage.
+
+``ReplicaMiddleware`` scopes read replica routing to one request and
+keeps users who wrote on the primary for a while (``common.replicas``).
+
+``SlowQueryMiddleware`` tags the entries of ``common.slow_queries`` with
+the view and action being served.
+
+``ServerTimingMiddleware`` measures a sample of requests
+(``SERVER_TIMING_SAMPLE_RATE``) and reports, per request:
+
+- ``total``: time spent below this middleware
+- ``view``: the view itself, up to the response being rendered
+- ``render``: rendering the response (DRF renderers, templates)
+- ``db``: time and number of queries, through ``execute_wrapper``
+- ``cache``: time, gets, hits and sets of ``common.cache_utils``
+- ``serialize``: ``to_representation`` of ``DynamicFieldsMixin``
+  serializers
+
+They are logged as one ``key=value`` line tagged with the view class and
+action, and sent as a ``Server-Timing`` header when
+``SERVER_TIMING_HEADER`` is set. Requests that aren't sampled only pay
+for one ``random()`` call.
+
+All of them run in sync (WSGI) and async (ASGI) mode. Under ASGI the
+queries of a request run in worker threads, not in the thread of the
+middleware, so queries are counted by an execute wrapper installed on
+every connection (``install``) that reports to the request through
+context variables.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from types import MethodType
+from typing import Dict, Optional, Tuple
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django_ratelimit.exceptions import Ratelimited
+
+from common import metrics, replicas, slow_queries, timing
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+
+# Counter of the request measured by MetricsMiddleware.
+_query_counter: ContextVar[Optional[_QueryCounter]] = ContextVar(
+    "request_query_counter", default=None
+)
+
+
+def _record_query(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+    timings = timing.current()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.durations["db"] += time.perf_counter() - started
+        timings.counts["queries"] += 1
+
+
+def install(connection, **kwargs) -> None:
+    """``connection_created`` receiver adding ``_record_query`` once."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def view_label(view_func, method: str) -> Tuple[str, str]:
+    """Return view and action names, e.g. ``SolutionViewSet``, ``list``."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        view_class = getattr(view_func, "view_class", None)
+    name = (
+        view_class.__name__
+        if view_class is not None
+        else getattr(view_func, "__name__", type(view_func).__name__)
+    )
+    actions = getattr(view_func, "actions", None) or {}
+    return name, actions.get(method.lower(), method.lower())
+
+
+def _coroutine(hook):
+    @wraps(hook)
+    async def run(self, *args):
+        return hook(self, *args)
+
+    return run
+
+
+class _HybridMiddleware:
+    """Base of the middleware here: sync or async, like ``get_response``.
+
+    The hooks only do bookkeeping, so in async mode they are called in
+    the event loop rather than through a worker thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+    hooks = ("process_view", "process_template_response", "process_exception")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            for name in self.hooks:
+                hook = getattr(type(self), name, None)
+                if hook is not None:
+                    # Bound, as Django names hooks by their __self__.
+                    setattr(self, name, MethodType(_coroutine(hook), self))
+
+
+class MetricsMiddleware(_HybridMiddleware):
+    """Record Prometheus metrics of every request."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        metrics.register_worker()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = self.stop(token, started)
+        self.observe(request, response, queries, duration)
+        metrics.update_db_pools()
+        return response
+
+    async def __acall__(self, request):
+        queries, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = self.stop(token, started)
+        self.observe(request, response, queries, duration)
+        if settings.DB_POOL:
+            # Connections live in the thread the request's queries ran in.
+            await sync_to_async(metrics.update_db_pools)()
+        return response
+
+    @staticmethod
+    def start(request):
+        request.metrics_labels = ("-", "-")
+        queries = _QueryCounter()
+        token = _query_counter.set(queries)
+        metrics.IN_PROGRESS.inc()
+        return queries, token, time.perf_counter()
+
+    @staticmethod
+    def stop(token, started: float) -> float:
+        duration = time.perf_counter() - started
+        metrics.IN_PROGRESS.dec()
+        _query_counter.reset(token)
+        return duration
+
+    @staticmethod
+    def observe(request, response, queries, duration: float) -> None:
+        view, action = request.metrics_labels
+        metrics.REQUESTS.labels(
+            view, action, request.method, str(response.status_code)
+        ).inc()
+        metrics.LATENCY.labels(view, action).observe(duration)
+        metrics.DB_QUERIES.labels(view, action).observe(queries.count)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.labels(view, action).observe(
+                len(response.content)
+            )
+        metrics.update_worker()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_labels = view_label(view_func, request.method)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, Ratelimited):
+            metrics.RATELIMITED.labels(request.metrics_labels[0]).inc()
+
+
+class ReplicaMiddleware(_HybridMiddleware):
+    """Reset replica routing per request and record writes."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with replicas.request_scope() as scope:
+            response = self.get_response(request)
+        user = self.writer(request, scope)
+        if user is not None:
+            replicas.stick(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        with replicas.request_scope() as scope:
+            response = await self.get_response(request)
+        user = self.writer(request, scope)
+        if user is not None:
+            await replicas.astick(user.pk)
+        return response
+
+    @staticmethod
+    def writer(request, scope):
+        """Return the authenticated user if the request wrote."""
+        # DRF copies the user it authenticated (JWT) to the request.
+        user = getattr(request, "user", None)
+        if scope["wrote"] and user is not None and user.is_authenticated:
+            return user
+        return None
+
+
+class SlowQueryMiddleware(_HybridMiddleware):
+    """Tell the slow query log which view is being served."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = slow_queries.set_origin("-", "-", request.path)
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.reset_origin(token)
+
+    async def __acall__(self, request):
+        token = slow_queries.set_origin("-", "-", request.path)
+        try:
+            return await self.get_response(request)
+        finally:
+            slow_queries.reset_origin(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view, action = view_label(view_func, request.method)
+        slow_queries.set_origin(view, action, request.path)
+
+
+class ServerTimingMiddleware(_HybridMiddleware):
+    """Measure sampled requests; see the module docstring."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        timings = timing.RequestTimings()
+        token = timing.activate(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+        return self.report(request, response, timings, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        timings = timing.RequestTimings()
+        token = timing.activate(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.deactivate(token)
+        return self.report(request, response, timings, started)
+
+    @staticmethod
+    def sampled() -> bool:
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def report(self, request, response, timings, started: float):
+        finished = time.perf_counter()
+        metrics = self.metrics(timings, started, finished)
+        self.log(request, response, timings, metrics)
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = format_header(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = timing.current()
+        if timings is not None:
+            timings.view, timings.action = view_label(
+                view_func, request.method
+            )
+            timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view, before the response is rendered.
+        timings = timing.current()
+        if timings is not None:
+            timings.view_finished = time.perf_counter()
+        return response
+
+    @staticmethod
+    def metrics(
+        timings: timing.RequestTimings, started: float, finished: float
+    ) -> Dict[str, Dict]:
+        """Collect durations in milliseconds and counts by metric."""
+        view_started = timings.view_started or started
+        view_finished = timings.view_finished or finished
+        counts = timings.counts
+        cache_gets = counts["cache_gets"]
+        return {
+            "total": {"ms": (finished - started) * 1000},
+            "view": {"ms": (view_finished - view_started) * 1000},
+            "render": {"ms": (finished - view_finished) * 1000},
+            "db": {
+                "ms": timings.durations["db"] * 1000,
+                "queries": counts["queries"],
+            },
+            "cache": {
+                "ms": timings.durations["cache"] * 1000,
+                "gets": cache_gets,
+                "hits": counts["cache_hits"],
+                "sets": counts["cache_sets"],
+                "hit_ratio": (
+                    counts["cache_hits"] / cache_gets if cache_gets else None
+                ),
+            },
+            "serialize": {"ms": timings.durations["serialize"] * 1000},
+        }
+
+    @staticmethod
+    def log(request, response, timings, metrics) -> None:
+        fields = {
+            "view": timings.view or "-",
+            "action": timings.action or "-",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+        }
+        for name, values in metrics.items():
+            for key, value in values.items():
+                if isinstance(value, float):
+                    value = f"{value:.2f}"
+                fields[f"{name}_{key}"] = "-" if value is None else value
+        line = " ".join(f"{key}={value}" for key, value in fields.items())
+        logger.info(f"timing {line}")
+
+
+def format_header(metrics: Dict[str, Dict]) -> str:
+    """Render metrics as a ``Server-Timing`` header value."""
+    entries = []
+    for name, values in metrics.items():
+        entry = f"{name};dur={values['ms']:.2f}"
+        if name == "db":
+            entry += f';desc="{values["queries"]} queries"'
+        elif name == "cache" and values["gets"] + values["sets"]:
+            entry += (
+                f';desc="{values["gets"]} gets, {values["hits"]} hits, '
+                f'{values["sets"]} sets"'
+            )
+        entries.append(entry)
+    return ", ".join(entries)
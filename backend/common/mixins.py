@@ -1,5 +1,16 @@
-from rest_framework import permissions
+from django.conf import settings
+from rest_framework import permissions, status
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from common import replicas
+from common.compiled_serializers import compile_representation
+from common.serializers import (
+    DynamicFieldsMixin,
+    Fieldset,
+    serializer_query,
+)
 
 
 class StaffWritePermissionMixin(viewsets.ModelViewSet):
@@ -7,3 +18,157 @@ class StaffWritePermissionMixin(viewsets.ModelViewSet):
         if self.request.method in permissions.SAFE_METHODS:
             return [permissions.AllowAny()]
         return [permissions.IsAdminUser()]
+
+
+class CompiledReadMixin:
+    """Render the rows of ``compiled_actions`` with compiled serializers.
+
+    The serializer ``get_serializer`` builds for a page (fieldset,
+    expansions and context included) is compiled once per request by
+    ``common.compiled_serializers``, so rows skip DRF's per-field
+    dispatch; the output is the same. Only lists are compiled by default:
+    for a single object, compiling costs about what it saves.
+    ``COMPILED_SERIALIZERS`` turns it off.
+    """
+
+    compiled_actions = ("list",)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if (
+            settings.COMPILED_SERIALIZERS
+            and args
+            and self.action in self.compiled_actions
+        ):
+            compile_representation(serializer)
+        return serializer
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests from a read replica when one is usable.
+
+    Users who wrote recently stay on the primary (``common.replicas``).
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            replicas.route_reads(request.user)
+
+
+class SerializerQueryMixin:
+    """Load what the view's serializer renders, and nothing else.
+
+    Views call ``select_serialized`` at the end of ``get_queryset``: the
+    relations the serializer's fields read (``source="a.b"``, nested
+    serializers, related fields) are joined or prefetched, as worked out
+    by ``common.serializers.serializer_query``. Safe methods also load
+    only the columns read; writes load whole rows, which they validate
+    and save.
+    """
+
+    # Always loaded: primary key and the pagination ordering column.
+    query_base_columns = ("id", "created_at")
+
+    def get_query_serializer(self):
+        """Return an unbound serializer describing the rendered fields."""
+        if not hasattr(self, "_query_serializer"):
+            self._query_serializer = self.get_serializer_class()(
+                context=self.get_serializer_context()
+            )
+        return self._query_serializer
+
+    def select_serialized(self, queryset):
+        """Join, prefetch and load only what the serializer reads."""
+        query = serializer_query(self.get_query_serializer())
+        if query.select_related:
+            queryset = queryset.select_related(*query.select_related)
+        if query.prefetch_related:
+            queryset = queryset.prefetch_related(*query.prefetch_related)
+        columns = query.columns()
+        if (
+            self.request.method in permissions.SAFE_METHODS
+            and columns is not None
+        ):
+            # Joined relations can't be deferred.
+            roots = {path.split("__")[0] for path in query.select_related}
+            queryset = queryset.only(
+                *self.query_base_columns, *columns, *sorted(roots)
+            )
+        return queryset
+
+
+class SparseFieldsetMixin(SerializerQueryMixin):
+    """View mixin for ``?fields=``, ``?exclude=`` and ``?expand=``.
+
+    Works with serializers using ``common.serializers.DynamicFieldsMixin``
+    and applies to safe methods (writes render every field). The
+    queryset follows the selected fields (``select_serialized``); views
+    can check ``fieldset_includes`` before adding request-specific
+    prefetches.
+    """
+
+    def get_query_serializer(self):
+        serializer = self.get_fieldset_serializer()
+        if serializer is None:
+            return super().get_query_serializer()
+        return serializer
+
+    def get_fieldset_serializer(self):
+        """Return an unbound serializer describing the selected fields."""
+        if not hasattr(self, "_fieldset_serializer"):
+            serializer_class = self.get_serializer_class()
+            serializer = None
+            if issubclass(serializer_class, DynamicFieldsMixin):
+                fieldset = Fieldset()
+                if self.request.method in permissions.SAFE_METHODS:
+                    fieldset = Fieldset.from_query_params(
+                        self.request.query_params
+                    )
+                serializer = serializer_class(
+                    context=self.get_serializer_context(), fieldset=fieldset
+                )
+                serializer.check_fieldset()
+            self._fieldset_serializer = serializer
+        return self._fieldset_serializer
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = self.get_fieldset_serializer()
+        if serializer is not None:
+            kwargs.setdefault("fieldset", serializer.fieldset)
+        return super().get_serializer(*args, **kwargs)
+
+    def fieldset_includes(self, name: str) -> bool:
+        serializer = self.get_fieldset_serializer()
+        return serializer is None or name in serializer.fields
+
+
+class BulkCreateMixin:
+    """``POST .../bulk/`` creating a list of objects in one request.
+
+    The serializer's ``Meta.list_serializer_class`` (a
+    ``common.serializers.BulkListSerializer``) validates the batch and
+    saves it through a bulk service. Validation errors come back as a
+    list aligned with the input; nothing is saved unless every item is
+    valid. Batches hold at most ``settings.BULK_MAX_ITEMS`` items.
+
+    Like ``create``, the answer is 200 instead of 201 when the list
+    serializer sets ``created = False`` (every item updated a row).
+    """
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.BULK_MAX_ITEMS,
+        )
+        serializer.is_valid(raise_exception=True)
+        objects = serializer.save()
+        status_code = status.HTTP_201_CREATED
+        if getattr(serializer, "created", True) is False:
+            status_code = status.HTTP_200_OK
+        return Response(
+            {"ids": [obj.pk for obj in objects]}, status=status_code
+        )
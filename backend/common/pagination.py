@@ -0,0 +1,264 @@
+"""Pagination classes for API list endpoints.
+
+Page-number pagination stays the default. Clients that page deep into large
+listings can opt into keyset (cursor) pagination, which seeks on the
+``(created_at, id)`` indexes and never runs a ``COUNT(*)`` query.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """Keyset pagination over ``ordering_field`` with an ``id`` tiebreaker.
+
+    Cursors are opaque base64-encoded positions of the boundary row, so a
+    page is fetched with a single indexed range query regardless of depth.
+    Results are newest first unless the request asks for
+    ``?ordering=created_at``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering_field = "created_at"
+    invalid_cursor_message = "Некорректный курсор."
+
+    def __init__(self):
+        self.base_url: Optional[str] = None
+        self.has_next = False
+        self.has_previous = False
+        self.next_position: Optional[tuple] = None
+        self.previous_position: Optional[tuple] = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, page_size, position, reverse = self.seek(queryset, request)
+        results = list(queryset[: page_size + 1])
+        return self.page(results, page_size, position, reverse)
+
+    def seek(self, queryset, request):
+        """Order and filter ``queryset`` to start at the cursor.
+
+        Returns the queryset, the page size, the cursor position and
+        whether the cursor walks backwards.
+        """
+        page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        descending = self.is_descending(request)
+        cursor = self.decode_cursor(request)
+        position, reverse = cursor if cursor else (None, False)
+
+        # Previous pages are read by walking the index backwards.
+        forward = descending != reverse
+        field = self.ordering_field
+        if forward:
+            queryset = queryset.order_by(f"-{field}", "-id")
+        else:
+            queryset = queryset.order_by(field, "id")
+
+        if position is not None:
+            value, pk = position
+            lookup, bound = ("lt", "lte") if forward else ("gt", "gte")
+            # The redundant "created_at <= %s" bound gives the planner a
+            # single range on the (created_at, id) index; the OR alone
+            # often doesn't.
+            queryset = queryset.filter(
+                Q(**{f"{field}__{bound}": value}),
+                Q(**{f"{field}__{lookup}": value})
+                | Q(**{field: value, f"id__{lookup}": pk}),
+            )
+        return queryset, page_size, position, reverse
+
+    def page(self, results, page_size, position, reverse):
+        """Trim the ``page_size + 1`` rows read and set the links."""
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if results:
+            self.previous_position = self._position(results[0])
+            self.next_position = self._position(results[-1])
+        elif position is not None:
+            # Empty page after a cursor: keep the way back open.
+            self.previous_position = self.next_position = position
+        return results
+
+    def get_page_size(self, request) -> int:
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if value <= 0:
+            return self.page_size
+        return min(value, self.max_page_size)
+
+    def is_descending(self, request) -> bool:
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, "")
+        return ordering.strip() != self.ordering_field
+
+    def _position(self, obj) -> tuple:
+        return getattr(obj, self.ordering_field), obj.pk
+
+    def encode_cursor(self, position: tuple, *, reverse: bool) -> str:
+        value, pk = position
+        payload: dict[str, Any] = {"p": value.isoformat(), "i": pk}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode("ascii")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            value = parse_datetime(payload["p"])
+            pk = int(payload["i"])
+            reverse = bool(payload.get("r"))
+        except (
+            binascii.Error,
+            KeyError,
+            TypeError,
+            ValueError,
+            AttributeError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), reverse
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or self.next_position is None:
+            return None
+        cursor = self.encode_cursor(self.next_position, reverse=False)
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or self.previous_position is None:
+            return None
+        cursor = self.encode_cursor(self.previous_position, reverse=True)
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+
+class CatalogPagination(pagination.PageNumberPagination):
+    """Page-number pagination with opt-in keyset mode.
+
+    ``?pagination=cursor`` (or any request carrying a ``cursor``) is served by
+    :class:`KeysetPagination`; everything else keeps the ``count``/``page``
+    response shape.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset: Optional[KeysetPagination] = None
+
+    def use_keyset(self, request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        keyset = self.keyset_class
+        parameters.extend(
+            [
+                {
+                    "name": self.mode_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": (
+                        "Set to 'cursor' to use keyset pagination "
+                        "(no count, stable deep pages)."
+                    ),
+                    "schema": {"type": "string", "enum": ["cursor"]},
+                },
+                {
+                    "name": keyset.cursor_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Opaque cursor from a next/previous link.",
+                    "schema": {"type": "string"},
+                },
+                {
+                    "name": keyset.page_size_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": (
+                        "Page size in cursor mode "
+                        f"(max {keyset.max_page_size})."
+                    ),
+                    "schema": {"type": "integer"},
+                },
+            ]
+        )
+        return parameters
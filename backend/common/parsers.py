@@ -0,0 +1,41 @@
+"""Request body parsers matching ``common.renderers``.
+
+``JSONParser`` decodes UTF-8 bodies with ``orjson`` when it is
+installed (other charsets go through DRF's parser); like DRF's strict
+parser it rejects ``NaN`` and ``Infinity``. ``MessagePackParser``
+accepts ``Content-Type: application/msgpack`` bodies.
+"""
+
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from common.renderers import MSGPACK_MEDIA_TYPE, msgpack, orjson
+
+UTF8_NAMES = {"utf-8", "utf8"}
+
+
+class JSONParser(parsers.JSONParser):
+    """DRF's ``JSONParser``, through ``orjson`` when available."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8_NAMES:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parse MessagePack request bodies."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
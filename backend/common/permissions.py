@@ -1,3 +1,6 @@
+import ipaddress
+
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -10,3 +13,25 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         # Check if object has added_by (for tasks) or user (for solutions/reviews)
         owner_id = getattr(obj, "added_by_id", None) or getattr(obj, "user_id", None)
         return owner_id == request.user.id
+
+
+class IsMetricsScraper(permissions.BasePermission):
+    """Allow staff users and direct requests from ``METRICS_ALLOWED_IPS``.
+
+    Requests that went through a proxy (``X-Forwarded-For``) don't qualify
+    by address: behind a reverse proxy ``REMOTE_ADDR`` is the proxy's.
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        if "HTTP_X_FORWARDED_FOR" in request.META:
+            return False
+        try:
+            address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+        except ValueError:
+            return False
+        return any(
+            address in ipaddress.ip_network(network, strict=False)
+            for network in settings.METRICS_ALLOWED_IPS
+        )
@@ -0,0 +1,76 @@
+"""Fast JSON and MessagePack renderers for the API.
+
+``JSONRenderer`` encodes with ``orjson`` when it is installed and gives
+the same bytes as DRF's renderer for API data: UTF-8, compact, ``Z``
+for UTC datetimes, ``\\u2028``/``\\u2029`` escaped. Whatever ``orjson``
+doesn't handle natively (``Decimal``, lazy strings, querysets, ...) goes
+through DRF's encoder, and data it rejects (non-string keys, integers
+beyond 64 bits) or indented output (the browsable API, ``; indent=4``)
+is rendered by DRF's renderer.
+
+``MessagePackRenderer`` serves clients sending
+``Accept: application/msgpack`` when the optional ``msgpack`` package is
+installed (settings only offer it then). Values are converted like the
+JSON ones, so both formats carry the same data.
+"""
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+_encoder = encoders.JSONEncoder()
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """DRF's ``JSONRenderer``, through ``orjson`` when available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=_encoder.default, option=orjson.OPT_UTC_Z
+            )
+        except TypeError:
+            # orjson.JSONEncodeError; DRF's encoder may still manage.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like DRF's output, a strict JavaScript subset. Looking
+        # for the lead byte first (memchr) spares two full scans of large
+        # bodies, which mostly don't have any.
+        if b"\xe2" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Render data as MessagePack for clients that ask for it."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encoder.default)
@@ -0,0 +1,170 @@
+"""Read replica routing with read-your-writes stickiness.
+
+Replicas are the ``DATABASE_REPLICAS`` aliases (see settings). Reads go
+to a replica only when a view opts in: ``ReplicaReadMixin`` picks one
+for safe-method requests with ``route_reads``. Everything else (writes,
+unsafe requests, the admin, commands) uses the primary, as do reads
+inside a transaction on the primary, e.g. in ``catalog.services``.
+
+After a request writes, its user stays on the primary for
+``REPLICA_STICKY_SECONDS`` (a flag in the shared cache), so their own
+changes are visible before the replicas catch up.
+
+Replicas lagging by more than ``REPLICA_MAX_LAG`` seconds, or not
+answering, are skipped; when none is usable, reads use the primary. Lag
+is checked at most every ``REPLICA_LAG_CHECK_INTERVAL`` seconds per
+worker.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_KEY = "db_sticky:{}"  # {} for the user id
+# Seconds a standby is behind; 0 when it has replayed all it received.
+POSTGRESQL_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Replica serving the reads of the current request, if any.
+_read_alias: ContextVar[Optional[str]] = ContextVar(
+    "replica_read_alias", default=None
+)
+# Set when the current request writes to the primary.
+_wrote: ContextVar[bool] = ContextVar("replica_wrote", default=False)
+
+# alias -> (checked at, usable), per worker
+_health: Dict[str, Tuple[float, bool]] = {}
+
+
+def replica_aliases() -> List[str]:
+    return settings.DATABASE_REPLICAS
+
+
+def lag(alias: str) -> Optional[float]:
+    """Return how many seconds ``alias`` is behind, None if unreachable.
+
+    SQLite files have no replication and report no lag.
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRESQL_LAG_SQL)
+            (seconds,) = cursor.fetchone()
+    except Exception as e:
+        logger.warning(f"Replica {alias} is unreachable: {e}")
+        return None
+    return float(seconds or 0)
+
+
+def is_usable(alias: str) -> bool:
+    """Return whether ``alias`` is within the allowed lag (cached)."""
+    now = time.monotonic()
+    checked_at, usable = _health.get(alias, (None, False))
+    if (
+        checked_at is not None
+        and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL
+    ):
+        return usable
+    seconds = lag(alias)
+    usable = seconds is not None and seconds <= settings.REPLICA_MAX_LAG
+    if not usable and seconds is not None:
+        logger.warning(f"Replica {alias} is {seconds:.1f}s behind, skipped")
+    _health[alias] = (now, usable)
+    return usable
+
+
+def choose_replica() -> Optional[str]:
+    """Return a usable replica, or None to read from the primary."""
+    usable = [alias for alias in replica_aliases() if is_usable(alias)]
+    return random.choice(usable) if usable else None
+
+
+def is_sticky(user_id) -> bool:
+    return cache.get(STICKY_KEY.format(user_id)) is not None
+
+
+def stick(user_id) -> None:
+    """Keep ``user_id`` on the primary for the stickiness window."""
+    cache.set(
+        STICKY_KEY.format(user_id), 1, timeout=settings.REPLICA_STICKY_SECONDS
+    )
+
+
+async def astick(user_id) -> None:
+    """Async ``stick``."""
+    await cache.aset(
+        STICKY_KEY.format(user_id), 1, timeout=settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def route_reads(user) -> Optional[str]:
+    """Send the reads of the current request to a replica if allowed."""
+    if not replica_aliases():
+        return None
+    if user is not None and user.is_authenticated and is_sticky(user.pk):
+        return None
+    alias = choose_replica()
+    _read_alias.set(alias)
+    return alias
+
+
+@contextmanager
+def read_from(alias: Optional[str]) -> Iterator[None]:
+    """Route reads of the block to ``alias`` (None for the primary)."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def request_scope() -> Iterator[Dict[str, bool]]:
+    """Isolate the routing of one request and report whether it wrote."""
+    read_token = _read_alias.set(None)
+    wrote_token = _wrote.set(False)
+    scope = {"wrote": False}
+    try:
+        yield scope
+    finally:
+        scope["wrote"] = _wrote.get()
+        _read_alias.reset(read_token)
+        _wrote.reset(wrote_token)
+
+
+class ReplicaRouter:
+    """Database router for ``DATABASE_ROUTERS``; see the module docs."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
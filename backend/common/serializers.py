@@ -0,0 +1,350 @@
+"""Client-selected sparse fieldsets and expansions for serializers.
+
+``?fields=a,b`` keeps only the listed fields, ``?exclude=c`` drops fields
+and ``?expand=d`` swaps in (or adds) a nested representation declared in
+``Meta.expandable_fields``. ``common.mixins.SparseFieldsetMixin`` passes
+the selection to the serializer.
+
+``serializer_query`` works out what a serializer's fields read from the
+database (``FieldQuery``): columns, forward relations to join and
+reverse or many-to-many relations to prefetch, following dotted
+sources, nested serializers and related fields. Fields whose reads
+can't be seen (method fields, model properties, ``source="*"``) load
+the whole row unless ``Meta.field_queries`` declares them.
+``common.mixins.SerializerQueryMixin`` applies the result to the view's
+queryset.
+
+``BulkListSerializer`` validates a list of new objects for batch writes,
+resolving the primary keys of ``BatchPrimaryKeyRelatedField`` relations
+with one query per relation instead of one per item.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import relations, serializers
+
+from common import timing
+
+
+@dataclass(frozen=True)
+class FieldQuery:
+    """Columns and relations a serializer field reads.
+
+    ``all_columns`` lists the rows (relation paths, ``""`` for the row
+    itself) read beyond known columns, which are loaded whole.
+    """
+
+    only: Tuple[str, ...] = ()
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple[str, ...] = ()
+    all_columns: Tuple[str, ...] = ()
+
+    def __or__(self, other: "FieldQuery") -> "FieldQuery":
+        return FieldQuery(
+            only=_merge(self.only, other.only),
+            select_related=_merge(self.select_related, other.select_related),
+            prefetch_related=_merge(
+                self.prefetch_related, other.prefetch_related
+            ),
+            all_columns=_merge(self.all_columns, other.all_columns),
+        )
+
+    def columns(self) -> Optional[Tuple[str, ...]]:
+        """Arguments for ``only()``, or None when the row is read whole."""
+        if "" in self.all_columns:
+            return None
+        whole = tuple(f"{path}__" for path in self.all_columns)
+        return tuple(
+            name for name in self.only if not name.startswith(whole)
+        )
+
+    def nested(self, name: str) -> "FieldQuery":
+        """This query for the rows of relation ``name`` of another model."""
+        return FieldQuery(
+            only=_prefix(name, self.only),
+            select_related=_prefix(name, self.select_related),
+            prefetch_related=_prefix(name, self.prefetch_related),
+            all_columns=_prefix(name, self.all_columns),
+        )
+
+
+# Read by fields that may use any column of the row.
+WHOLE_ROW = FieldQuery(all_columns=("",))
+
+
+@dataclass(frozen=True)
+class Expansion:
+    """Nested representation available through ``?expand=``."""
+
+    serializer_class: Type[serializers.BaseSerializer]
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def build(self) -> serializers.BaseSerializer:
+        return self.serializer_class(read_only=True, **self.kwargs)
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Field selection of one request."""
+
+    fields: Optional[Tuple[str, ...]] = None
+    exclude: Tuple[str, ...] = ()
+    expand: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_query_params(cls, params) -> "Fieldset":
+        fields = params.get("fields")
+        return cls(
+            fields=_split(fields) if fields is not None else None,
+            exclude=_split(params.get("exclude", "")),
+            expand=_split(params.get("expand", "")),
+        )
+
+    @property
+    def is_sparse(self) -> bool:
+        """Whether some default fields are left out."""
+        return self.fields is not None or bool(self.exclude)
+
+
+def _split(value: str) -> Tuple[str, ...]:
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+def _merge(*groups: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(name for group in groups for name in group))
+
+
+def _prefix(name: str, paths: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(f"{name}__{path}" if path else name for path in paths)
+
+
+class DynamicFieldsMixin:
+    """ModelSerializer mixin applying a client ``Fieldset``.
+
+    ``Meta.expandable_fields`` maps names to ``Expansion``s. Expanding
+    replaces the field of the same name, or adds it.
+    """
+
+    def __init__(self, *args, fieldset: Optional[Fieldset] = None, **kwargs):
+        self.fieldset = fieldset
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def expandable_fields(cls) -> Dict[str, Expansion]:
+        return getattr(cls.Meta, "expandable_fields", {})
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.fieldset
+        if fieldset is None:
+            return fields
+
+        expansions = self.expandable_fields()
+        for name in fieldset.expand:
+            if name in expansions:
+                fields[name] = expansions[name].build()
+        if fieldset.fields is not None:
+            keep = set(fieldset.fields) | set(fieldset.expand)
+            fields = {
+                name: value
+                for name, value in fields.items()
+                if name in keep
+            }
+        for name in fieldset.exclude:
+            fields.pop(name, None)
+        return fields
+
+    def check_fieldset(self) -> None:
+        """Reject names that are neither fields nor expansions."""
+        fieldset = self.fieldset
+        if fieldset is None:
+            return
+        known = set(super().get_fields())
+        errors = {}
+        for param, names, allowed in (
+            ("fields", fieldset.fields or (), known),
+            ("exclude", fieldset.exclude, known),
+            ("expand", fieldset.expand, set(self.expandable_fields())),
+        ):
+            unknown = [name for name in names if name not in allowed]
+            if unknown:
+                errors[param] = f"Неизвестные поля: {', '.join(unknown)}."
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    def to_representation(self, instance):
+        if timing.current() is None:
+            return super().to_representation(instance)
+        with timing.span("serialize"):
+            return super().to_representation(instance)
+
+
+def serializer_query(serializer: serializers.BaseSerializer) -> FieldQuery:
+    """Return what the readable fields of a bound serializer read.
+
+    ``Meta.field_queries`` (``{name: FieldQuery}``) declares fields whose
+    reads can't be seen (model properties, method fields,
+    ``source="*"``); without a declaration they load the whole row.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    meta = getattr(serializer, "Meta", None)
+    model = getattr(meta, "model", None)
+    if model is None:
+        return WHOLE_ROW
+    explicit = getattr(meta, "field_queries", {})
+    query = FieldQuery()
+    for serializer_field in serializer._readable_fields:
+        if serializer_field.field_name in explicit:
+            query |= explicit[serializer_field.field_name]
+        else:
+            query |= field_query(serializer_field, model)
+    return query
+
+
+def field_query(serializer_field, model) -> FieldQuery:
+    """Return what one serializer field reads from a ``model`` row."""
+    if isinstance(serializer_field, serializers.BaseSerializer):
+        # Nested serializers read the related rows as they describe.
+        read = serializer_query(serializer_field)
+    elif isinstance(serializer_field, relations.ManyRelatedField):
+        read = _related_read(serializer_field.child_relation)
+    elif isinstance(serializer_field, relations.RelatedField):
+        read = _related_read(serializer_field)
+    else:
+        read = WHOLE_ROW
+    if not serializer_field.source_attrs:
+        # source="*" (method fields too): the field reads the row itself.
+        return read or FieldQuery()
+    return _path_query(model, serializer_field.source_attrs, read)
+
+
+def _related_read(serializer_field) -> Optional[FieldQuery]:
+    if serializer_field.use_pk_only_optimization():
+        return None
+    # The related object itself (``__str__``, URLs by other fields, ...).
+    return WHOLE_ROW
+
+
+def _path_query(model, attrs, read: Optional[FieldQuery]) -> FieldQuery:
+    """What reading ``attrs`` (a dotted source) from ``model`` loads.
+
+    ``read`` is what is read from a related object at the end of the
+    path; None when only its primary key is.
+    """
+    name, rest = attrs[0], attrs[1:]
+    if name == "pk":
+        name = model._meta.pk.name
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        if hasattr(model, name):
+            # Properties and methods may read anything.
+            return WHOLE_ROW
+        # Annotations and attributes set by the view.
+        return FieldQuery()
+    if not model_field.is_relation:
+        if model_field.concrete:
+            return FieldQuery(only=(model_field.name,))
+        return FieldQuery()
+    forward = model_field.concrete and not model_field.many_to_many
+    if forward and (name != model_field.name or (not rest and not read)):
+        # The "<fk>_id" column, or the primary key through it.
+        return FieldQuery(only=(model_field.name,))
+
+    if rest:
+        related = _path_query(model_field.related_model, rest, read)
+    else:
+        related = read or FieldQuery()
+    related = related.nested(name)
+    if forward:
+        return FieldQuery(only=(name,), select_related=(name,)) | related
+    # Reverse and many-to-many relations: one query per relation, rows
+    # loaded whole.
+    return FieldQuery(
+        prefetch_related=(
+            name,
+            *related.select_related,
+            *related.prefetch_related,
+        )
+    )
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key relation resolved in bulk inside ``BulkListSerializer``.
+
+    Outside of a batch it behaves like ``PrimaryKeyRelatedField``.
+    """
+
+    def to_internal_value(self, data):
+        batch = self.parent.parent if self.parent is not None else None
+        resolved = getattr(batch, "resolved_relations", None) or {}
+        objects = resolved.get(self.field_name)
+        if objects is None:
+            return super().to_internal_value(data)
+        pk = _to_pk(self.get_queryset().model, data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in objects:
+            self.fail("does_not_exist", pk_value=data)
+        return objects[pk]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """List serializer for batch creates.
+
+    Errors are reported per item, in input order, by ``ListSerializer``.
+    Subclasses implement ``create`` with a bulk service and can add
+    batch-wide checks in ``run_child_validation``.
+    """
+
+    resolved_relations: Optional[Dict[str, Dict[Any, Any]]] = None
+
+    def to_internal_value(self, data):
+        if self.is_batch(data):
+            self.resolved_relations = self.resolve_relations(data)
+        return super().to_internal_value(data)
+
+    def is_batch(self, data) -> bool:
+        """Whether ``data`` is a list that passes the length checks."""
+        return isinstance(data, list) and (
+            self.max_length is None or len(data) <= self.max_length
+        )
+
+    def resolve_relations(self, data) -> Dict[str, Dict[Any, Any]]:
+        """Load the objects referenced by the batch, one query per field."""
+        resolved = {}
+        for name, field in self.child.fields.items():
+            if field.read_only or not isinstance(
+                field, BatchPrimaryKeyRelatedField
+            ):
+                continue
+            queryset = field.get_queryset()
+            pks = {
+                _to_pk(queryset.model, item.get(name))
+                for item in data
+                if isinstance(item, dict)
+            }
+            pks.discard(None)
+            resolved[name] = queryset.in_bulk(pks)
+        return resolved
+
+
+class BulkCreateResultSerializer(serializers.Serializer):
+    """Response of ``common.mixins.BulkCreateMixin``: ids in input order."""
+
+    ids = serializers.ListField(child=serializers.IntegerField())
+
+
+def _to_pk(model, value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return model._meta.pk.to_python(value)
+    except (TypeError, ValueError, DjangoValidationError):
+        return None
@@ -0,0 +1,212 @@
+"""Slow query log with captured query plans.
+
+Every database connection gets an execute wrapper (installed on
+``connection_created`` by ``CommonConfig``) that times each statement.
+Reads and writes slower than ``SLOW_QUERY_THRESHOLD_MS`` are recorded
+with:
+
+- the SQL and its parameters (long values truncated)
+- the view and action being served (set by ``SlowQueryMiddleware``),
+  or ``-`` outside of requests
+- the innermost project frames that issued the query
+- the plan: ``EXPLAIN`` on PostgreSQL, ``EXPLAIN QUERY PLAN`` on SQLite.
+  A share of slow reads (``SLOW_QUERY_ANALYZE_SAMPLE_RATE``) is run again
+  under ``EXPLAIN ANALYZE`` on PostgreSQL for actual row counts and
+  timings.
+
+Entries go to a ring buffer of ``SLOW_QUERY_LOG_SIZE`` slots in the
+default cache, so every worker writes to the same log and the staff
+endpoint (``/api/slow-queries/``) and the ``slow_queries`` command read
+it. The slot is picked with an ``INCR``, as for cache namespaces.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import re
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KEY = "slow_queries:next"
+SLOT_KEY = "slow_queries:{}"  # {} for the slot number
+MAX_PARAM_LENGTH = 200
+MAX_SQL_LENGTH = 20000
+STACK_DEPTH = 5
+EXPLAINABLE_RE = re.compile(
+    r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE
+)
+READ_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+# Instrumentation frames, which are on every stack.
+SKIPPED_FILES = {
+    str(Path(__file__).resolve()),
+    str(Path(__file__).resolve().with_name("middleware.py")),
+}
+
+# (view, action, path) of the request being served.
+_origin: ContextVar[Tuple[str, str, str]] = ContextVar(
+    "slow_query_origin", default=("-", "-", "-")
+)
+# Set while a slow query is being recorded, so the EXPLAIN and cache
+# round-trips it runs are not recorded in turn.
+_recording: ContextVar[bool] = ContextVar(
+    "slow_query_recording", default=False
+)
+
+
+def set_origin(view: str, action: str, path: str):
+    return _origin.set((view, action, path))
+
+
+def reset_origin(token) -> None:
+    _origin.reset(token)
+
+
+def watch(execute, sql, params, many, context):
+    """Execute wrapper recording statements above the threshold."""
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if not threshold or many or _recording.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms >= threshold and EXPLAINABLE_RE.match(sql):
+        token = _recording.set(True)
+        try:
+            record(context["connection"], sql, params, duration_ms)
+        except Exception as e:
+            logger.error(f"Error recording slow query: {e}")
+        finally:
+            _recording.reset(token)
+    return result
+
+
+def install(connection, **kwargs) -> None:
+    """``connection_created`` receiver adding ``watch`` once."""
+    if watch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(watch)
+
+
+def record(connection, sql: str, params, duration_ms: float) -> Dict:
+    """Explain ``sql`` and store it in the ring buffer."""
+    view, action, path = _origin.get()
+    analyze = (
+        connection.vendor == "postgresql"
+        and READ_RE.match(sql) is not None
+        and random.random() < settings.SLOW_QUERY_ANALYZE_SAMPLE_RATE
+    )
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 2),
+        "database": connection.alias,
+        "vendor": connection.vendor,
+        "view": view,
+        "action": action,
+        "path": path,
+        "sql": sql[:MAX_SQL_LENGTH],
+        "params": _params(params),
+        "stack": _stack(),
+        "analyzed": analyze,
+        "plan": explain(connection, sql, params, analyze=analyze),
+    }
+    logger.warning(
+        f"Slow query {entry['duration_ms']}ms view={view} "
+        f"action={action}: {entry['sql'][:200]}"
+    )
+    _store(entry)
+    return entry
+
+
+def explain(connection, sql: str, params, analyze: bool = False) -> str:
+    """Return the plan of ``sql``, or the error explaining it raised.
+
+    Runs in a savepoint: a failing EXPLAIN must not abort the caller's
+    transaction on PostgreSQL.
+    """
+    options = {"analyze": True} if analyze else {}
+    prefix = connection.ops.explain_query_prefix(**options)
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                rows = cursor.fetchall()
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    # PostgreSQL returns one line per row, SQLite (id, parent, notused,
+    # detail) rows.
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def recent(limit: Optional[int] = None) -> List[Dict]:
+    """Return the stored entries, newest first."""
+    keys = [SLOT_KEY.format(slot) for slot in range(_size())]
+    entries = [entry for entry in cache.get_many(keys).values() if entry]
+    entries.sort(key=lambda entry: entry["id"], reverse=True)
+    return entries[:limit] if limit else entries
+
+
+def clear() -> None:
+    cache.delete_many(
+        [COUNTER_KEY] + [SLOT_KEY.format(slot) for slot in range(_size())]
+    )
+
+
+def _size() -> int:
+    return settings.SLOW_QUERY_LOG_SIZE
+
+
+def _store(entry: Dict) -> None:
+    try:
+        number = cache.incr(COUNTER_KEY)
+    except ValueError:
+        cache.add(COUNTER_KEY, 0, timeout=None)
+        number = cache.incr(COUNTER_KEY)
+    entry["id"] = number
+    cache.set(SLOT_KEY.format(number % _size()), entry, timeout=None)
+
+
+def _params(params) -> Any:
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _param(value) for key, value in params.items()}
+    return [_param(value) for value in params]
+
+
+def _param(value) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) > MAX_PARAM_LENGTH:
+        return f"{text[:MAX_PARAM_LENGTH]}... ({len(text)} chars)"
+    return text
+
+
+def _stack() -> List[str]:
+    """Innermost project frames (``path:line in function``)."""
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if (
+            filename in SKIPPED_FILES
+            or not filename.startswith(PROJECT_DIR)
+            or "site-packages" in filename
+        ):
+            continue
+        relative = filename[len(PROJECT_DIR) + 1:]
+        frames.append(f"{relative}:{frame.lineno} in {frame.name}")
+        if len(frames) == STACK_DEPTH:
+            break
+    return frames
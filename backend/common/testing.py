@@ -0,0 +1,84 @@
+"""Test helpers for SQL query budgets.
+
+``QueryBudgetMixin`` bounds the number of queries a block runs and the
+JOINs of its widest query. ``assertListBudget`` requests a list endpoint
+with several page sizes under the same budget, so a per-row query (N+1)
+fails the test instead of scaling with the page.
+"""
+
+from __future__ import annotations
+
+import re
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+JOIN_RE = re.compile(r"\bJOIN\b")
+# Savepoints come from TestCase and atomic blocks, not from the code's
+# data access, so they don't count against budgets.
+SAVEPOINT_RE = re.compile(r"^(RELEASE |ROLLBACK TO )?SAVEPOINT\b")
+
+
+def join_count(sql: str) -> int:
+    return len(JOIN_RE.findall(sql))
+
+
+class QueryBudgetMixin:
+    """Assertions on queries per request for ``TestCase`` subclasses."""
+
+    list_page_sizes = (2, 25)
+
+    @contextmanager
+    def assertQueryBudget(
+        self, queries: int, joins: Optional[int] = None
+    ) -> Iterator[CaptureQueriesContext]:
+        """Fail if the block runs more than ``queries`` queries, or one
+        query with more than ``joins`` JOINs."""
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        executed = [
+            query["sql"]
+            for query in captured.captured_queries
+            if not SAVEPOINT_RE.match(query["sql"])
+        ]
+        listing = "\n".join(
+            f"{number}. {sql}" for number, sql in enumerate(executed, 1)
+        )
+        if len(executed) > queries:
+            self.fail(
+                f"{len(executed)} queries executed, budget is {queries}:\n"
+                f"{listing}"
+            )
+        if joins is not None:
+            widest = max(executed, key=join_count, default="")
+            if join_count(widest) > joins:
+                self.fail(
+                    f"A query has {join_count(widest)} JOINs, budget is "
+                    f"{joins}:\n{widest}"
+                )
+
+    def assertListBudget(
+        self,
+        path: str,
+        *,
+        queries: int,
+        joins: Optional[int] = None,
+        page_sizes: Optional[Iterable[int]] = None,
+    ) -> None:
+        """Check a list endpoint with every page size in one budget.
+
+        Pages are requested in keyset mode, which takes ``page_size``;
+        each page must be full, so the dataset really has that many rows.
+        """
+        separator = "&" if "?" in path else "?"
+        for page_size in page_sizes or self.list_page_sizes:
+            url = (
+                f"{path}{separator}pagination=cursor&page_size={page_size}"
+            )
+            with self.subTest(url=url):
+                with self.assertQueryBudget(queries, joins):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), page_size)
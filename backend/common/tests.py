@@ -0,0 +1,851 @@
+"""Tests for shared utilities."""
+
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from uuid import UUID
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone as django_timezone
+from django.utils.translation import gettext_lazy
+from prometheus_client import REGISTRY
+from rest_framework import renderers as drf_renderers
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+from common import (
+    benchmarking,
+    cache_utils,
+    metrics,
+    parsers,
+    renderers,
+    replicas,
+    slow_queries,
+)
+from common.compiled_serializers import (
+    compile_representation,
+    compile_serializer,
+)
+from common.middleware import ReplicaMiddleware, ServerTimingMiddleware
+from common.serializers import FieldQuery, serializer_query
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "common-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheNamespaceTests(SimpleTestCase):
+    """Tests for generational cache namespaces."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_start_at_one(self):
+        """Test that unknown namespaces start at version 1."""
+        self.assertEqual(
+            cache_utils.get_namespace_versions("a", "b"), {"a": 1, "b": 1}
+        )
+
+    def test_bump_changes_only_its_namespace(self):
+        """Test that bumping one namespace leaves others untouched."""
+        before = cache_utils.make_versioned_key("p", ["a", "b"], "x")
+        other = cache_utils.make_versioned_key("p", ["b"], "x")
+
+        cache_utils.bump_namespace("a")
+
+        self.assertNotEqual(
+            cache_utils.make_versioned_key("p", ["a", "b"], "x"), before
+        )
+        self.assertEqual(
+            cache_utils.make_versioned_key("p", ["b"], "x"), other
+        )
+
+    def test_bump_without_stored_version_invalidates(self):
+        """Test that bumping a never-read namespace moves past version 1."""
+        cache_utils.bump_namespace("fresh")
+        self.assertEqual(
+            cache_utils.get_namespace_versions("fresh"), {"fresh": 2}
+        )
+
+    def test_bump_never_clears_cache(self):
+        """Test that invalidation does not touch unrelated keys."""
+        cache.set("ratelimit:counter", 7)
+        with mock.patch.object(cache, "clear") as clear:
+            cache_utils.bump_namespace("a")
+        clear.assert_not_called()
+        self.assertEqual(cache.get("ratelimit:counter"), 7)
+
+    def test_fingerprint_normalizes_query_order(self):
+        """Test that parameter order does not change the fingerprint."""
+        factory = RequestFactory()
+        first = factory.get("/api/tasks/", {"a": "1", "b": "2"})
+        second = factory.get("/api/tasks/?b=2&a=1")
+        third = factory.get("/api/tasks/?b=3&a=1")
+
+        self.assertEqual(
+            cache_utils.request_fingerprint(first),
+            cache_utils.request_fingerprint(second),
+        )
+        self.assertNotEqual(
+            cache_utils.request_fingerprint(first),
+            cache_utils.request_fingerprint(third),
+        )
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    """Tests for benchmark baseline comparison."""
+
+    def result(self, **overrides):
+        return {
+            "queries": 3,
+            "bytes": 1000,
+            "p50_ms": 10.0,
+            "p90_ms": 20.0,
+            **overrides,
+        }
+
+    def test_reports_only_real_regressions(self):
+        """Test that queries, bytes and slow latencies are flagged."""
+        baseline = {
+            "list": self.result(),
+            "fast": self.result(p50_ms=0.2, p90_ms=0.3),
+        }
+        current = {
+            "list": self.result(queries=4, bytes=1005, p50_ms=15.0),
+            "fast": self.result(p50_ms=0.4, p90_ms=0.6),
+            "new": self.result(),
+        }
+
+        regressions = benchmarking.compare(
+            baseline, current, tolerance=0.25
+        )
+
+        self.assertEqual(
+            regressions,
+            ["list: queries 3 -> 4", "list: p50_ms 10.00 -> 15.00 (+50%)"],
+        )
+
+    def test_load_keeps_requests_in_flight(self):
+        """Test that load counts requests and statuses of a live server."""
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.send_response(200 if self.path == "/ok" else 404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        result = benchmarking.load(f"{url}/ok", concurrency=2, duration=0.2)
+        missing = benchmarking.load(f"{url}/no", concurrency=1, duration=0.1)
+
+        self.assertEqual(result["concurrency"], 2)
+        self.assertGreater(result["requests"], 0)
+        self.assertEqual(result["statuses"], {"200": result["requests"]})
+        self.assertEqual(result["errors"], {})
+        self.assertIn("p99_ms", result)
+        self.assertEqual(list(missing["statuses"]), ["404"])
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1, SERVER_TIMING_HEADER=True)
+class ServerTimingMiddlewareTests(TestCase):
+    """Tests for per-request timings."""
+
+    def test_header_reports_db_time_and_queries(self):
+        """Test that sampled requests get a Server-Timing header."""
+        with self.assertLogs("common.middleware", "INFO"):
+            response = self.client.get("/api/tasks/")
+
+        header = response["Server-Timing"]
+        for metric in ("total", "view", "render", "db", "cache"):
+            self.assertIn(f"{metric};dur=", header)
+        self.assertRegex(header, r'db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+
+    def test_log_line_is_tagged_with_view_and_action(self):
+        """Test that the log line names the viewset action."""
+        with self.assertLogs("common.middleware", "INFO") as logs:
+            self.client.get("/api/tasks/")
+
+        (line,) = logs.output
+        self.assertIn("view=ProgrammingTaskViewSet action=list", line)
+        self.assertIn("status=200", line)
+        self.assertIn("db_queries=", line)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_cache_gets_and_hits_are_counted(self):
+        """Test that a cached response is counted as a hit."""
+        cache.clear()
+        with self.assertLogs("common.middleware", "INFO") as logs:
+            self.client.get("/api/categories/")
+            self.client.get("/api/categories/")
+
+        miss, hit = logs.output
+        self.assertIn("cache_sets=1", miss)
+        self.assertIn("cache_hit_ratio=1.00", hit)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        """Test that a zero rate disables the header and the log."""
+        with mock.patch.object(ServerTimingMiddleware, "log") as log:
+            response = self.client.get("/api/tasks/")
+
+        self.assertNotIn("Server-Timing", response)
+        log.assert_not_called()
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        """Test that the log is kept without the header."""
+        with self.assertLogs("common.middleware", "INFO"):
+            response = self.client.get("/api/tasks/")
+
+        self.assertNotIn("Server-Timing", response)
+
+
+class MetricsTests(TestCase):
+    """Tests for the Prometheus metrics and their endpoint."""
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_counted_per_view_and_action(self):
+        """Test request, latency and query metrics of a viewset action."""
+        labels = {"view": "ProgrammingTaskViewSet", "action": "list"}
+        before = self.sample(
+            "codeyard_http_requests_total",
+            method="GET",
+            status="200",
+            **labels,
+        )
+
+        self.client.get("/api/tasks/")
+
+        self.assertEqual(
+            self.sample(
+                "codeyard_http_requests_total",
+                method="GET",
+                status="200",
+                **labels,
+            ),
+            before + 1,
+        )
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn(
+            'codeyard_http_request_duration_seconds_count{action="list",'
+            'view="ProgrammingTaskViewSet"}',
+            body,
+        )
+        self.assertIn("codeyard_db_queries_per_request_bucket", body)
+        self.assertIn("codeyard_http_response_size_bytes_bucket", body)
+        self.assertIn("codeyard_worker_max_rss_bytes", body)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_cache_hits_and_misses(self):
+        """Test that cached responses count a miss, then a hit."""
+        cache.clear()
+        before = {
+            result: self.sample(
+                "codeyard_cache_requests_total",
+                helper="response",
+                result=result,
+            )
+            for result in ("hit", "miss")
+        }
+
+        self.client.get("/api/categories/")
+        self.client.get("/api/categories/")
+
+        for result in ("hit", "miss"):
+            self.assertEqual(
+                self.sample(
+                    "codeyard_cache_requests_total",
+                    helper="response",
+                    result=result,
+                ),
+                before[result] + 1,
+            )
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_ratelimit_rejections(self):
+        """Test that blocked requests are counted per view."""
+        cache.clear()
+        name = "codeyard_ratelimit_rejections_total"
+        labels = {"view": "CookieTokenObtainPairView"}
+        before = self.sample(name, **labels)
+
+        # Past 10 requests a minute; more in case a window starts midway.
+        with self.assertLogs("django.request", "WARNING"):
+            for _ in range(25):
+                response = self.client.post(
+                    "/api/auth/login/", {"username": "x", "password": "y"}
+                )
+                if response.status_code == 403:
+                    break
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.sample(name, **labels), before + 1)
+
+    def test_db_pool_stats(self):
+        """Test that psycopg pool counters are moved to metrics."""
+        pool = mock.Mock()
+        pool.pop_stats.return_value = {
+            "pool_size": 3,
+            "pool_available": 1,
+            "requests_num": 10,
+            "requests_queued": 2,
+            "requests_wait_ms": 1500,
+        }
+        pooled = mock.Mock(
+            vendor="postgresql",
+            alias="pooled",
+            settings_dict={"OPTIONS": {"pool": {"max_size": 4}}},
+            pool=pool,
+        )
+        before = self.sample(
+            "codeyard_db_pool_checkouts_total", database="pooled"
+        )
+
+        with mock.patch.object(
+            metrics.connections, "all", return_value=[connection, pooled]
+        ):
+            metrics.update_db_pools()
+
+        self.assertEqual(
+            self.sample("codeyard_db_pool_checkouts_total", database="pooled"),
+            before + 10,
+        )
+        self.assertEqual(
+            self.sample(
+                "codeyard_db_pool_wait_seconds_total", database="pooled"
+            ),
+            1.5,
+        )
+        self.assertEqual(
+            self.sample("codeyard_db_pool_size", database="pooled"), 3
+        )
+
+    def test_endpoint_access(self):
+        """Test that only allowed addresses and staff can scrape."""
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+        outside = {"REMOTE_ADDR": "203.0.113.7"}
+        proxied = {"HTTP_X_FORWARDED_FOR": "203.0.113.7"}
+        with self.assertLogs("django.request", "WARNING"):
+            for headers in (outside, proxied):
+                self.assertEqual(
+                    self.client.get("/metrics", **headers).status_code, 401
+                )
+        with override_settings(METRICS_ALLOWED_IPS=["203.0.113.0/24"]):
+            self.assertEqual(
+                self.client.get("/metrics", **outside).status_code, 200
+            )
+
+        staff = get_user_model().objects.create_user(
+            "ops", password="opspass1", is_staff=True
+        )
+        self.client.force_login(staff)
+        self.assertEqual(
+            self.client.get("/metrics", **outside).status_code, 200
+        )
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, SLOW_QUERY_THRESHOLD_MS=0.000001
+)
+class SlowQueryLogTests(TestCase):
+    """Tests for the slow query log (every query is slow here)."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(slow_queries.logger, "warning")
+        self.warning = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_queries_are_recorded_with_plans(self):
+        """Test origin, stack and plan of a query issued by a view."""
+        self.client.get("/api/tasks/")
+
+        entries = slow_queries.recent()
+        entry = next(
+            entry
+            for entry in entries
+            if entry["sql"].startswith("SELECT")
+            and "catalog_programmingtask" in entry["sql"]
+        )
+        self.assertEqual(entry["view"], "ProgrammingTaskViewSet")
+        self.assertEqual(entry["action"], "list")
+        self.assertEqual(entry["path"], "/api/tasks/")
+        self.assertTrue(entry["plan"])
+        self.assertFalse(entry["analyzed"])
+        self.assertTrue(entry["stack"])
+        self.assertEqual(
+            [e["id"] for e in entries],
+            sorted((e["id"] for e in entries), reverse=True),
+        )
+        self.assertEqual(self.warning.call_count, len(entries))
+
+    @override_settings(SLOW_QUERY_LOG_SIZE=3)
+    def test_ring_buffer_keeps_the_newest_entries(self):
+        """Test that the log is bounded by SLOW_QUERY_LOG_SIZE."""
+        for _ in range(5):
+            get_user_model().objects.count()
+
+        entries = slow_queries.recent()
+        self.assertEqual([entry["id"] for entry in entries], [5, 4, 3])
+        self.assertEqual(entries[0]["view"], "-")
+
+    def test_failed_explain_keeps_the_transaction_usable(self):
+        """Test that an EXPLAIN error is reported, not raised."""
+        plan = slow_queries.explain(
+            connection, "SELECT * FROM missing_table", None
+        )
+
+        self.assertTrue(plan.startswith("EXPLAIN failed"))
+        self.assertEqual(get_user_model().objects.count(), 0)
+
+    def test_long_params_are_truncated(self):
+        """Test that large values such as code are cut in the log."""
+        params = slow_queries._params(["x" * 1000, 1, None])
+
+        self.assertEqual(params[1:], [1, None])
+        self.assertTrue(params[0].endswith("(1000 chars)"))
+
+    def test_endpoint_is_staff_only(self):
+        """Test listing and clearing the log through the API."""
+        with self.assertLogs("django.request", "WARNING"):
+            self.assertEqual(
+                self.client.get("/api/slow-queries/").status_code, 401
+            )
+        staff = get_user_model().objects.create_user(
+            "ops", password="opspass1", is_staff=True
+        )
+        self.client.force_login(staff)
+
+        response = self.client.get("/api/slow-queries/?limit=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.client.delete("/api/slow-queries/")
+        # Only the queries of the DELETE request itself were logged since.
+        self.assertTrue(
+            all(
+                entry["path"] == "/api/slow-queries/"
+                for entry in slow_queries.recent()
+            )
+        )
+
+    def test_command(self):
+        """Test the slow_queries command report and --clear."""
+        get_user_model().objects.filter(username="x").exists()
+        out = StringIO()
+
+        call_command("slow_queries", stdout=out)
+        self.assertIn("auth_user", out.getvalue())
+        self.assertIn("EXPLAIN:", out.getvalue())
+
+        call_command("slow_queries", "--clear", stdout=StringIO())
+        self.assertEqual(slow_queries.recent(), [])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    DATABASE_REPLICAS=["replica1", "replica2"],
+    REPLICA_MAX_LAG=5,
+    REPLICA_LAG_CHECK_INTERVAL=60,
+)
+class ReplicaRoutingTests(TestCase):
+    """Tests for read replica routing (no replica is queried here)."""
+
+    def setUp(self):
+        cache.clear()
+        replicas._health.clear()
+        self.addCleanup(replicas._health.clear)
+        self.router = replicas.ReplicaRouter()
+        self.user = get_user_model().objects.create_user(
+            "reader", password="readerpass1"
+        )
+
+    def test_reads_use_the_routed_replica_outside_transactions(self):
+        """Test read, write and in-transaction routing."""
+        users = get_user_model().objects
+        # TestCase wraps every test in a transaction on the primary.
+        with mock.patch.object(connection, "in_atomic_block", False):
+            self.assertEqual(users.all().db, "default")
+            with replicas.read_from("replica2"):
+                self.assertEqual(users.all().db, "replica2")
+        with replicas.read_from("replica2"):
+            self.assertEqual(users.all().db, "default")
+        self.assertEqual(self.router.db_for_write(get_user_model()), "default")
+
+    def test_lagging_and_unreachable_replicas_are_skipped(self):
+        """Test the lag check, its caching and the primary fallback."""
+        lags = {"replica1": 30.0, "replica2": None}
+        with mock.patch.object(
+            replicas, "lag", side_effect=lags.get
+        ) as lag, self.assertLogs("common.replicas", "WARNING"):
+            self.assertIsNone(replicas.choose_replica())
+            self.assertIsNone(replicas.choose_replica())
+        self.assertEqual(lag.call_count, 2)
+
+        replicas._health.clear()
+        lags["replica2"] = 0.5
+        with mock.patch.object(replicas, "lag", side_effect=lags.get):
+            with self.assertLogs("common.replicas", "WARNING"):
+                self.assertEqual(replicas.choose_replica(), "replica2")
+
+    def test_writers_stick_to_the_primary(self):
+        """Test that a request that wrote keeps its user on the primary."""
+        with mock.patch.object(replicas, "is_usable", return_value=True):
+            with replicas.request_scope():
+                self.assertIn(
+                    replicas.route_reads(self.user), ("replica1", "replica2")
+                )
+            with replicas.request_scope() as scope:
+                self.router.db_for_write(get_user_model())
+            self.assertTrue(scope["wrote"])
+
+            replicas.stick(self.user.pk)
+            with replicas.request_scope():
+                self.assertIsNone(replicas.route_reads(self.user))
+                self.assertIsNone(replicas._read_alias.get())
+
+    def test_safe_viewset_requests_route_reads(self):
+        """Test that only safe requests of the viewsets pick a replica."""
+        self.client.force_login(self.user)
+        with mock.patch.object(
+            replicas, "choose_replica", return_value=None
+        ) as choose:
+            self.client.get("/api/tasks/")
+            with self.assertLogs("django.request", "WARNING"):
+                self.client.post("/api/tasks/", {})
+
+        self.assertEqual(choose.call_count, 1)
+
+    def test_middleware_sticks_users_who_wrote(self):
+        """Test that a write in a request makes its user sticky."""
+        users = get_user_model().objects
+
+        def view(request):
+            request.user = self.user
+            if request.method == "POST":
+                users.filter(pk=self.user.pk).update(first_name="Writer")
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        middleware(RequestFactory().get("/"))
+        self.assertFalse(replicas.is_sticky(self.user.pk))
+        middleware(RequestFactory().post("/"))
+        self.assertTrue(replicas.is_sticky(self.user.pk))
+
+    def test_relations_across_replicas_are_allowed(self):
+        """Test that primary and replica rows can be related."""
+        primary, replica = mock.Mock(), mock.Mock()
+        primary._state.db, replica._state.db = "default", "replica1"
+
+        self.assertTrue(self.router.allow_relation(primary, replica))
+        replica._state.db = "other"
+        self.assertIsNone(self.router.allow_relation(primary, replica))
+
+
+class RendererTests(TestCase):
+    """Tests for the JSON and MessagePack renderers and parsers."""
+
+    def test_json_matches_drf_renderer(self):
+        """Test that the output is byte for byte DRF's."""
+        data = {
+            "at": datetime(2024, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc),
+            "price": Decimal("1.50"),
+            "id": UUID(int=5),
+            "text": "line\u2028separator \u00e9 \U0001f600",
+            "lazy": gettext_lazy("Hello"),
+            "values": [1.5, None, True, (1, 2)],
+            "big": 2**70,
+            1: "non-string key",
+        }
+        expected = drf_renderers.JSONRenderer().render(data)
+
+        self.assertEqual(renderers.JSONRenderer().render(data), expected)
+        self.assertEqual(
+            renderers.JSONRenderer().render(
+                data, "application/json; indent=2"
+            ),
+            drf_renderers.JSONRenderer().render(
+                data, "application/json; indent=2"
+            ),
+        )
+        self.assertEqual(renderers.JSONRenderer().render(None), b"")
+
+    def test_json_parser(self):
+        """Test that bodies parse like DRF's strict parser."""
+        parser = parsers.JSONParser()
+
+        self.assertEqual(
+            parser.parse(BytesIO('{"name": "\u00e9"}'.encode())),
+            {"name": "\u00e9"},
+        )
+        for body in (b'{"a": NaN}', b"{", b"\xff"):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    parser.parse(BytesIO(body))
+        self.assertEqual(
+            parser.parse(
+                BytesIO('{"a": "\u00e9"}'.encode("latin-1")),
+                parser_context={"encoding": "latin-1"},
+            ),
+            {"a": "\u00e9"},
+        )
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_is_negotiated(self):
+        """Test that clients asking for MessagePack get the same data."""
+        json_response = self.client.get("/api/tasks/")
+        response = self.client.get(
+            "/api/tasks/", HTTP_ACCEPT="application/msgpack"
+        )
+
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(
+            renderers.msgpack.unpackb(response.content), json_response.json()
+        )
+        self.assertEqual(
+            self.client.get("/api/tasks/")["Content-Type"], "application/json"
+        )
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_bodies_are_parsed(self):
+        """Test that MessagePack request bodies reach the serializers."""
+        get_user_model().objects.create_user("packer", password="packpass1")
+        response = self.client.post(
+            "/api/auth/login/",
+            renderers.msgpack.packb(
+                {"username": "packer", "password": "packpass1"}
+            ),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.post(
+                "/api/auth/login/",
+                b"\xc1",
+                content_type="application/msgpack",
+            )
+        self.assertEqual(response.status_code, 400)
+
+
+class ContentTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContentType
+        fields = ("id", "app_label", "model")
+
+
+class UpperModelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContentType
+        fields = ("model",)
+
+    def to_representation(self, instance):
+        return {"model": instance.model.upper()}
+
+
+class PermissionRowSerializer(serializers.ModelSerializer):
+    content_type_detail = ContentTypeSerializer(source="content_type")
+    content_type_upper = UpperModelSerializer(source="content_type")
+    content_type_name = serializers.StringRelatedField(source="content_type")
+    app_label = serializers.CharField(source="content_type.app_label")
+    kind = serializers.ChoiceField(
+        choices=[("add_user", "Add user")], source="codename"
+    )
+    missing = serializers.CharField(required=False)
+    label = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Permission
+        fields = (
+            "id",
+            "name",
+            "content_type",
+            "content_type_detail",
+            "content_type_upper",
+            "content_type_name",
+            "app_label",
+            "kind",
+            "missing",
+            "label",
+        )
+
+    def get_label(self, obj):
+        return f"{obj.content_type_id}:{obj.codename}"
+
+
+class PermissionTypeSerializer(serializers.ModelSerializer):
+    content_type = ContentTypeSerializer()
+
+    class Meta:
+        model = Permission
+        fields = ("id", "content_type")
+
+
+class DeclaredPermissionRowSerializer(PermissionRowSerializer):
+    class Meta(PermissionRowSerializer.Meta):
+        field_queries = {"label": FieldQuery(only=("codename",))}
+
+
+class UserRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = (
+            "id",
+            "username",
+            "is_staff",
+            "last_login",
+            "date_joined",
+            "groups",
+        )
+
+
+class CompiledSerializerTests(TestCase):
+    """Tests for compiled serializer representations."""
+
+    def assertCompiledMatches(self, serializer_class, instance, **kwargs):
+        render = drf_renderers.JSONRenderer().render
+        expected = render(serializer_class(instance, **kwargs).data)
+        serializer = serializer_class(instance, **kwargs)
+
+        self.assertTrue(compile_representation(serializer))
+        self.assertEqual(render(serializer.data), expected)
+
+    def test_output_matches_drf(self):
+        """Test relations, sources, choices, skipped and null fields."""
+        permissions = Permission.objects.order_by("pk")[:20]
+        users = get_user_model().objects
+        users.create_user("never", password="neverpass1")
+        users.create_user("seen", password="seenpass1")
+        users.filter(username="seen").update(
+            last_login=datetime(2024, 5, 6, 7, 8, 9, tzinfo=timezone.utc)
+        )
+
+        self.assertCompiledMatches(
+            PermissionRowSerializer, list(permissions), many=True
+        )
+        self.assertCompiledMatches(PermissionRowSerializer, permissions[0])
+        with django_timezone.override("Asia/Tokyo"):
+            self.assertCompiledMatches(
+                UserRowSerializer, users.order_by("pk"), many=True
+            )
+
+    def test_plain_fields_are_specialised(self):
+        """Test that DRF fields convert directly, others keep their own."""
+        serializer = PermissionRowSerializer()
+        steps = {
+            name: (getter, convert)
+            for name, getter, convert in compile_serializer(serializer).steps
+        }
+        permission = Permission.objects.first()
+
+        self.assertIs(steps["id"][1], int)
+        self.assertIs(steps["content_type_name"][1], str)
+        self.assertEqual(
+            steps["content_type"][0](permission), permission.content_type_id
+        )
+        self.assertEqual(
+            steps["content_type_upper"][1],
+            serializer.fields["content_type_upper"].to_representation,
+        )
+
+    def test_custom_representations_are_not_compiled(self):
+        """Test that serializers with their own output are left alone."""
+        serializer = UpperModelSerializer(ContentType.objects.first())
+
+        self.assertIsNone(compile_serializer(serializer))
+        self.assertFalse(compile_representation(serializer))
+
+
+class SerializerQueryTests(TestCase):
+    """Tests for queries derived from serializer fields."""
+
+    def assertRendersWith(self, serializer_class, queryset, queries):
+        expected = serializer_class(queryset.order_by("pk"), many=True).data
+        query = serializer_query(serializer_class())
+        optimized = queryset.select_related(*query.select_related)
+        optimized = optimized.prefetch_related(*query.prefetch_related)
+        columns = query.columns()
+        if columns is not None:
+            optimized = optimized.only("pk", *columns)
+
+        with self.assertNumQueries(queries):
+            data = serializer_class(optimized.order_by("pk"), many=True).data
+        self.assertEqual(data, expected)
+
+    def test_relations_are_joined_or_prefetched(self):
+        """Test dotted sources, nested, string and many relations."""
+        permissions = DeclaredPermissionRowSerializer()
+        users = UserRowSerializer()
+        user = get_user_model().objects.create_user("grouped")
+        user.groups.create(name="Reviewers")
+
+        self.assertEqual(
+            serializer_query(permissions).select_related, ("content_type",)
+        )
+        # The string relation loads the whole content type.
+        self.assertEqual(
+            serializer_query(permissions).columns(),
+            ("id", "name", "content_type", "codename"),
+        )
+        self.assertEqual(serializer_query(users).prefetch_related, ("groups",))
+        self.assertRendersWith(
+            DeclaredPermissionRowSerializer, Permission.objects.all(), 1
+        )
+        self.assertRendersWith(
+            UserRowSerializer, get_user_model().objects.all(), 2
+        )
+
+    def test_nested_columns(self):
+        """Test that nested serializers load only their columns."""
+        self.assertEqual(
+            serializer_query(PermissionTypeSerializer()).columns(),
+            (
+                "id",
+                "content_type",
+                "content_type__id",
+                "content_type__app_label",
+                "content_type__model",
+            ),
+        )
+        self.assertRendersWith(
+            PermissionTypeSerializer, Permission.objects.all(), 1
+        )
+
+    def test_unseen_reads_load_the_whole_row(self):
+        """Test method fields without a declaration."""
+        query = serializer_query(PermissionRowSerializer())
+
+        self.assertIsNone(query.columns())
+        self.assertRendersWith(
+            PermissionRowSerializer, Permission.objects.all(), 1
+        )
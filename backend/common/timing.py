@@ -0,0 +1,70 @@
+"""Per-request timings collected for ``ServerTimingMiddleware``.
+
+The middleware activates a ``RequestTimings`` for sampled requests only;
+everywhere else ``span`` and ``count`` return after one context variable
+lookup, so instrumented code costs next to nothing when not sampled.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, Optional, Set
+
+
+class RequestTimings:
+    """Durations (seconds) and counters of one request."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.counts: Counter = Counter()
+        self.view: Optional[str] = None
+        self.action: Optional[str] = None
+        self.view_started: Optional[float] = None
+        self.view_finished: Optional[float] = None
+        self._open: Set[str] = set()
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def activate(timings: RequestTimings) -> Token:
+    return _current.set(timings)
+
+
+def deactivate(token: Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def span(metric: str) -> Iterator[None]:
+    """Add the time spent in the block to ``metric``.
+
+    Nested spans of the same metric (a list serializer calling its
+    children) are only counted once, by the outermost one.
+    """
+    timings = _current.get()
+    if timings is None or metric in timings._open:
+        yield
+        return
+    timings._open.add(metric)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[metric] += time.perf_counter() - started
+        timings._open.discard(metric)
+
+
+def count(name: str, n: int = 1) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.counts[name] += n
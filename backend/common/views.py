@@ -0,0 +1,44 @@
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from common import metrics, slow_queries
+from common.permissions import IsMetricsScraper
+
+
+@extend_schema(exclude=True)
+class MetricsView(APIView):
+    """Prometheus exposition of ``common.metrics``, all workers included."""
+
+    authentication_classes = (JWTAuthentication, SessionAuthentication)
+    permission_classes = (IsMetricsScraper,)
+
+    def get(self, request):
+        body, content_type = metrics.render()
+        return HttpResponse(body, content_type=content_type)
+
+
+@extend_schema(exclude=True)
+class SlowQueryView(APIView):
+    """Entries of the slow query log, newest first (``?limit=N``).
+
+    ``DELETE`` empties the log.
+    """
+
+    authentication_classes = (JWTAuthentication, SessionAuthentication)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 0))
+        except ValueError:
+            limit = 0
+        return Response(slow_queries.recent(limit=max(limit, 0) or None))
+
+    def delete(self, request):
+        slow_queries.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
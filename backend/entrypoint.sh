@@ -9,8 +9,16 @@ if [ "$(id -u)" = "0" ]; then
     exec gosu django-user "$0" "$@"
 fi
 
+# Workers write their Prometheus metrics here; /metrics aggregates them.
+# Files of a previous run would be counted again, so start empty.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 CORES=$(nproc)
 DYNAMIC_WORKERS=$(( (CORES * 2) + 1 ))
+# Settings split DJANGO_DB_MAX_CONNECTIONS between this many workers.
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-$DYNAMIC_WORKERS}
 
-echo "Starting with $DYNAMIC_WORKERS workers"
-exec gunicorn --workers $DYNAMIC_WORKERS --bind 0.0.0.0:8000 backend.wsgi:application
\ No newline at end of file
+echo "Starting with $WEB_CONCURRENCY workers"
+exec gunicorn --workers "$WEB_CONCURRENCY" --bind 0.0.0.0:8000 backend.wsgi:application
\ No newline at end of file
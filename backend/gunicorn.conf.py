@@ -0,0 +1,14 @@
+"""Gunicorn settings loaded from the working directory (see entrypoint.sh).
+
+Worker count and bind address are passed on the command line.
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of the exited worker from /metrics.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -6,6 +6,7 @@ import type {
   TProgrammingTask,
   TCreateSolution,
   TSolution,
+  TSolutionSummary,
   TUpdateSolution,
   TPublishSolution,
   TReview,
@@ -141,7 +142,7 @@ export const catalogApi = {
 
   getSolutions: async (
     filters?: TSolutionFilters,
-  ): Promise<TPaginatedResponse<TSolution>> => {
+  ): Promise<TPaginatedResponse<TSolutionSummary>> => {
     const params = new URLSearchParams();
     if (filters?.task) {
       params.append('task', filters.task.toString());
@@ -158,9 +159,11 @@ export const catalogApi = {
     if (filters?.page) {
       params.append('page', filters.page.toString());
     }
+    // Solution cards never show the nested task; skip its JOIN.
+    params.append('exclude', 'task_detail');
 
     const response = await apiClient.get<
-      TPaginatedResponse<TSolution>,
+      TPaginatedResponse<TSolutionSummary>,
       '/api/solutions/'
     >('/api/solutions/', params);
     return response.data;
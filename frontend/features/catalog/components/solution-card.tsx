@@ -1,17 +1,22 @@
 'use client';
 
 import { Link } from '@/navigation';
+import { useQuery } from '@tanstack/react-query';
 import { ThumbsUp, ThumbsDown, Trash2 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { CodeBlock } from '@/components/code-block';
 import { useAppStoreApi } from '@/shared/providers/zustand.provider';
 import { useTranslations } from 'next-intl';
-import type { TSolution } from '../types';
+import type { TSolutionSummary } from '../types';
+import { catalogApi } from '../catalog.api';
 import { useSolutionMutations } from '../hooks/use-solution-mutations';
 import { useState } from 'react';
 
+// Matches EXPLANATION_PREVIEW_CHARS on the backend
+const EXPLANATION_PREVIEW_CHARS = 280;
+
 type TSolutionCardProps = {
-  solution: TSolution;
+  solution: TSolutionSummary;
   taskId: number;
 };
 
@@ -19,6 +24,20 @@ export function SolutionCard({ solution, taskId }: TSolutionCardProps) {
   const t = useTranslations('TaskDetail');
   const user = useAppStoreApi().use.user();
   const [publishError, setPublishError] = useState<string | null>(null);
+  const [expanded, setExpanded] = useState(false);
+
+  // List pages only carry previews; the full body is loaded on demand.
+  const fullSolution = useQuery({
+    queryKey: ['solution', solution.id],
+    queryFn: () => catalogApi.getSolution(solution.id),
+    enabled: expanded,
+  });
+  const isTruncated =
+    solution.code_preview.length < solution.code_length ||
+    solution.explanation_preview.length >= EXPLANATION_PREVIEW_CHARS;
+  const full = expanded ? fullSolution.data : undefined;
+  const code = full?.code ?? solution.code_preview;
+  const explanation = full?.explanation ?? solution.explanation_preview;
 
   const { createReviewMutation, publishMutation, deleteMutation } =
     useSolutionMutations({
@@ -106,11 +125,11 @@ export function SolutionCard({ solution, taskId }: TSolutionCardProps) {
         )}
       </div>
 
-      {solution.explanation && (
+      {explanation && (
         <div className="mb-4 min-w-0">
           <h4 className="mb-2 text-sm font-semibold">{t('explanation')}</h4>
           <p className="text-muted-foreground text-sm wrap-break-word whitespace-pre-wrap">
-            {solution.explanation}
+            {explanation}
           </p>
         </div>
       )}
@@ -125,11 +144,27 @@ export function SolutionCard({ solution, taskId }: TSolutionCardProps) {
           aria-labelledby={`code-${solution.id}`}
         >
           <CodeBlock
-            code={solution.code}
+            code={code}
             language={solution.language_name}
-            showCopyButton
+            showCopyButton={!isTruncated || Boolean(full)}
           />
         </div>
+        {isTruncated && (
+          <Button
+            variant="ghost"
+            size="sm"
+            className="mt-2"
+            onClick={() => setExpanded((value) => !value)}
+            disabled={fullSolution.isFetching}
+            aria-expanded={Boolean(full)}
+          >
+            {fullSolution.isFetching
+              ? t('loadingCode')
+              : full
+                ? t('collapseCode')
+                : t('expandCode', { count: solution.code_lines })}
+          </Button>
+        )}
       </div>
 
       {canReview && (
@@ -7,18 +7,18 @@ import { ErrorDisplay } from '@/components/error-display';
 import { getTranslatedErrorMessage } from '@/lib/utils/error-handler';
 import { SolutionCard } from './solution-card';
 import { useTranslations } from 'next-intl';
-import type { TSolution } from '../types';
+import type { TSolutionSummary } from '../types';
 import { CatalogPagination } from './catalog-pagination';
 
 type TSolutionsListPresentationProps = {
-  solutions: TSolution[];
+  solutions: TSolutionSummary[];
   taskId: number;
   isLoading: boolean;
   error: Error | null;
   onRetry: () => void;
   onAddSolution: () => void;
-  userSolutions: TSolution[];
-  publicSolutions: TSolution[];
+  userSolutions: TSolutionSummary[];
+  publicSolutions: TSolutionSummary[];
   page: number;
   totalPages: number;
   totalCount: number;
@@ -3,7 +3,12 @@ import { catalogApi } from '../catalog.api';
 import { getTranslatedErrorMessage } from '@/lib/utils/error-handler';
 import { toast } from 'sonner';
 import { useTranslations } from 'next-intl';
-import type { TReview, TSolution, TCreateReview } from '../types';
+import type {
+  TReview,
+  TSolution,
+  TSolutionSummary,
+  TCreateReview,
+} from '../types';
 
 type TUseSolutionMutationsProps = {
   solutionId: number;
@@ -35,7 +40,7 @@ export function useSolutionMutations({
 
       queryClient.setQueryData(
         ['solutions', taskId],
-        (old: { results: TSolution[]; count: number } | undefined) => {
+        (old: { results: TSolutionSummary[]; count: number } | undefined) => {
           if (!old?.results) return old;
           return {
             ...old,
@@ -195,7 +200,7 @@ export function useSolutionMutations({
       const previousSolutions = queryClient.getQueryData(['solutions', taskId]);
       queryClient.setQueryData(
         ['solutions', taskId],
-        (old: { results: TSolution[]; count: number } | undefined) => {
+        (old: { results: TSolutionSummary[]; count: number } | undefined) => {
           if (!old?.results) return old;
           return {
             ...old,
@@ -4,10 +4,12 @@ export type { TProgrammingLanguage } from './language.type';
 export type {
   TProgrammingTask,
   TProgrammingTaskDetail,
+  TProgrammingTaskSummary,
   ETaskStatus,
 } from './task.type';
 export type {
   TSolution,
+  TSolutionSummary,
   TCreateSolution,
   TUpdateSolution,
   TPublishSolution,
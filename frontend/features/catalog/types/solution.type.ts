@@ -1,4 +1,7 @@
-import type { TProgrammingTaskDetail } from './task.type';
+import type {
+  TProgrammingTaskDetail,
+  TProgrammingTaskSummary,
+} from './task.type';
 
 export type TUserReview = {
   id: number;
@@ -20,7 +23,20 @@ export type TSolution = {
   updated_at: string;
   positive_reviews_count: number;
   negative_reviews_count: number;
+  code_length: number;
+  code_lines: number;
   user_review: TUserReview;
+  search_highlight?: string | null;
+};
+
+/** List representation: code and explanation are replaced by previews. */
+export type TSolutionSummary = Omit<
+  TSolution,
+  'code' | 'explanation' | 'task_detail'
+> & {
+  task_detail?: TProgrammingTaskSummary;
+  code_preview: string;
+  explanation_preview: string;
 };
 
 export type TCreateSolution = {
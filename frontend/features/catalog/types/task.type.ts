@@ -14,8 +14,14 @@ export type TProgrammingTask = {
   status: ETaskStatus;
   created_at: string;
   updated_at: string;
+  search_highlight?: string | null;
 };
 
+export type TProgrammingTaskSummary = Omit<
+  TProgrammingTask,
+  'description' | 'search_highlight'
+>;
+
 export type TProgrammingTaskDetail = Omit<
   TProgrammingTask,
   'difficulty' | 'category'